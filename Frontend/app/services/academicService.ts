@@ -14,7 +14,7 @@ export const MentorService = {
       email: m.email,
       phone: m.phone || '',
       specialty: m.charge,
-      profileImage: m.photo ?? undefined,
+      profileImage: m.photo_variants?.['256']?.webp ?? m.photo ?? undefined,
       bio: '',
       status: 'active' as const,
       expertise: [],
@@ -32,7 +32,7 @@ export const MentorService = {
       email: m.email,
       phone: m.phone || '',
       specialty: m.charge,
-      profileImage: m.photo ?? undefined,
+      profileImage: m.photo_variants?.['256']?.webp ?? m.photo ?? undefined,
       bio: '',
       status: 'active' as const,
       expertise: [],
@@ -93,7 +93,7 @@ export const MentorService = {
         email: m.email,
         phone: m.phone || '',
         specialty: m.charge,
-        profileImage: m.photo ?? undefined,
+        profileImage: m.photo_variants?.['256']?.webp ?? m.photo ?? undefined,
         bio: '',
         status: 'active' as const,
         expertise: [],
@@ -204,7 +204,7 @@ export const MentorService = {
         email: m.email,
         phone: m.phone || '',
         specialty: m.charge,
-        profileImage: m.photo ?? undefined,
+        profileImage: m.photo_variants?.['256']?.webp ?? m.photo ?? undefined,
         bio: '',
         status: 'active' as const,
         expertise: [],
@@ -342,43 +342,14 @@ export const ProjectService = {
 // GroupService
 export const GroupService = {
   getGroups: async (projectId: string): Promise<Group[]> => {
-    const response = await apiClient.get(`/projects/${projectId}/groups/`);
+    // El backend incluye el horario, el nombre del mentor y el conteo de eventos
+    const response = await apiClient.get(`/projects/${projectId}/groups/`, {
+      params: { expand: 'schedule,mentor,events' },
+    });
     const data = response.data.results || response.data;
     
-    console.log('📦 Respuesta raw de grupos:', JSON.stringify(data, null, 2));
-    
-    // Si schedule es un ID, necesitamos obtener los schedules por separado
-    const schedules: Record<string, any> = {};
-    
-    // Intentar obtener todos los schedules
-    try {
-      const schedulesResponse = await apiClient.get('/schedule/');
-      const schedulesData = schedulesResponse.data.results || schedulesResponse.data;
-      
-      if (Array.isArray(schedulesData)) {
-        schedulesData.forEach((sch: any) => {
-          schedules[String(sch.id)] = sch;
-        });
-      }
-    } catch (error) {
-      console.warn('⚠️ No se pudieron cargar los schedules:', error);
-    }
-    
     return (Array.isArray(data) ? data : []).map((g: any) => {
-      console.log('🔍 Procesando grupo:', JSON.stringify(g, null, 2));
-      
-      // Determinar el schedule (puede ser un ID o un objeto)
-      let scheduleData = null;
-      
-      if (typeof g.schedule === 'number') {
-        // schedule es un ID, buscar en los schedules cargados
-        scheduleData = schedules[String(g.schedule)];
-        console.log(`📅 Schedule ID ${g.schedule} encontrado:`, scheduleData);
-      } else if (typeof g.schedule === 'object' && g.schedule !== null) {
-        // schedule ya es un objeto
-        scheduleData = g.schedule;
-        console.log('📅 Schedule como objeto:', scheduleData);
-      }
+      const scheduleData = typeof g.schedule === 'object' ? g.schedule : null;
       
       return {
         id: String(g.id),
@@ -386,7 +357,7 @@ export const GroupService = {
         projectId: String(g.project),
         projectName: '', // Se puede obtener del proyecto padre si es necesario
         mentorId: String(g.mentor),
-        mentorName: '', // No viene en la respuesta, se debe obtener por separado
+        mentorName: g.mentor_name || '',
         mode: g.mode || '',
         location: g.location || '',
         startDate: g.start_date || '',
@@ -1,37 +1,25 @@
 import { Stats } from '~/types/stats';
-import { MentorService } from '~/services/academicService';
-import { ProjectService } from '~/services/academicService';
-import { GroupService } from '~/services/academicService';
+import { apiClient } from '~/utils/api';
 
 export const StatsService = {
   getStats: async (): Promise<Stats> => {
     try {
-      console.log('📊 Calculando estadísticas desde servicios...');
-      
-      // Obtener datos de múltiples endpoints
-      const [mentors, projects] = await Promise.all([
-        MentorService.getMentors(),
-        ProjectService.getProjects()
-      ]);
+      console.log('📊 Obteniendo estadísticas de proyectos...');
 
-      // Contar grupos desde los proyectos
-      let totalGroups = 0;
-      for (const project of projects) {
-        if (project.groups && Array.isArray(project.groups)) {
-          totalGroups += project.groups.length;
-        }
-      }
+      // Un solo request: el backend calcula los totales con una consulta agregada
+      const response = await apiClient.get('/projects/summary/');
+      const { totals } = response.data;
 
       const stats: Stats = {
-        mentors: mentors.length,
-        projects: projects.length,
-        groups: totalGroups
+        mentors: totals.mentors,
+        projects: totals.projects,
+        groups: totals.groups
       };
 
-      console.log('✅ Estadísticas calculadas:', stats);
+      console.log('✅ Estadísticas obtenidas:', stats);
       return stats;
     } catch (error) {
-      console.error('❌ Error al calcular estadísticas:', error);
+      console.error('❌ Error al obtener estadísticas:', error);
       
       // Retornar estadísticas vacías en caso de error
       return {
@@ -41,4 +29,4 @@ export const StatsService = {
       };
     }
   },
-};
\ No newline at end of file
+};
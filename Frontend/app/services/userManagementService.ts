@@ -18,7 +18,7 @@ export const UserManagementService = {
         email: profile.user.email,
         role: profile.role,
         phone: profile.phone || '',
-        photo: profile.photo,
+        photo: profile.photo_variants?.['64']?.webp ?? profile.photo,
         isActive: true
       }));
     } catch (error) {
@@ -0,0 +1,111 @@
+from datetime import datetime, time, timedelta
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.core.models import Schedule
+from apps.mentors.models import Mentor, MentorAttendance
+from apps.projects.models import Event, Group, Project
+from apps.users.authentication import RoleRefreshToken
+from apps.users.models import Profile
+
+
+def seed(scale: int) -> dict:
+    """
+    Seeds a dataset that grows in every dimension with `scale`:
+    `scale` projects, `scale` groups per project (each with its own mentor
+    and schedule), `scale` weekly events per group (the first one in the
+    past, every third one cancelled) and one attendance per past event.
+
+    Uses bulk_create, so no signals run. Returns the first object of each
+    kind, used to build the URLs of detail endpoints.
+    """
+    today = timezone.localdate()
+    group_count = scale * scale
+
+    admin = User.objects.create_user(username="perf-admin", password="perf-admin", email="perf-admin@nodux.test")
+    admin_profile = Profile.objects.create(user=admin, role="SuperAdmin")
+
+    users = User.objects.bulk_create([
+        User(
+            username=f"perf-mentor-{index}",
+            first_name="Mentor",
+            last_name=str(index),
+            email=f"perf-mentor-{index}@nodux.test",
+            password="!",
+        )
+        for index in range(group_count)
+    ])
+    profiles = Profile.objects.bulk_create([Profile(user=user, role="Mentor") for user in users])
+    mentors = Mentor.objects.bulk_create([
+        Mentor(profile=profile, charge="Mentor", knowledge_level="basico") for profile in profiles
+    ])
+
+    # Un horario distinto por grupo: 7 días x franjas de 30 minutos desde las 06:00
+    schedules = []
+    for index in range(group_count):
+        start = datetime.combine(today, time(6)) + timedelta(minutes=30 * (index // 7))
+        schedules.append(Schedule(day=index % 7, start_time=start.time(), end_time=(start + timedelta(hours=1)).time()))
+    schedules = Schedule.objects.bulk_create(schedules)
+
+    projects = Project.objects.bulk_create([
+        Project(name=f"Proyecto {index}", is_active=index % 2 == 0) for index in range(scale)
+    ])
+    groups = Group.objects.bulk_create([
+        Group(
+            project=projects[index // scale],
+            mentor=mentors[index],
+            schedule=schedules[index],
+            location=f"Sede {index}",
+            mode="presencial",
+            start_date=today - timedelta(days=7),
+            end_date=today + timedelta(days=7 * scale),
+        )
+        for index in range(group_count)
+    ])
+    events = Event.objects.bulk_create([
+        Event(
+            group=group,
+            event_date=today + timedelta(days=7 * week - 1),
+            is_cancelled=week % 3 == 2,
+            attendance_generated=week == 0,
+        )
+        for group in groups
+        for week in range(scale)
+    ])
+
+    attendances = []
+    for event in events:
+        if event.event_date >= today or event.is_cancelled:
+            continue
+        schedule = event.group.schedule
+        start = timezone.make_aware(datetime.combine(event.event_date, schedule.start_time))
+        attendances.append(MentorAttendance(
+            mentor_id=event.group.mentor_id,
+            event=event,
+            date=event.event_date,
+            start_datetime=start,
+            end_datetime=start + timedelta(hours=1),
+            hours=1,
+        ))
+    attendances = MentorAttendance.objects.bulk_create(attendances)
+
+    return {
+        "admin": admin,
+        "profile": admin_profile,
+        "mentor": mentors[0],
+        "schedule": schedules[0],
+        "project": projects[0],
+        "group": groups[0],
+        "event": events[0],
+        "attendance": attendances[0],
+    }
+
+
+def client_for(user) -> APIClient:
+    """
+    API client authenticated with a real access token, so the role claims
+    and the authentication queries are the ones of production requests.
+    """
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {RoleRefreshToken.for_user(user).access_token}")
+    return client
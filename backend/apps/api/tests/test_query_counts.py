@@ -0,0 +1,183 @@
+"""
+N+1 regression and benchmark suite for the list and detail endpoints of
+apps/api/urls.py.
+
+Every endpoint is requested with the dataset of apps.api.tests.seeding at
+each scale of N1_VOLUMES (default "2,5"). The number of queries of a warm
+request must not grow with the scale; a serializer that walks a relation
+per row fails here. Each endpoint is also requested N1_REPEAT times (default
+10) per scale to record p50/p95 latency and rows/sec, written to the JSON
+report N1_REPORT (default backend/n1-report.json) so it can be diffed
+between releases.
+
+    pytest apps/api/tests
+    N1_VOLUMES=3,10 N1_REPORT=/tmp/n1-release.json pytest apps/api/tests
+"""
+import json
+import math
+import os
+import time
+from pathlib import Path
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, reverse
+from django.utils import timezone
+from apps.api.urls import urlpatterns
+from apps.core.services.schedules import ScheduleService
+from apps.mentors.services.workload import workload_index
+from .seeding import client_for, seed
+
+VOLUMES = sorted(int(volume) for volume in os.environ.get("N1_VOLUMES", "2,5").split(","))
+REPEAT = int(os.environ.get("N1_REPEAT", "10"))
+REPORT = Path(os.environ.get("N1_REPORT", Path(settings.BASE_DIR) / "n1-report.json"))
+
+# kwargs de la URL de cada endpoint a partir de los objetos sembrados. Un
+# endpoint nuevo en apps/api/urls.py que no esté aquí hace fallar la suite.
+URL_KWARGS = {
+    "api:mentor-list": lambda data: {},
+    "api:mentor-detail": lambda data: {"pk": data["mentor"].pk},
+    "api:attendance-list": lambda data: {},
+    "api:attendance-detail": lambda data: {"pk": data["attendance"].pk},
+    "api:project-list": lambda data: {},
+    "api:project-detail": lambda data: {"pk": data["project"].pk},
+    "api:schedule-list": lambda data: {},
+    "api:schedule-detail": lambda data: {"pk": data["schedule"].pk},
+    "api:events-list": lambda data: {},
+    "api:events-detail": lambda data: {"pk": data["event"].pk},
+    "api:projects-groups-list": lambda data: {"project_pk": data["project"].pk},
+    "api:projects-groups-detail": lambda data: {"project_pk": data["project"].pk, "pk": data["group"].pk},
+    "api:projects-groups-events-list": lambda data: {
+        "project_pk": data["project"].pk, "group_pk": data["group"].pk,
+    },
+    "api:projects-groups-events-detail": lambda data: {
+        "project_pk": data["project"].pk, "group_pk": data["group"].pk, "pk": data["event"].pk,
+    },
+    "api:user-management-list": lambda data: {},
+    "api:user-management-detail": lambda data: {"pk": data["profile"].pk},
+}
+
+# Endpoints con N+1 conocido. strict: al corregirlos la suite avisa para sacarlos de aquí
+KNOWN_N_PLUS_ONE = {
+    "api:mentor-list": "MentorSerializer lee profile y profile.user por cada mentor",
+    "api:user-management-list": "ProfileSerializer lee profile.user por cada perfil",
+}
+
+
+def discover_endpoints(patterns=urlpatterns):
+    """
+    Returns the names of every router list and detail route of apps/api/urls.py.
+    """
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names |= discover_endpoints(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name and pattern.name.endswith(("-list", "-detail")):
+            names.add(f"api:{pattern.name}")
+    return names
+
+
+ENDPOINTS = sorted(discover_endpoints())
+
+
+def _percentile(samples, percent):
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(len(ordered) * percent / 100) - 1)]
+
+
+def _rows(data):
+    if isinstance(data, dict) and isinstance(data.get("results"), list):
+        return len(data["results"])
+    if isinstance(data, list):
+        return len(data)
+    return 1
+
+
+def _reset_process_state():
+    # Cachés de proceso que podrían conservar filas de una escala anterior
+    cache.clear()
+    ScheduleService.invalidate()
+    workload_index.invalidate()
+
+
+def _measure(client, path):
+    _reset_process_state()
+    # Primera petición para calentar cachés de proceso (índices, versiones)
+    client.get(path)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(path)
+    # Leer antes de las siguientes peticiones, que reinician connection.queries
+    query_count = len(queries.captured_queries)
+
+    latencies = []
+    for _ in range(REPEAT):
+        cache.clear()  # throttling
+        started = time.perf_counter()
+        client.get(path)
+        latencies.append(time.perf_counter() - started)
+
+    rows = _rows(response.data) if response.status_code == 200 else 0
+    p50 = _percentile(latencies, 50)
+    return {
+        "status": response.status_code,
+        "queries": query_count,
+        "rows": rows,
+        "p50_ms": round(p50 * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 3),
+        "rows_per_sec": round(rows / p50, 1) if p50 else None,
+    }
+
+
+@pytest.fixture(scope="module")
+def measurements(django_db_setup, django_db_blocker):
+    """
+    Seeds each volume inside a transaction that is rolled back afterwards,
+    measures every endpoint against it and writes the JSON report.
+    """
+    results = {name: {"path": None, "volumes": {}} for name in ENDPOINTS if name in URL_KWARGS}
+    with django_db_blocker.unblock():
+        for volume in VOLUMES:
+            with transaction.atomic():
+                data = seed(volume)
+                client = client_for(data["admin"])
+                for name in results:
+                    path = reverse(name, kwargs=URL_KWARGS[name](data))
+                    results[name]["path"] = path
+                    results[name]["volumes"][str(volume)] = _measure(client, path)
+                transaction.set_rollback(True)
+        _reset_process_state()
+
+    REPORT.parent.mkdir(parents=True, exist_ok=True)
+    REPORT.write_text(json.dumps({
+        "generated_at": timezone.now().isoformat(),
+        "database": connection.vendor,
+        "volumes": VOLUMES,
+        "repeat": REPEAT,
+        "endpoints": results,
+    }, indent=2, sort_keys=True) + "\n")
+    return results
+
+
+def test_every_endpoint_is_measured():
+    missing = sorted(set(ENDPOINTS) - URL_KWARGS.keys())
+    assert not missing, f"Agregar a URL_KWARGS los endpoints: {missing}"
+
+
+@pytest.mark.parametrize("name", [
+    pytest.param(name, marks=pytest.mark.xfail(reason=KNOWN_N_PLUS_ONE[name], strict=True))
+    if name in KNOWN_N_PLUS_ONE else name
+    for name in ENDPOINTS
+    if name in URL_KWARGS
+])
+def test_query_count_does_not_grow_with_rows(measurements, name):
+    by_volume = measurements[name]["volumes"]
+    statuses = {volume: result["status"] for volume, result in by_volume.items()}
+    assert set(statuses.values()) == {200}, f"{measurements[name]['path']}: {statuses}"
+
+    rows = [by_volume[str(volume)]["rows"] for volume in VOLUMES]
+    queries = [by_volume[str(volume)]["queries"] for volume in VOLUMES]
+    assert max(queries) <= queries[0], (
+        f"{measurements[name]['path']}: {queries} consultas para {rows} filas (escalas {VOLUMES})"
+    )
@@ -12,6 +12,7 @@ from apps.core.views import ScheduleViewSet
 # Admin endpoints
 from apps.core.views import (
     admin_dashboard_stats,
+    admin_metrics,
     system_settings,
     update_system_settings,
     role_statistics,
@@ -44,6 +45,7 @@ urlpatterns = [
     path("", include(groupsRouter.urls)),
     # Admin endpoints
     path("admin/dashboard/stats/", admin_dashboard_stats, name="admin-dashboard-stats"),
+    path("admin/metrics/", admin_metrics, name="admin-metrics"),
     path("admin/settings/", system_settings, name="system-settings"),
     path("admin/settings/update/", update_system_settings, name="update-system-settings"),
     path("admin/roles/statistics/", role_statistics, name="role-statistics"),
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.core'
+
+    def ready(self):
+        from . import signals
+        from .events import periodic
+        signals.register()
+
+        from django.conf import settings
+        if getattr(settings, "INSTRUMENTATION_ENABLED", True):
+            from .services.instrumentation import instrument_serializers
+            instrument_serializers()
@@ -0,0 +1,42 @@
+import logging
+from huey import crontab
+from huey.contrib.djhuey import db_periodic_task, db_task
+from apps.core.models import DashboardSnapshot
+from apps.core.services.dashboard import DashboardService, SNAPSHOT_ID
+from apps.core.services.file_cleanup import FileCleanupService
+
+logger = logging.getLogger(__name__)
+
+
+@db_periodic_task(crontab(minute='*'))
+def refresh_dashboard_snapshot():
+    snapshot = DashboardSnapshot.objects.filter(pk=SNAPSHOT_ID).first()
+    if snapshot is not None and not DashboardService.is_stale(snapshot):
+        return
+    DashboardService.refresh()
+    logger.info("Dashboard snapshot refreshed")
+
+
+@db_task()
+def revalidate_dashboard_snapshot():
+    DashboardService.refresh()
+    logger.info("Dashboard snapshot revalidated")
+
+
+@db_task()
+def process_file_deletions():
+    result = FileCleanupService.process()
+    if result["deleted"] or result["failed"]:
+        logger.info(f"File deletions: {result['deleted']} deleted, {result['failed']} failed")
+
+
+@db_periodic_task(crontab(minute='*/10'))
+def retry_file_deletions():
+    # Pendientes que quedaron sin cola o fallaron
+    FileCleanupService.process()
+
+
+@db_periodic_task(crontab(hour='3', minute='30'))
+def sweep_orphan_files():
+    result = FileCleanupService.sweep_orphans()
+    logger.info(f"Orphan sweep: {result['scanned']} files scanned, {result['orphans']} orphans deleted")
@@ -0,0 +1,66 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from apps.core.models import StoredFile
+from apps.core.services.versions import VersionService
+from apps.core.storage import ContentAddressedStorage
+from apps.mentors.models import Mentor
+from apps.users.models import Profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Mueve las fotos y certificados guardados antes de ContentAddressedStorage "
+        "a rutas por contenido, de modo que los archivos repetidos se guarden una sola vez."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Solo contar los archivos a mover")
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, ContentAddressedStorage):
+            raise CommandError("El storage por defecto no es ContentAddressedStorage (MEDIA_STORAGE_BACKEND)")
+
+        self.stored = set(StoredFile.objects.values_list("path", flat=True))
+        self.legacy = set()
+        self.dry_run = options["dry_run"]
+        moved = 0
+
+        for profile in Profile.objects.exclude(photo="").exclude(photo__isnull=True).iterator():
+            photo = self._move(profile.photo.name)
+            variants = {
+                size: {fmt: self._move(name) for fmt, name in formats.items()}
+                for size, formats in profile.photo_variants.items()
+            }
+            if not self.dry_run and (photo != profile.photo.name or variants != profile.photo_variants):
+                Profile.objects.filter(pk=profile.pk).update(photo=photo, photo_variants=variants)
+                moved += 1
+
+        for mentor in Mentor.objects.exclude(certificate="").exclude(certificate__isnull=True).iterator():
+            certificate = self._move(mentor.certificate.name)
+            if not self.dry_run and certificate != mentor.certificate.name:
+                Mentor.objects.filter(pk=mentor.pk).update(certificate=certificate)
+                moved += 1
+
+        if self.dry_run:
+            self.stdout.write(f"{len(self.legacy)} archivos por mover")
+            return
+
+        # update() no emite señales: las URLs cambiaron
+        VersionService.mark_changed("profiles", "mentors")
+        # Sin fila en StoredFile: delete() borra el archivo antiguo directamente
+        for name in self.legacy:
+            default_storage.delete(name)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(self.legacy)} archivos movidos, {moved} registros actualizados, "
+            f"{StoredFile.objects.count()} archivos distintos"
+        ))
+
+    def _move(self, name):
+        if name in self.stored or not default_storage.exists(name):
+            return name
+        self.legacy.add(name)
+        if self.dry_run:
+            return name
+        with default_storage.open(name, "rb") as content, transaction.atomic():
+            return default_storage.save(name, content)
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from apps.core.services.file_cleanup import FileCleanupService
+
+
+class Command(BaseCommand):
+    help = (
+        "Procesa los borrados pendientes y elimina de MEDIA_ROOT los archivos que ningún "
+        "registro referencia (los más recientes que FILE_SWEEP_GRACE_HOURS se conservan)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Solo listar los huérfanos")
+        parser.add_argument("--batch-size", type=int, default=0, help="Rutas por consulta (por defecto FILE_SWEEP_BATCH_SIZE)")
+
+    def handle(self, *args, **options):
+        if not options["dry_run"]:
+            result = FileCleanupService.process()
+            self.stdout.write(f"{result['deleted']} borrados pendientes procesados, {result['failed']} fallidos")
+
+        result = FileCleanupService.sweep_orphans(batch_size=options["batch_size"] or None, dry_run=options["dry_run"])
+        verb = "encontrados" if options["dry_run"] else "eliminados"
+        self.stdout.write(self.style.SUCCESS(f"{result['scanned']} archivos revisados, {result['orphans']} huérfanos {verb}"))
@@ -0,0 +1,41 @@
+import time
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from .services.instrumentation import route_metrics
+
+
+class InstrumentationMiddleware:
+    """
+    Records per-route query count, database time, serializer time and total
+    latency of every request in apps.core.services.instrumentation.route_metrics.
+
+    Queries are counted with connection.execute_wrapper, so it works without
+    DEBUG and without keeping connection.queries. With
+    INSTRUMENTATION_SERVER_TIMING the figures of each request are also sent
+    in a Server-Timing header, visible in the browser devtools.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "INSTRUMENTATION_ENABLED", True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.server_timing = getattr(settings, "INSTRUMENTATION_SERVER_TIMING", False)
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        with route_metrics.track() as timings:
+            response = self.get_response(request)
+        latency = time.perf_counter() - started
+
+        # Agrupar por nombre de URL para no crear una serie por cada id
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match and match.view_name else "unmatched"
+        route_metrics.record(request.method, view, response.status_code, latency, timings)
+
+        if self.server_timing:
+            response["Server-Timing"] = ", ".join([
+                f'db;desc="{timings.queries} queries";dur={timings.db_time * 1000:.2f}',
+                f"serializer;dur={timings.serializer_time * 1000:.2f}",
+                f"total;dur={latency * 1000:.2f}",
+            ])
+        return response
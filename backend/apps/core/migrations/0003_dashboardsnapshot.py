@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_collectionversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_users', models.IntegerField(default=0)),
+                ('active_users', models.IntegerField(default=0)),
+                ('new_users_this_week', models.IntegerField(default=0)),
+                ('total_roles', models.IntegerField(default=0)),
+                ('total_projects', models.IntegerField(default=0)),
+                ('total_groups', models.IntegerField(default=0)),
+                ('total_mentors', models.IntegerField(default=0)),
+                ('activity_logs', models.JSONField(default=list)),
+                ('dirty', models.BooleanField(default=True)),
+                ('computed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
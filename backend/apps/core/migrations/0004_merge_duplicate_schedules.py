@@ -0,0 +1,51 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_schedules(apps, schema_editor):
+    """
+    Keeps the oldest Schedule of every (day, start_time, end_time) and
+    repoints the groups and mentor availabilities of its duplicates. A
+    mentor available on several copies of a slot keeps a single row.
+    """
+    Schedule = apps.get_model('core', 'Schedule')
+    Group = apps.get_model('projects', 'Group')
+    MentorAvailability = apps.get_model('mentors', 'MentorAvailability')
+
+    duplicated = (
+        Schedule.objects.values('day', 'start_time', 'end_time')
+        .annotate(keep_id=Min('id'), total=Count('id'))
+        .filter(total__gt=1)
+    )
+    for slot in duplicated:
+        duplicate_ids = list(
+            Schedule.objects.filter(
+                day=slot['day'], start_time=slot['start_time'], end_time=slot['end_time']
+            ).exclude(id=slot['keep_id']).values_list('id', flat=True)
+        )
+        Group.objects.filter(schedule_id__in=duplicate_ids).update(schedule_id=slot['keep_id'])
+        # Una disponibilidad por mentor en el horario que queda
+        slot_ids = [slot['keep_id'], *duplicate_ids]
+        first_ids = (
+            MentorAvailability.objects.filter(schedule_id__in=slot_ids)
+            .values('mentor_id').annotate(first_id=Min('id')).values_list('first_id', flat=True)
+        )
+        MentorAvailability.objects.filter(schedule_id__in=slot_ids).exclude(id__in=list(first_ids)).delete()
+        MentorAvailability.objects.filter(schedule_id__in=duplicate_ids).update(schedule_id=slot['keep_id'])
+        Schedule.objects.filter(id__in=duplicate_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    # La restricción única se agrega en la siguiente migración: en PostgreSQL
+    # no se puede alterar la tabla con eventos de FK diferidos pendientes
+
+    dependencies = [
+        ('core', '0003_dashboardsnapshot'),
+        ('mentors', '0005_mentorattendance_mentor_date_index'),
+        ('projects', '0005_event_attendance_generated'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_schedules, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_merge_duplicate_schedules'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='schedule',
+            options={'ordering': ['id']},
+        ),
+        migrations.AddConstraint(
+            model_name='schedule',
+            constraint=models.UniqueConstraint(fields=('day', 'start_time', 'end_time'), name='unique_schedule_slot'),
+        ),
+    ]
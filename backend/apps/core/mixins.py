@@ -0,0 +1,70 @@
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+from apps.core.services.media import MediaAccessService
+from apps.core.services.versions import VersionService
+
+
+class NotModified(APIException):
+    status_code = status.HTTP_304_NOT_MODIFIED
+
+
+class ConditionalGetMixin:
+    """
+    Answers GET list/retrieve requests with `304 Not Modified` when the
+    client's If-None-Match matches the current ETag.
+
+    The ETag is derived from the change counters of `etag_collections`, so
+    the check runs after authentication and permissions but before the main
+    query or serializer.
+    """
+    etag_collections = ()
+    etag_actions = ('list', 'retrieve')
+    # True if the response has media URLs signed for the requesting user
+    etag_vary_media = False
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        self.etag = None
+        if request.method not in ('GET', 'HEAD') or self.action not in self.etag_actions:
+            return
+
+        parts = [request.build_absolute_uri(), request.accepted_media_type]
+        if self.etag_vary_media:
+            parts.append(MediaAccessService.etag_part(request.user))
+        parts.extend(self.get_etag_parts())
+        self.etag = VersionService.etag(self.get_etag_collections(), *parts)
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            if '*' in etags or self.etag in etags or f'W/{self.etag}' in etags:
+                raise NotModified()
+
+    def get_etag_collections(self):
+        """
+        Collections the response depends on. Override when it varies per
+        request (e.g. with optional expansions).
+        """
+        return self.etag_collections
+
+    def get_etag_parts(self):
+        """
+        Extra values the response depends on besides the URL and the
+        collections (e.g. today's date for a default date range).
+        """
+        return []
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, 'etag', None)
+        if etag and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            response['ETag'] = etag
+            response['Cache-Control'] = 'private, no-cache'
+        return response
@@ -19,3 +19,72 @@ class Schedule(models.Model):
     day = models.IntegerField(choices=DAYS_OF_WEEK)
     start_time = models.TimeField()
     end_time = models.TimeField()
+
+    class Meta:
+        ordering = ["id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["day", "start_time", "end_time"],
+                name="unique_schedule_slot",
+            ),
+        ]
+
+
+class CollectionVersion(models.Model):
+    """
+    Change counter per API collection (events, groups, mentors...).
+    Bumped after every write so listings can answer conditional GETs
+    (If-None-Match) without running their main query.
+    """
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.BigIntegerField(default=0)
+
+
+class DashboardSnapshot(models.Model):
+    """
+    Precomputed admin dashboard statistics (single row, pk=1).
+    Signals keep the counters up to date and a Huey periodic task
+    recomputes everything when the row is dirty or too old.
+    """
+    total_users = models.IntegerField(default=0)
+    active_users = models.IntegerField(default=0)
+    new_users_this_week = models.IntegerField(default=0)
+    total_roles = models.IntegerField(default=0)
+    total_projects = models.IntegerField(default=0)
+    total_groups = models.IntegerField(default=0)
+    total_mentors = models.IntegerField(default=0)
+    activity_logs = models.JSONField(default=list)
+    dirty = models.BooleanField(default=True)
+    computed_at = models.DateTimeField(null=True, blank=True)
+
+
+class StoredFile(models.Model):
+    """
+    Reference count of a blob of ContentAddressedStorage. Every save of
+    the same content adds a reference to the same path; the file is
+    removed when the last reference is deleted.
+    """
+    path = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.BigIntegerField()
+    references = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.path} ({self.references})"
+
+
+class FileDeletion(models.Model):
+    """
+    Outbox of storage files to delete. Rows are written in the same
+    transaction that stops referencing the file, and a Huey task deletes
+    the files once it commits, so a rolled back request never loses a
+    file and no request waits on the storage.
+    """
+    path = models.CharField(max_length=255)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
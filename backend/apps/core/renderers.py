@@ -0,0 +1,18 @@
+import json
+from rest_framework.renderers import BaseRenderer
+
+
+class PrometheusRenderer(BaseRenderer):
+    """
+    Renders text already in the Prometheus exposition format. Selected with
+    ?format=prometheus or Accept: text/plain.
+    """
+    media_type = "text/plain"
+    format = "prometheus"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        # Respuestas de error (permisos, throttling) llegan como dict
+        return json.dumps(data).encode(self.charset)
@@ -1,11 +1,151 @@
-import secrets, random
+import os, re, secrets, unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+
+def _init_hasher_process():
+    import django
+    django.setup()
+
 
 class CredentialService:
 
+    # Lotes más pequeños se hashean en el proceso actual: arrancar el pool cuesta más
+    MIN_PARALLEL_PASSWORDS = 8
+
+    # Primer sufijo de un nombre que todavía no existe (ana.garcia100)
+    FIRST_SUFFIX = 100
+
     @staticmethod
     def generateUsername(first_name: str, last_name: str) -> str:
-        return f"{first_name.lower()}.{last_name.lower()}{random.randint(100,999)}"
+        return CredentialService.generateUsernames([(first_name, last_name)])[0]
+
+    @staticmethod
+    def usernameBase(first_name: str, last_name: str) -> str:
+        """
+        Returns "first.last" in lowercase ASCII without spaces or symbols,
+        valid for Django's username validator.
+        """
+        def clean(value):
+            value = unicodedata.normalize("NFKD", value or "").encode("ascii", "ignore").decode()
+            return re.sub(r"[^a-z0-9]", "", value.lower())
+
+        return ".".join(part for part in (clean(first_name), clean(last_name)) if part)[:140] or "usuario"
+
+    @staticmethod
+    def _lockUsernameBases(bases) -> None:
+        """
+        On PostgreSQL takes a transaction-level advisory lock per base, in a
+        fixed order, so concurrent allocations of the same base wait for
+        each other's commit instead of picking the same suffix.
+        """
+        from django.db import connection
+
+        if connection.vendor != "postgresql" or not connection.in_atomic_block:
+            return
+        with connection.cursor() as cursor:
+            for base in sorted(bases):
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [f"username:{base}"])
+
+    @staticmethod
+    def _lastSuffixes(bases, reserved=()) -> dict:
+        """
+        Returns {base: largest numeric suffix in use} with one query.
+        `reserved` usernames (about to be inserted) count as in use.
+
+        Each base is looked up as the range [base, next prefix) over the
+        unique index of auth_user.username; the regex only filters the rows
+        of that range down to "<base><digits>".
+        """
+        from django.contrib.auth.models import User
+        from django.db.models import Q
+
+        query = Q()
+        for base in bases:
+            upper = base[:-1] + chr(ord(base[-1]) + 1)
+            query |= Q(username__gte=base, username__lt=upper, username__regex=rf"^{re.escape(base)}[0-9]+$")
+
+        last = {}
+        for username in [*User.objects.filter(query).values_list("username", flat=True), *reserved]:
+            CredentialService._useSuffix(last, bases, username)
+        return last
+
+    @staticmethod
+    def _useSuffix(last, bases, username) -> None:
+        # "ana.gil1100" cuenta para "ana.gil" y para "ana.gil1": así ninguno reutiliza el otro
+        for base in bases:
+            if username.startswith(base) and username[len(base):].isdigit():
+                last[base] = max(last.get(base, 0), int(username[len(base):]))
+
+    @staticmethod
+    def generateUsernames(names, reserved=()) -> list:
+        """
+        Returns one username per (first_name, last_name) pair: the base
+        "first.last" followed by the next free numeric suffix, deterministic
+        and unique among the existing users, the `reserved` usernames and
+        within the batch.
+
+        Call it inside the transaction that inserts the users (see
+        allocateUsernames): on PostgreSQL the bases stay locked until it
+        commits.
+        """
+        bases = [CredentialService.usernameBase(first_name, last_name) for first_name, last_name in names]
+        if not bases:
+            return []
+        unique_bases = set(bases)
+        CredentialService._lockUsernameBases(unique_bases)
+        last = CredentialService._lastSuffixes(unique_bases, reserved)
+
+        usernames = []
+        for base in bases:
+            username = f"{base}{max(last.get(base, 0) + 1, CredentialService.FIRST_SUFFIX)}"
+            CredentialService._useSuffix(last, unique_bases, username)
+            usernames.append(username)
+        return usernames
+
+    @staticmethod
+    def allocateUsernames(names, insert, reserved=(), attempts: int = 3):
+        """
+        Generates the usernames of `names` and calls insert(usernames) in a
+        savepoint, returning its result.
+
+        If another process inserted one of those usernames first (possible
+        on backends without advisory locks) the unique constraint fails, the
+        savepoint is rolled back and the suffixes are allocated again.
+        """
+        from django.db import IntegrityError, transaction
+
+        for attempt in range(attempts):
+            try:
+                with transaction.atomic():
+                    return insert(CredentialService.generateUsernames(names, reserved))
+            except IntegrityError:
+                if attempt == attempts - 1:
+                    raise
 
     @staticmethod
     def generatePassword(length: int = 12) -> str:
-        return secrets.token_urlsafe(length)
\ No newline at end of file
+        return secrets.token_urlsafe(length)
+
+    @staticmethod
+    def hashPasswords(passwords, workers: int = None) -> list:
+        """
+        Returns the make_password hash of each password, in order.
+
+        Hashing with the default hasher is deliberately slow (PBKDF2), so
+        batches are spread over a pool of `workers` processes (default: one
+        per CPU). The processes are spawned, not forked, so they do not
+        inherit threads or database connections of the caller.
+        """
+        from django.contrib.auth.hashers import make_password
+
+        passwords = list(passwords)
+        workers = workers or os.cpu_count() or 1
+        workers = min(workers, len(passwords))
+        if workers <= 1 or len(passwords) < CredentialService.MIN_PARALLEL_PASSWORDS:
+            return [make_password(password) for password in passwords]
+
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=get_context("spawn"), initializer=_init_hasher_process
+        ) as executor:
+            return list(executor.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
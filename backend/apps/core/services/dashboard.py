@@ -0,0 +1,126 @@
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_ID = 1
+REVALIDATE_LOCK_KEY = "dashboard-snapshot-revalidating"
+
+
+class DashboardService:
+
+    @staticmethod
+    def compute() -> dict:
+        """
+        Computes every dashboard statistic, grouping the counts per table.
+        """
+        from apps.mentors.models import Mentor
+        from apps.projects.models import Project, Group
+        from apps.users.models import Profile
+
+        one_week_ago = timezone.now() - timedelta(days=7)
+        users = User.objects.aggregate(
+            total=Count("id"),
+            active=Count("id", filter=Q(is_active=True)),
+            new_this_week=Count("id", filter=Q(date_joined__gte=one_week_ago)),
+        )
+
+        recent_users = User.objects.order_by("-last_login")[:5]
+        activity_logs = [
+            {
+                "id": str(user.pk),
+                "user": user.get_full_name() or user.username,
+                "action": "Inicio de sesión",
+                "target": user.email,
+                "timestamp": user.last_login.isoformat() if user.last_login else None,
+            }
+            for user in recent_users
+        ]
+
+        return {
+            "total_users": users["total"],
+            "active_users": users["active"],
+            "new_users_this_week": users["new_this_week"],
+            "total_roles": Profile.objects.values("role").distinct().count(),
+            "total_projects": Project.objects.count(),
+            "total_groups": Group.objects.count(),
+            "total_mentors": Mentor.objects.count(),
+            "activity_logs": activity_logs,
+        }
+
+    @staticmethod
+    def refresh():
+        """
+        Recomputes the snapshot and stores it.
+        """
+        from apps.core.models import DashboardSnapshot
+
+        # Marcar como limpio antes de calcular: un cambio concurrente lo vuelve a ensuciar
+        DashboardSnapshot.objects.filter(pk=SNAPSHOT_ID).update(dirty=False)
+        values = {**DashboardService.compute(), "computed_at": timezone.now()}
+        snapshot, _ = DashboardSnapshot.objects.update_or_create(
+            pk=SNAPSHOT_ID,
+            defaults=values,
+            create_defaults={**values, "dirty": False},
+        )
+        cache.delete(REVALIDATE_LOCK_KEY)
+        return snapshot
+
+    @staticmethod
+    def is_stale(snapshot) -> bool:
+        max_age = timedelta(seconds=getattr(settings, "DASHBOARD_SNAPSHOT_MAX_AGE", 300))
+        return snapshot.dirty or snapshot.computed_at is None or timezone.now() - snapshot.computed_at > max_age
+
+    @staticmethod
+    def get_snapshot():
+        """
+        Returns the snapshot with a single primary-key read.
+
+        When it is stale and DASHBOARD_SNAPSHOT_STALE_WHILE_REVALIDATE is on,
+        the stale snapshot is served and a Huey task recomputes it in the
+        background; otherwise it is recomputed before answering.
+        """
+        from apps.core.models import DashboardSnapshot
+
+        snapshot = DashboardSnapshot.objects.filter(pk=SNAPSHOT_ID).first()
+        if snapshot is None:
+            return DashboardService.refresh()
+
+        if not DashboardService.is_stale(snapshot):
+            return snapshot
+
+        if not getattr(settings, "DASHBOARD_SNAPSHOT_STALE_WHILE_REVALIDATE", True):
+            return DashboardService.refresh()
+
+        # Encolar una sola revalidación a la vez
+        if cache.add(REVALIDATE_LOCK_KEY, True, 60):
+            try:
+                from apps.core.events.periodic import revalidate_dashboard_snapshot
+
+                revalidate_dashboard_snapshot()
+            except Exception as e:
+                cache.delete(REVALIDATE_LOCK_KEY)
+                logger.warning(f"Could not enqueue dashboard snapshot refresh: {e}")
+        return snapshot
+
+    @staticmethod
+    def apply_delta(**deltas) -> None:
+        """
+        Adjusts the snapshot counters in place (e.g. total_users=1).
+        """
+        from apps.core.models import DashboardSnapshot
+
+        DashboardSnapshot.objects.filter(pk=SNAPSHOT_ID).update(
+            **{field: F(field) + delta for field, delta in deltas.items()}
+        )
+
+    @staticmethod
+    def mark_dirty() -> None:
+        from apps.core.models import DashboardSnapshot
+
+        DashboardSnapshot.objects.filter(pk=SNAPSHOT_ID, dirty=False).update(dirty=True)
@@ -0,0 +1,180 @@
+import logging
+import os
+import time
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+
+class FileCleanupService:
+    """
+    Deferred deletion of media files.
+
+    Code that stops referencing a file calls schedule(): the path is added
+    to the FileDeletion outbox in the current transaction and, after it
+    commits, a Huey task deletes it through the storage (which only
+    unlinks content-addressed blobs without references left). A rollback
+    drops the outbox rows with everything else.
+
+    sweep_orphans() is the safety net for files nothing references, e.g.
+    left by a crash between writing a file and committing its row.
+    """
+
+    @staticmethod
+    def schedule(*names) -> None:
+        """
+        Deletes the files `names` once the current transaction commits.
+        Empty names are ignored.
+        """
+        from apps.core.models import FileDeletion
+
+        names = [str(name) for name in names if name]
+        if not names:
+            return
+        FileDeletion.objects.bulk_create([FileDeletion(path=name) for name in names])
+        transaction.on_commit(FileCleanupService.enqueue)
+
+    @staticmethod
+    def enqueue() -> None:
+        try:
+            from apps.core.events.periodic import process_file_deletions
+
+            process_file_deletions()
+        except Exception as e:
+            # Sin cola: borrar en esta petición para no acumular pendientes
+            logger.warning(f"Could not enqueue file deletions, deleting inline: {e}")
+            FileCleanupService.process()
+
+    @staticmethod
+    def process(batch_size: int = None) -> dict:
+        """
+        Deletes the pending files of the outbox, one transaction per file so
+        the storage reference and the outbox row go away together. Failures
+        stay in the outbox with their error for the next run.
+        """
+        from apps.core.models import FileDeletion
+
+        batch_size = batch_size or getattr(settings, "FILE_CLEANUP_BATCH_SIZE", 500)
+        max_attempts = getattr(settings, "FILE_CLEANUP_MAX_ATTEMPTS", 5)
+        deleted = failed = 0
+        pending = list(
+            FileDeletion.objects.filter(attempts__lt=max_attempts).values_list("pk", flat=True)[:batch_size]
+        )
+        for pk in pending:
+            try:
+                with transaction.atomic():
+                    # Otro worker pudo tomar la misma fila
+                    row = FileDeletion.objects.select_for_update(skip_locked=True).filter(pk=pk).first()
+                    if row is None:
+                        continue
+                    default_storage.delete(row.path)
+                    row.delete()
+                deleted += 1
+            except Exception as e:
+                FileDeletion.objects.filter(pk=pk).update(attempts=F("attempts") + 1, last_error=str(e))
+                logger.warning(f"Could not delete file of outbox row {pk}: {e}")
+                failed += 1
+        return {"deleted": deleted, "failed": failed}
+
+    @staticmethod
+    def _media_files(root, grace_seconds, now):
+        """
+        Yields the paths (relative to MEDIA_ROOT) of the files under `root`
+        older than the grace period, removing empty directories on the way.
+        """
+        try:
+            entries = list(os.scandir(root))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from FileCleanupService._media_files(entry.path, grace_seconds, now)
+                try:
+                    if now - entry.stat().st_mtime > grace_seconds:
+                        os.rmdir(entry.path)  # solo si quedó vacío
+                except OSError:
+                    pass
+            elif entry.is_file(follow_symlinks=False) and now - entry.stat().st_mtime > grace_seconds:
+                yield os.path.relpath(entry.path, settings.MEDIA_ROOT)
+
+    @staticmethod
+    def _referenced(paths) -> set:
+        """
+        The subset of `paths` that some row still uses.
+        """
+        from apps.core.models import FileDeletion, StoredFile
+        from apps.mentors.models import CertificateUpload, Mentor
+        from apps.users.models import Profile
+
+        referenced = set(
+            StoredFile.objects.filter(path__in=paths, references__gt=0).values_list("path", flat=True)
+        )
+        referenced |= set(Profile.objects.filter(photo__in=paths).values_list("photo", flat=True))
+        referenced |= set(Mentor.objects.filter(certificate__in=paths).values_list("certificate", flat=True))
+        # Ya en la cola de borrado: que los procese el outbox
+        referenced |= set(FileDeletion.objects.filter(path__in=paths).values_list("path", flat=True))
+        temp_paths = [os.path.join(settings.MEDIA_ROOT, path) for path in paths]
+        referenced |= {
+            os.path.relpath(path, settings.MEDIA_ROOT)
+            for path in CertificateUpload.objects.filter(temp_path__in=temp_paths).values_list("temp_path", flat=True)
+        }
+        return referenced
+
+    @staticmethod
+    def _variant_paths() -> set:
+        # Las variantes sin fila en StoredFile (FileSystemStorage) solo están en el JSON
+        from apps.users.models import Profile
+
+        return {
+            path
+            for variants in Profile.objects.exclude(photo_variants={}).values_list("photo_variants", flat=True).iterator()
+            for formats in variants.values()
+            for path in formats.values()
+        }
+
+    @staticmethod
+    def sweep_orphans(batch_size: int = None, dry_run: bool = False) -> dict:
+        """
+        Walks the media folders and deletes the files no row references,
+        checking them against the database `batch_size` paths at a time.
+        Files younger than FILE_SWEEP_GRACE_HOURS are skipped: their row
+        may not be committed yet.
+        """
+        batch_size = batch_size or getattr(settings, "FILE_SWEEP_BATCH_SIZE", 1000)
+        grace_seconds = getattr(settings, "FILE_SWEEP_GRACE_HOURS", 6) * 3600
+        now = time.time()
+        variants = FileCleanupService._variant_paths()
+        folders = [settings.PROFILE_PHOTOS_DIR, settings.MENTORS_CERTIFICATES_DIR, ".incoming"]
+
+        scanned = orphans = 0
+        batch = []
+
+        def flush():
+            nonlocal orphans
+            referenced = FileCleanupService._referenced(batch) | variants
+            for path in batch:
+                if path in referenced:
+                    continue
+                orphans += 1
+                if dry_run:
+                    logger.info(f"Orphan file {path}")
+                    continue
+                try:
+                    # Sin fila en StoredFile (o con 0 referencias): el storage lo borra
+                    default_storage.delete(path)
+                except OSError as e:
+                    logger.warning(f"Could not delete orphan file {path}: {e}")
+            batch.clear()
+
+        for folder in folders:
+            for path in FileCleanupService._media_files(os.path.join(settings.MEDIA_ROOT, folder), grace_seconds, now):
+                scanned += 1
+                batch.append(path)
+                if len(batch) >= batch_size:
+                    flush()
+        if batch:
+            flush()
+        return {"scanned": scanned, "orphans": orphans}
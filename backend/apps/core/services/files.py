@@ -1,4 +1,4 @@
-import os, uuid
+import os, re, uuid
 
 class FileService:
 
@@ -6,4 +6,29 @@ class FileService:
     def random_filename(filename: str, folder: str) -> str:
         ext = filename.split('.')[-1]
         random_name = f"{uuid.uuid4()}.{ext}"
-        return os.path.join(folder, random_name)
\ No newline at end of file
+        return os.path.join(folder, random_name)
+
+    @staticmethod
+    def content_filename(digest: str, filename: str) -> str:
+        """
+        Path of a blob by its SHA-256, sharded in two levels so no directory
+        grows too large: <folder of filename>/ab/cd/abcd...<ext>.
+        """
+        folder = os.path.dirname(filename)
+        # Un nombre derivado de otro blob (variantes de una foto) ya trae el shard
+        if FileService.is_content_filename(filename):
+            folder = os.path.dirname(os.path.dirname(folder))
+        ext = os.path.splitext(filename)[1].lower()
+        return os.path.join(folder, digest[:2], digest[2:4], f"{digest}{ext}")
+
+    @staticmethod
+    def is_content_filename(filename: str) -> bool:
+        """
+        True if filename has the shape of content_filename (ab/cd/abcd....ext),
+        ignoring suffixes after the digest (abcd..._64.webp).
+        """
+        parts = filename.replace(os.sep, "/").split("/")
+        if len(parts) < 3:
+            return False
+        digest = re.match(r"[0-9a-f]{64}", parts[-1])
+        return bool(digest) and parts[-3] == digest.group()[:2] and parts[-2] == digest.group()[2:4]
@@ -0,0 +1,303 @@
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from django.db import connections
+
+# Resolución del histograma: 2**SUB_BUCKET_BITS valores exactos y después
+# 2**(SUB_BUCKET_BITS - 1) buckets por potencia de dos (error relativo < 1.6%)
+SUB_BUCKET_BITS = 7
+
+# Límites exportados como buckets de Prometheus
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # segundos
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500)  # consultas
+
+# Histogramas por ruta: (nombre, unidad, buckets de Prometheus)
+SERIES = (
+    ("latency", "us", LATENCY_BUCKETS),
+    ("db_time", "us", LATENCY_BUCKETS),
+    ("serializer_time", "us", LATENCY_BUCKETS),
+    ("queries", "count", QUERY_BUCKETS),
+    ("serializer_queries", "count", QUERY_BUCKETS),
+)
+
+
+class Histogram:
+    """
+    HDR-style log-linear histogram of non-negative integers.
+
+    Values below 2**SUB_BUCKET_BITS are counted exactly; larger values fall
+    in buckets whose width doubles every power of two, so percentiles keep
+    the same relative precision from microseconds to minutes. Buckets are
+    stored sparsely, so an idle route costs a few dict entries.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    @staticmethod
+    def _index(value):
+        exponent = value.bit_length() - SUB_BUCKET_BITS
+        if exponent <= 0:
+            return value
+        return (exponent << (SUB_BUCKET_BITS - 1)) + (value >> exponent)
+
+    @staticmethod
+    def _upper_bound(index):
+        # Mayor valor que cae en el bucket `index`
+        if index < 1 << SUB_BUCKET_BITS:
+            return index
+        half = 1 << (SUB_BUCKET_BITS - 1)
+        exponent = index // half - 1
+        mantissa = index - exponent * half
+        return ((mantissa + 1) << exponent) - 1
+
+    def record(self, value):
+        value = max(int(value), 0)
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, percent):
+        """
+        Returns the upper bound of the bucket holding the given percentile,
+        capped at the largest recorded value.
+        """
+        if not self.count:
+            return 0
+        rank = max(1, round(self.count * percent / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._upper_bound(index), self.max)
+        return self.max
+
+    def cumulative(self, bounds):
+        """
+        Returns the number of values <= each bound, for Prometheus buckets.
+        """
+        indexes = sorted(self.counts)
+        result = []
+        for bound in bounds:
+            result.append(sum(self.counts[index] for index in indexes if self._upper_bound(index) <= bound))
+        return result
+
+    def summary(self, scale=1):
+        """
+        Returns count, mean, min, max and p50/p90/p99, dividing values by `scale`.
+        """
+        def scaled(value):
+            return round(value / scale, 3) if value is not None else None
+
+        return {
+            "count": self.count,
+            "mean": scaled(self.total / self.count) if self.count else None,
+            "min": scaled(self.min),
+            "max": scaled(self.max),
+            "p50": scaled(self.percentile(50)),
+            "p90": scaled(self.percentile(90)),
+            "p99": scaled(self.percentile(99)),
+        }
+
+
+class RequestTimings:
+    """
+    Query and serializer counters of the request being processed.
+    """
+
+    __slots__ = ("queries", "db_time", "serializer_time", "serializer_queries", "serializer_depth")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_queries = 0
+        self.serializer_depth = 0
+
+
+_current = ContextVar("request_timings", default=None)
+
+
+def _count_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db_time += time.perf_counter() - started
+        timings.queries += 1
+        if timings.serializer_depth:
+            timings.serializer_queries += 1
+
+
+class RouteMetrics:
+    """
+    Per-route request instrumentation of this process.
+
+    Requests are grouped by HTTP method and URL name, so every id of
+    /api/mentors/{id}/ falls in the same series. Each route keeps request
+    counts per status class and one Histogram per entry of SERIES. Every
+    worker process keeps its own registry.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+        self._started_at = time.time()
+
+    def track(self):
+        """
+        Context manager that counts the queries of every database connection
+        while the request runs. Yields the RequestTimings of the request.
+        """
+        return _Tracker()
+
+    def record(self, method, view, status_code, latency, timings):
+        with self._lock:
+            route = self._routes.get((method, view))
+            if route is None:
+                route = self._routes[(method, view)] = {
+                    "statuses": {},
+                    **{name: Histogram() for name, _, _ in SERIES},
+                }
+            status_class = f"{status_code // 100}xx"
+            route["statuses"][status_class] = route["statuses"].get(status_class, 0) + 1
+            route["latency"].record(latency * 1_000_000)
+            route["db_time"].record(timings.db_time * 1_000_000)
+            route["serializer_time"].record(timings.serializer_time * 1_000_000)
+            route["queries"].record(timings.queries)
+            route["serializer_queries"].record(timings.serializer_queries)
+
+    def reset(self):
+        with self._lock:
+            self._routes = {}
+            self._started_at = time.time()
+
+    def snapshot(self) -> dict:
+        """
+        Returns the summary of every route, times in milliseconds.
+        """
+        with self._lock:
+            routes = []
+            for (method, view), route in sorted(self._routes.items()):
+                routes.append({
+                    "method": method,
+                    "view": view,
+                    "requests": route["latency"].count,
+                    "statuses": dict(route["statuses"]),
+                    **{
+                        f"{name}_ms" if unit == "us" else name: route[name].summary(1000 if unit == "us" else 1)
+                        for name, unit, _ in SERIES
+                    },
+                })
+            return {"since": self._started_at, "routes": routes}
+
+    def prometheus(self) -> str:
+        """
+        Returns the registry in the Prometheus text exposition format, times
+        in seconds. Histograms (not summaries) so they can be added up across
+        workers.
+        """
+        names = {
+            "latency": ("nodux_http_request_duration_seconds", "Total request latency"),
+            "db_time": ("nodux_http_request_db_seconds", "Database time per request"),
+            "serializer_time": ("nodux_http_request_serializer_seconds", "Serializer time per request"),
+            "queries": ("nodux_http_request_queries", "Database queries per request"),
+            "serializer_queries": (
+                "nodux_http_request_serializer_queries", "Database queries issued while serializing",
+            ),
+        }
+        lines = [
+            "# HELP nodux_http_requests_total Requests by route and status class",
+            "# TYPE nodux_http_requests_total counter",
+        ]
+        with self._lock:
+            routes = sorted(self._routes.items())
+            for (method, view), route in routes:
+                for status_class, count in sorted(route["statuses"].items()):
+                    lines.append(
+                        f'nodux_http_requests_total{{method="{method}",view="{_escape(view)}",'
+                        f'status="{status_class}"}} {count}'
+                    )
+            for name, unit, bounds in SERIES:
+                metric, description = names[name]
+                scale = 1_000_000 if unit == "us" else 1
+                lines.append(f"# HELP {metric} {description}")
+                lines.append(f"# TYPE {metric} histogram")
+                for (method, view), route in routes:
+                    histogram = route[name]
+                    labels = f'method="{method}",view="{_escape(view)}"'
+                    cumulative = histogram.cumulative([bound * scale for bound in bounds])
+                    for bound, count in zip(bounds, cumulative):
+                        lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {count}')
+                    lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                    lines.append(f"{metric}_sum{{{labels}}} {histogram.total / scale}")
+                    lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+class _Tracker:
+
+    def __enter__(self):
+        self._timings = RequestTimings()
+        self._token = _current.set(self._timings)
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(_count_query))
+        return self._timings
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+        _current.reset(self._token)
+        return False
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _timed_data(fget):
+    """
+    Wraps Serializer.data to add its time, and the queries it triggers
+    (lazy relations walked per row), to the current request.
+    """
+    def data(serializer):
+        timings = _current.get()
+        if timings is None or timings.serializer_depth:
+            # Sin request instrumentada, o .data anidado ya contado por el externo
+            return fget(serializer)
+        timings.serializer_depth += 1
+        started = time.perf_counter()
+        try:
+            return fget(serializer)
+        finally:
+            timings.serializer_time += time.perf_counter() - started
+            timings.serializer_depth -= 1
+
+    data._instrumented = True
+    return data
+
+
+def instrument_serializers():
+    """
+    Times BaseSerializer.data, the single entry point through which
+    serializers and list serializers build their representation.
+    """
+    from rest_framework.serializers import BaseSerializer
+
+    fget = BaseSerializer.data.fget
+    if not getattr(fget, "_instrumented", False):
+        BaseSerializer.data = property(_timed_data(fget))
+
+
+route_metrics = RouteMetrics()
@@ -0,0 +1,224 @@
+import mimetypes
+import os
+import re
+import time
+from urllib.parse import quote
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from apps.core.services.files import FileService
+
+
+class MediaAccessService:
+    """
+    Access control and delivery of MEDIA_ROOT files (profile photos and
+    mentor certificates) through the protected media view.
+
+    Browsers load <img> and PDF links without the Authorization header, so
+    the serializers sign each media URL for the requesting user
+    (?token=<user>.<window>.<hmac of user, window and path>). A token is
+    the same during MEDIA_URL_TOKEN_WINDOW seconds, so repeated listings
+    return the same URLs, and it is accepted for one extra window.
+
+    The bytes are handed to the front proxy when MEDIA_SENDFILE_BACKEND is
+    set (X-Accel-Redirect for nginx, X-Sendfile for Apache/lighttpd);
+    otherwise Django streams them honoring Range and conditional headers.
+    """
+
+    TOKEN_SALT = "apps.core.media-access"
+    READ_BLOCK = 64 * 1024
+    # Rutas por contenido: el archivo de una URL nunca cambia
+    IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+    @staticmethod
+    def _window(now=None) -> int:
+        return int((now or time.time()) // getattr(settings, "MEDIA_URL_TOKEN_WINDOW", 6 * 3600))
+
+    @staticmethod
+    def _signature(user_id, window, name) -> str:
+        return salted_hmac(MediaAccessService.TOKEN_SALT, f"{user_id}:{window}:{name}").hexdigest()[:32]
+
+    @staticmethod
+    def token(name, user_id) -> str:
+        window = MediaAccessService._window()
+        return f"{user_id}.{window}.{MediaAccessService._signature(user_id, window, name)}"
+
+    @staticmethod
+    def user_id_from_token(token, name):
+        """
+        Returns the user id of a valid token for `name`, or None.
+        """
+        try:
+            user_id, window, signature = token.split(".")
+            user_id, window = int(user_id), int(window)
+        except (AttributeError, ValueError):
+            return None
+        if MediaAccessService._window() - window not in (0, 1):
+            return None
+        if not constant_time_compare(signature, MediaAccessService._signature(user_id, window, name)):
+            return None
+        return user_id
+
+    @staticmethod
+    def protected() -> bool:
+        return getattr(settings, "MEDIA_PROTECTED", True)
+
+    @staticmethod
+    def url(name, request=None) -> str:
+        """
+        URL of a stored file for the user of `request`: absolute when there
+        is a request, and signed for that user when media is protected.
+        """
+        url = default_storage.url(name)
+        user = getattr(request, "user", None)
+        if MediaAccessService.protected() and user is not None and user.is_authenticated:
+            url = f"{url}?token={MediaAccessService.token(name, user.pk)}"
+        return request.build_absolute_uri(url) if request else url
+
+    @staticmethod
+    def etag_part(user) -> str:
+        """
+        Part of the ETag of responses with signed media URLs: they change
+        with the user and the token window.
+        """
+        if not MediaAccessService.protected():
+            return ""
+        return f"media:{getattr(user, 'pk', None)}:{MediaAccessService._window()}"
+
+    @staticmethod
+    def can_access(user, role, name) -> bool:
+        """
+        Photos: their owner and roles that can read users or mentors.
+        Certificates: their mentor and roles with mentors.write.
+        """
+        from apps.mentors.models import Mentor
+        from apps.users.models import Profile
+        from apps.users.permissions import has_perm
+        from apps.users.services.photos import ProfilePhotoService
+
+        if role is None:
+            return False
+        folder = name.split("/", 1)[0]
+        if folder == settings.PROFILE_PHOTOS_DIR:
+            if has_perm(role, "users.read") or has_perm(role, "mentors.read"):
+                return True
+            own = Profile.objects.filter(user_id=user.pk).values("photo", "photo_variants").first()
+            return bool(own) and (name == own["photo"] or name in ProfilePhotoService.variant_files(own["photo_variants"]))
+        if folder == settings.MENTORS_CERTIFICATES_DIR:
+            if has_perm(role, "mentors.write"):
+                return True
+            return Mentor.objects.filter(certificate=name, profile__user_id=user.pk).exists()
+        return False
+
+    @staticmethod
+    def _etag(name, stat):
+        # El nombre de un blob ya es el hash de su contenido
+        if FileService.is_content_filename(name):
+            return quote_etag(os.path.basename(name).split(".")[0])
+        return quote_etag(f"{stat.st_size:x}-{int(stat.st_mtime):x}")
+
+    @staticmethod
+    def _not_modified(request, etag, last_modified) -> bool:
+        if_none_match = request.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+        since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+        return since is not None and int(last_modified) <= since
+
+    @staticmethod
+    def _range(request, etag, last_modified, size):
+        """
+        Returns (start, end) of a single satisfiable `Range: bytes=` header,
+        None to send the whole file, or False if it is not satisfiable.
+        """
+        header = request.headers.get("Range", "")
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", header.strip())
+        if not match or match.groups() == ("", ""):
+            return None  # sin Range, varios rangos o inválido: archivo completo
+        if_range = request.headers.get("If-Range")
+        if if_range and if_range != etag and parse_http_date_safe(if_range) != int(last_modified):
+            return None
+        first, last = match.groups()
+        if first == "":
+            start, end = max(size - int(last), 0), size - 1
+        else:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+        if start >= size or start > end:
+            return False
+        return start, end
+
+    @staticmethod
+    def _stream(path, start, length):
+        with open(path, "rb") as source:
+            source.seek(start)
+            while length > 0:
+                block = source.read(min(MediaAccessService.READ_BLOCK, length))
+                if not block:
+                    break
+                length -= len(block)
+                yield block
+
+    @staticmethod
+    def serve(request, name):
+        """
+        Response with the file `name` (already authorized). Raises
+        FileNotFoundError if it does not exist.
+        """
+        path = default_storage.path(name)
+        stat = os.stat(path)
+        etag = MediaAccessService._etag(name, stat)
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        max_age = (
+            MediaAccessService.IMMUTABLE_MAX_AGE if FileService.is_content_filename(name)
+            else getattr(settings, "MEDIA_CACHE_MAX_AGE", 24 * 3600)
+        )
+        headers = {
+            "ETag": etag,
+            "Last-Modified": http_date(stat.st_mtime),
+            # Detrás de autenticación: solo la caché del navegador
+            "Cache-Control": f"private, max-age={max_age}" + (", immutable" if max_age == MediaAccessService.IMMUTABLE_MAX_AGE else ""),
+            "Accept-Ranges": "bytes",
+            "X-Content-Type-Options": "nosniff",
+        }
+
+        if MediaAccessService._not_modified(request, etag, stat.st_mtime):
+            response = HttpResponseNotModified()
+            for header in ("ETag", "Last-Modified", "Cache-Control"):
+                response[header] = headers[header]
+            return response
+
+        backend = getattr(settings, "MEDIA_SENDFILE_BACKEND", "")
+        if backend:
+            # El proxy envía los bytes (y resuelve Range); Django solo autoriza
+            response = HttpResponse(content_type=content_type)
+            if backend == "nginx":
+                prefix = getattr(settings, "MEDIA_ACCEL_REDIRECT_PREFIX", "/protected-media/")
+                response["X-Accel-Redirect"] = quote(prefix.rstrip("/") + "/" + name)
+            else:
+                response["X-Sendfile"] = path
+        else:
+            byte_range = MediaAccessService._range(request, etag, stat.st_mtime, stat.st_size)
+            if byte_range is False:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{stat.st_size}"
+                return response
+            if request.method == "HEAD":
+                response = HttpResponse(content_type=content_type)
+                response["Content-Length"] = stat.st_size
+            elif byte_range is None:
+                response = FileResponse(open(path, "rb"), content_type=content_type)
+            else:
+                start, end = byte_range
+                response = StreamingHttpResponse(
+                    MediaAccessService._stream(path, start, end - start + 1), status=206, content_type=content_type,
+                )
+                response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+                response["Content-Length"] = end - start + 1
+
+        for header, value in headers.items():
+            response[header] = value
+        if content_type == "application/pdf":
+            response["Content-Disposition"] = f'inline; filename="{os.path.basename(name)}"'
+        return response
@@ -0,0 +1,221 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _read_host_cpu_times():
+    """
+    Returns (busy, total) jiffies of the host from /proc/stat, or None.
+    """
+    try:
+        with open("/proc/stat") as stat:
+            fields = [int(value) for value in stat.readline().split()[1:]]
+    except (OSError, ValueError):
+        return None
+    # idle + iowait no cuentan como tiempo ocupado
+    idle = fields[3] + (fields[4] if len(fields) > 4 else 0)
+    total = sum(fields)
+    return total - idle, total
+
+
+def _read_process_cpu_seconds():
+    """
+    Returns user + system CPU seconds of this process from /proc/self/stat.
+    """
+    try:
+        with open("/proc/self/stat") as stat:
+            # El nombre del proceso puede contener espacios: cortar después del ')'
+            fields = stat.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    except (OSError, ValueError, IndexError):
+        times = os.times()
+        return times.user + times.system
+
+
+def _read_process_rss():
+    """
+    Returns the resident set size of this process in bytes, or None.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _read_host_memory():
+    """
+    Returns (used, total) host memory in bytes from /proc/meminfo, or None.
+    """
+    values = {}
+    try:
+        with open("/proc/meminfo") as meminfo:
+            for line in meminfo:
+                key, _, rest = line.partition(":")
+                values[key] = int(rest.split()[0]) * 1024
+    except (OSError, ValueError, IndexError):
+        return None
+    total = values.get("MemTotal")
+    available = values.get("MemAvailable", values.get("MemFree"))
+    if not total or available is None:
+        return None
+    return total - available, total
+
+
+def _read_disk_usage(path):
+    """
+    Returns (used, total) bytes of the filesystem holding `path`, or None.
+    """
+    path = os.path.abspath(path)
+    # MEDIA_ROOT puede no existir todavía: usar el primer padre existente
+    while not os.path.exists(path) and os.path.dirname(path) != path:
+        path = os.path.dirname(path)
+    try:
+        stats = os.statvfs(path)
+    except (OSError, AttributeError):
+        return None
+    total = stats.f_blocks * stats.f_frsize
+    used = (stats.f_blocks - stats.f_bfree) * stats.f_frsize
+    return used, total
+
+
+def _percent(part, whole):
+    return round(part * 100 / whole, 1) if whole else 0.0
+
+
+def _read_login_attempts(window_hours):
+    """
+    Counts successful and failed logins of the last `window_hours` from
+    django-axes: AccessLog stores one row per successful login and
+    AccessAttempt accumulates failures per username/IP/user agent (rows are
+    removed on a successful login because of AXES_RESET_ON_SUCCESS).
+    """
+    from axes.models import AccessAttempt, AccessLog
+
+    since = timezone.now() - timedelta(hours=window_hours)
+    failed = AccessAttempt.objects.filter(attempt_time__gte=since).aggregate(
+        total=Sum("failures_since_start")
+    )["total"]
+    return {
+        "successful": AccessLog.objects.filter(attempt_time__gte=since).count(),
+        "failed": failed or 0,
+    }
+
+
+class MetricsCollector:
+    """
+    In-process sampler of host and process resource usage.
+
+    A daemon thread takes one sample every METRICS_SAMPLE_INTERVAL seconds and
+    keeps the last METRICS_HISTORY_SIZE samples in a ring buffer. CPU usage is
+    computed from the difference between two consecutive samples, so the
+    first sample reports 0. Each worker process has its own collector.
+    """
+
+    def __init__(self, interval=None, history_size=None):
+        self.interval = interval or getattr(settings, "METRICS_SAMPLE_INTERVAL", 10)
+        self.history = deque(maxlen=history_size or getattr(settings, "METRICS_HISTORY_SIZE", 360))
+        self._lock = threading.RLock()
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._previous = None
+
+    def ensure_started(self):
+        """
+        Starts the sampler thread once per process (also after a fork).
+        """
+        if not getattr(settings, "METRICS_ENABLED", True):
+            return
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._previous = None
+            self.history.clear()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="metrics-collector", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                logger.warning(f"Metrics sample failed: {e}")
+            finally:
+                close_old_connections()
+            self._stop.wait(self.interval)
+
+    def sample(self) -> dict:
+        """
+        Takes one sample and appends it to the history.
+        """
+        with self._lock:
+            return self._sample()
+
+    def _sample(self) -> dict:
+        now = time.monotonic()
+        host_cpu = _read_host_cpu_times()
+        process_cpu = _read_process_cpu_seconds()
+
+        host_cpu_percent = process_cpu_percent = 0.0
+        if self._previous is not None:
+            previous_now, previous_host, previous_process = self._previous
+            if host_cpu and previous_host:
+                host_cpu_percent = _percent(host_cpu[0] - previous_host[0], host_cpu[1] - previous_host[1])
+            process_cpu_percent = _percent(process_cpu - previous_process, now - previous_now)
+        self._previous = (now, host_cpu, process_cpu)
+
+        memory = _read_host_memory()
+        disk = _read_disk_usage(settings.MEDIA_ROOT)
+        rss = _read_process_rss()
+
+        try:
+            login_attempts = _read_login_attempts(getattr(settings, "METRICS_LOGIN_WINDOW_HOURS", 24))
+        except Exception as e:
+            logger.warning(f"Could not read login attempts: {e}")
+            login_attempts = self.latest().get("loginAttempts", {"successful": 0, "failed": 0})
+
+        sample = {
+            "timestamp": timezone.now().isoformat(),
+            "cpu": host_cpu_percent,
+            "memory": _percent(*memory) if memory else None,
+            "storage": _percent(*disk) if disk else None,
+            "process": {
+                "pid": os.getpid(),
+                "cpu": process_cpu_percent,
+                "rssBytes": rss,
+            },
+            "loginAttempts": login_attempts,
+        }
+        self.history.append(sample)
+        return sample
+
+    def latest(self) -> dict:
+        with self._lock:
+            return self.history[-1] if self.history else {}
+
+    def snapshot(self) -> list:
+        with self._lock:
+            return list(self.history)
+
+
+collector = MetricsCollector()
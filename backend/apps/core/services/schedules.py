@@ -0,0 +1,133 @@
+import threading
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.dateparse import parse_time
+from apps.core.services.versions import VersionService
+
+
+class ScheduleService:
+    """
+    Interns Schedule rows by (day, start_time, end_time).
+
+    Resolved ids are kept in a process-local dict, so repeated group writes
+    with the same slot do not scan the table. Entries are only stored after
+    the transaction that read or created them commits, tagged with the
+    `schedules` CollectionVersion read before the lookup. An entry is only
+    used while that version is current, so an edit or delete committed by
+    any process invalidates it (one primary-key query per lookup); this
+    process also drops them on every Schedule update/delete (see
+    apps.core.signals).
+    """
+
+    _cache = {}  # key -> (pk, versión de schedules al leerlo)
+    _lock = threading.Lock()
+
+    @staticmethod
+    def key(day, start_time, end_time) -> tuple:
+        if isinstance(start_time, str):
+            start_time = parse_time(start_time)
+        if isinstance(end_time, str):
+            end_time = parse_time(end_time)
+        return int(day), start_time, end_time
+
+    @staticmethod
+    def _version() -> int:
+        return VersionService.get("schedules")["schedules"]
+
+    @staticmethod
+    def _cached(key, version):
+        with ScheduleService._lock:
+            entry = ScheduleService._cache.get(key)
+            if entry is None:
+                return None
+            pk, entry_version = entry
+            if entry_version != version:
+                # Algún proceso editó o eliminó horarios desde que se leyó
+                del ScheduleService._cache[key]
+                return None
+            return pk
+
+    @staticmethod
+    def _remember(key, pk, version) -> None:
+        def store():
+            with ScheduleService._lock:
+                ScheduleService._cache[key] = (pk, version)
+
+        transaction.on_commit(store)
+
+    @staticmethod
+    def _instance(pk, key):
+        from apps.core.models import Schedule
+
+        return Schedule.from_db("default", ["id", "day", "start_time", "end_time"], [pk, *key])
+
+    @staticmethod
+    def invalidate() -> None:
+        with ScheduleService._lock:
+            ScheduleService._cache.clear()
+
+    @staticmethod
+    def get_or_create(day, start_time, end_time):
+        """
+        Returns (schedule, created) for the slot, like get_or_create, but
+        with only the version check on a cache hit. Concurrent creates of
+        the same slot are resolved by the unique constraint.
+        """
+        from apps.core.models import Schedule
+
+        key = ScheduleService.key(day, start_time, end_time)
+        version = ScheduleService._version()
+        pk = ScheduleService._cached(key, version)
+        if pk is not None:
+            return ScheduleService._instance(pk, key), False
+
+        fields = dict(zip(("day", "start_time", "end_time"), key))
+        try:
+            with transaction.atomic():
+                schedule, created = Schedule.objects.get_or_create(**fields)
+        except IntegrityError:
+            # Otro proceso lo creó entre el SELECT y el INSERT
+            schedule, created = Schedule.objects.get(**fields), False
+
+        ScheduleService._remember(key, schedule.pk, version)
+        return schedule, created
+
+    @staticmethod
+    def resolve_many(keys) -> dict:
+        """
+        Returns {(day, start_time, end_time): Schedule} for every key, with
+        one version check, one SELECT for the keys not cached and one INSERT
+        for the missing ones.
+        """
+        from apps.core.models import Schedule
+
+        keys = {ScheduleService.key(*key) for key in keys}
+        version = ScheduleService._version()
+        schedules = {}
+        for key in keys:
+            pk = ScheduleService._cached(key, version)
+            if pk is not None:
+                schedules[key] = ScheduleService._instance(pk, key)
+
+        def select(pending):
+            query = Q()
+            for day, start_time, end_time in pending:
+                query |= Q(day=day, start_time=start_time, end_time=end_time)
+            for schedule in Schedule.objects.filter(query):
+                key = (schedule.day, schedule.start_time, schedule.end_time)
+                schedules[key] = schedule
+                ScheduleService._remember(key, schedule.pk, version)
+
+        pending = keys - schedules.keys()
+        if pending:
+            select(pending)
+
+        missing = keys - schedules.keys()
+        if missing:
+            # ignore_conflicts no retorna ids: volver a leer los creados
+            Schedule.objects.bulk_create(
+                [Schedule(day=day, start_time=start_time, end_time=end_time) for day, start_time, end_time in missing],
+                ignore_conflicts=True,
+            )
+            select(missing)
+        return schedules
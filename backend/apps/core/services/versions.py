@@ -0,0 +1,78 @@
+import hashlib
+import threading
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+
+class VersionService:
+    """
+    Keeps a change counter per collection in CollectionVersion.
+
+    Writes only mark collections as changed; the counters are bumped once per
+    transaction, after commit, so a reader can never see a new version paired
+    with old data.
+    """
+
+    _pending = threading.local()
+
+    @staticmethod
+    def mark_changed(*names: str) -> None:
+        pending = getattr(VersionService._pending, "names", None)
+        if pending is None:
+            pending = VersionService._pending.names = set()
+        pending.update(names)
+        transaction.on_commit(VersionService.flush)
+
+    @staticmethod
+    def flush() -> None:
+        names = getattr(VersionService._pending, "names", None)
+        if not names:
+            return
+        VersionService._pending.names = set()
+        VersionService._pending.flushed = VersionService.bump(*names)
+
+    @staticmethod
+    def flushed(name: str):
+        """
+        Version that the last flush of this thread gave to `name` (None if
+        it did not bump it). Lets in-process caches that applied the same
+        commit move to exactly that version.
+        """
+        return getattr(VersionService._pending, "flushed", {}).get(name)
+
+    @staticmethod
+    def bump(*names: str) -> dict:
+        """
+        Increments the versions of `names` and returns the new values, read
+        while the updated rows are still locked so no other bump interleaves.
+        """
+        from apps.core.models import CollectionVersion
+
+        with transaction.atomic():
+            updated = CollectionVersion.objects.filter(name__in=names).update(version=F("version") + 1)
+            if updated < len(names):
+                existing = set(CollectionVersion.objects.filter(name__in=names).values_list("name", flat=True))
+                for name in set(names) - existing:
+                    try:
+                        with transaction.atomic():
+                            CollectionVersion.objects.create(name=name, version=1)
+                    except IntegrityError:
+                        CollectionVersion.objects.filter(name=name).update(version=F("version") + 1)
+            return VersionService.get(*names)
+
+    @staticmethod
+    def get(*names: str) -> dict:
+        from apps.core.models import CollectionVersion
+
+        versions = dict(CollectionVersion.objects.filter(name__in=names).values_list("name", "version"))
+        return {name: versions.get(name, 0) for name in names}
+
+    @staticmethod
+    def etag(names, *parts) -> str:
+        """
+        Builds a strong ETag from the collection versions and any extra
+        parts that change the representation (URL, media type...).
+        """
+        versions = VersionService.get(*names)
+        raw = "|".join([f"{name}:{versions[name]}" for name in sorted(versions)] + [str(part) for part in parts])
+        return '"' + hashlib.sha1(raw.encode()).hexdigest() + '"'
@@ -0,0 +1,99 @@
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from apps.core.services.dashboard import DashboardService
+from apps.core.services.schedules import ScheduleService
+from apps.core.services.versions import VersionService
+
+# Colección que se invalida cuando cambia cada modelo
+COLLECTION_MODELS = {
+    "core.Schedule": "schedules",
+    "mentors.Mentor": "mentors",
+    "mentors.MentorAvailability": "availability",
+    "projects.Project": "projects",
+    "projects.Group": "groups",
+    "projects.Event": "events",
+    "users.Profile": "profiles",
+}
+
+
+def _collection_changed(sender, **kwargs):
+    VersionService.mark_changed(COLLECTION_MODELS[sender._meta.label])
+
+
+def _user_changed(sender, update_fields=None, **kwargs):
+    # El login solo actualiza last_login y no afecta a ningún listado
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    VersionService.mark_changed("profiles")
+
+
+# Contador del dashboard que se ajusta al crear o eliminar cada modelo
+DASHBOARD_COUNTERS = {
+    "mentors.Mentor": "total_mentors",
+    "projects.Project": "total_projects",
+    "projects.Group": "total_groups",
+}
+
+
+def _dashboard_created(sender, created, **kwargs):
+    if created:
+        DashboardService.apply_delta(**{DASHBOARD_COUNTERS[sender._meta.label]: 1})
+
+
+def _dashboard_deleted(sender, **kwargs):
+    DashboardService.apply_delta(**{DASHBOARD_COUNTERS[sender._meta.label]: -1})
+
+
+def _dashboard_user_saved(sender, instance, created, **kwargs):
+    if created:
+        DashboardService.apply_delta(
+            total_users=1,
+            active_users=1 if instance.is_active else 0,
+            new_users_this_week=1,
+        )
+    # Cambios de estado o de último login afectan activos y actividad reciente
+    DashboardService.mark_dirty()
+
+
+def _dashboard_user_deleted(sender, instance, **kwargs):
+    DashboardService.apply_delta(total_users=-1, active_users=-1 if instance.is_active else 0)
+    DashboardService.mark_dirty()
+
+
+def _dashboard_profile_changed(sender, **kwargs):
+    # Puede cambiar la cantidad de roles distintos
+    DashboardService.mark_dirty()
+
+
+def _schedule_saved(sender, created, **kwargs):
+    # Un horario editado deja obsoletas las entradas internadas
+    if not created:
+        ScheduleService.invalidate()
+
+
+def _schedule_deleted(sender, **kwargs):
+    ScheduleService.invalidate()
+
+
+def register():
+    for label in COLLECTION_MODELS:
+        model = apps.get_model(label)
+        post_save.connect(_collection_changed, sender=model, dispatch_uid=f"versions-save-{label}")
+        post_delete.connect(_collection_changed, sender=model, dispatch_uid=f"versions-delete-{label}")
+    post_save.connect(_user_changed, sender=User, dispatch_uid="versions-save-auth.User")
+    post_delete.connect(_user_changed, sender=User, dispatch_uid="versions-delete-auth.User")
+
+    for label in DASHBOARD_COUNTERS:
+        model = apps.get_model(label)
+        post_save.connect(_dashboard_created, sender=model, dispatch_uid=f"dashboard-save-{label}")
+        post_delete.connect(_dashboard_deleted, sender=model, dispatch_uid=f"dashboard-delete-{label}")
+    post_save.connect(_dashboard_user_saved, sender=User, dispatch_uid="dashboard-save-auth.User")
+    post_delete.connect(_dashboard_user_deleted, sender=User, dispatch_uid="dashboard-delete-auth.User")
+    profile = apps.get_model("users.Profile")
+    post_save.connect(_dashboard_profile_changed, sender=profile, dispatch_uid="dashboard-save-users.Profile")
+    post_delete.connect(_dashboard_profile_changed, sender=profile, dispatch_uid="dashboard-delete-users.Profile")
+
+    schedule = apps.get_model("core.Schedule")
+    post_save.connect(_schedule_saved, sender=schedule, dispatch_uid="schedule-cache-save")
+    post_delete.connect(_schedule_deleted, sender=schedule, dispatch_uid="schedule-cache-delete")
@@ -0,0 +1,135 @@
+import hashlib
+import logging
+import os
+import tempfile
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from apps.core.services.files import FileService
+
+logger = logging.getLogger(__name__)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Filesystem storage that keeps each distinct content once.
+
+    The upload is hashed while it is streamed to a temporary file under
+    MEDIA_ROOT, then moved to FileService.content_filename (the folder of
+    the upload_to name, sharded by SHA-256). If that blob already exists
+    the temporary file is dropped. Each save adds a reference in
+    StoredFile and each delete removes one; the blob is unlinked after
+    the last reference is gone and the transaction commits. Saves and
+    unlinks of the same blob are serialized by locking its StoredFile row.
+
+    Files stored before this backend (no StoredFile row) are deleted
+    directly, as FileSystemStorage did.
+    """
+
+    TEMP_DIR = ".incoming"
+
+    def temp_path(self):
+        """
+        Returns a new empty temporary file under MEDIA_ROOT, on the same
+        filesystem as the blobs so it can be moved into place atomically.
+        """
+        temp_dir = self.path(self.TEMP_DIR)
+        os.makedirs(temp_dir, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=temp_dir)
+        os.close(fd)
+        return path
+
+    def _save(self, name, content):
+        temp_path = self.temp_path()
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(temp_path, "wb") as temp:
+                if hasattr(content, "seek"):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    temp.write(chunk)
+                    size += len(chunk)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return self.store_local(name, temp_path, digest.hexdigest(), size)
+
+    def store_local(self, name, temp_path, digest, size):
+        """
+        Stores a local file already hashed by the caller (e.g. a chunked
+        upload): moves it to its content path, or drops it if that blob
+        exists, and adds a reference. Returns the stored name.
+        """
+        from apps.core.models import StoredFile
+
+        name = FileService.content_filename(digest, name)
+        try:
+            with transaction.atomic():
+                # Bloquear la fila: un delete concurrente no puede borrar el blob mientras tanto
+                blob, _ = StoredFile.objects.select_for_update().get_or_create(
+                    path=name, defaults={"sha256": digest, "size": size}
+                )
+                full_path = self.path(name)
+                if not os.path.exists(full_path):
+                    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                    if self.directory_permissions_mode is not None:
+                        os.chmod(os.path.dirname(full_path), self.directory_permissions_mode)
+                    os.replace(temp_path, full_path)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(full_path, self.file_permissions_mode)
+                StoredFile.objects.filter(pk=blob.pk).update(references=F("references") + 1)
+        finally:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+        return name
+
+    def get_available_name(self, name, max_length=None):
+        # El nombre definitivo depende del contenido: no hace falta buscar uno libre
+        return name
+
+    def delete(self, name):
+        from apps.core.models import StoredFile
+
+        if not name:
+            raise ValueError("The name must be given to delete().")
+        with transaction.atomic():
+            blob = StoredFile.objects.select_for_update().filter(path=name).first()
+            if blob is None:
+                super().delete(name)
+                return
+            if blob.references > 1:
+                StoredFile.objects.filter(pk=blob.pk).update(references=F("references") - 1)
+                return
+            # La fila queda en 0 hasta que se borre el blob, con ella bloqueada
+            StoredFile.objects.filter(pk=blob.pk).update(references=0)
+            transaction.on_commit(lambda: self._unlink_unreferenced(name))
+
+    def _unlink_unreferenced(self, name):
+        """
+        Unlinks a blob left without references, holding the lock on its
+        StoredFile row like store_local does: a concurrent save of the same
+        content either re-referenced it before (and the blob is kept) or
+        waits until the blob and its row are gone (and moves its own copy).
+        """
+        from apps.core.models import StoredFile
+
+        with transaction.atomic():
+            blob = StoredFile.objects.select_for_update().filter(path=name).first()
+            if blob is None or blob.references > 0:
+                return
+            try:
+                super().delete(name)
+            except OSError:
+                # La fila en 0 queda para el barrido de huérfanos
+                logger.warning(f"Could not delete blob {name}")
+                return
+            blob.delete()
+
+    def references(self, name) -> int:
+        from apps.core.models import StoredFile
+
+        return StoredFile.objects.filter(path=name).values_list("references", flat=True).first() or 0
@@ -1,3 +1,470 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from datetime import date, time, timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from apps.core.models import DashboardSnapshot, Schedule, StoredFile
+from apps.core.services.credentials import CredentialService
+from apps.core.services.dashboard import REVALIDATE_LOCK_KEY, DashboardService
+from apps.core.services.files import FileService
+from apps.core.services.instrumentation import Histogram, route_metrics
+from apps.core.services.media import MediaAccessService
+from apps.core.services.metrics import MetricsCollector
+from apps.core.services.schedules import ScheduleService
+from apps.core.services.versions import VersionService
+from apps.core.storage import ContentAddressedStorage
+from apps.mentors.models import Mentor
+from apps.projects.models import Group, Project
+from apps.users.authentication import RoleRefreshToken
+from apps.users.models import Profile
 
-# Create your tests here.
+
+class ScheduleServiceTests(TestCase):
+    def setUp(self):
+        ScheduleService.invalidate()
+        self.addCleanup(ScheduleService.invalidate)
+
+    def test_cache_hit_returns_same_schedule(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule, created = ScheduleService.get_or_create(0, "08:00", "10:00")
+        self.assertTrue(created)
+        cached, created = ScheduleService.get_or_create(0, time(8), time(10))
+        self.assertFalse(created)
+        self.assertEqual(cached.pk, schedule.pk)
+
+    def test_edit_from_another_process_invalidates_entry(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule, _ = ScheduleService.get_or_create(1, "08:00", "10:00")
+            ScheduleService.get_or_create(1, "08:00", "10:00")
+
+        # update() no emite señales, como una escritura de otro proceso
+        Schedule.objects.filter(pk=schedule.pk).update(start_time=time(9))
+        VersionService.bump("schedules")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resolved, created = ScheduleService.get_or_create(1, "08:00", "10:00")
+        self.assertTrue(created)
+        self.assertNotEqual(resolved.pk, schedule.pk)
+
+    def test_delete_from_another_process_invalidates_resolve_many(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = ScheduleService.resolve_many([(2, "14:00", "16:00")])[(2, time(14), time(16))]
+
+        Schedule.objects.filter(pk=first.pk).delete()
+        VersionService.bump("schedules")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second = ScheduleService.resolve_many([(2, "14:00", "16:00")])[(2, time(14), time(16))]
+        self.assertNotEqual(second.pk, first.pk)
+        self.assertTrue(Schedule.objects.filter(pk=second.pk).exists())
+
+
+class ContentAddressedStorageTests(TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.storage = ContentAddressedStorage(location=self.root)
+
+    def save(self, name, content=b"%PDF-1.7 contenido"):
+        return self.storage.save(name, ContentFile(content))
+
+    def test_same_content_is_stored_once(self):
+        first = self.save("mentors_certificates/a.pdf")
+        second = self.save("mentors_certificates/b.pdf")
+
+        self.assertEqual(first, second)
+        self.assertTrue(FileService.is_content_filename(first))
+        self.assertEqual(self.storage.references(first), 2)
+        self.assertEqual(StoredFile.objects.count(), 1)
+
+    def test_blob_is_unlinked_after_last_reference(self):
+        name = self.save("mentors_certificates/a.pdf")
+        self.save("mentors_certificates/b.pdf")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.storage.delete(name)
+        self.assertEqual(self.storage.references(name), 1)
+        self.assertTrue(self.storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.storage.delete(name)
+        self.assertFalse(StoredFile.objects.filter(path=name).exists())
+        self.assertFalse(self.storage.exists(name))
+
+    def test_save_between_delete_and_unlink_keeps_blob(self):
+        name = self.save("mentors_certificates/a.pdf")
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.storage.delete(name)
+
+        # Otra petición guarda el mismo contenido antes de que corra el unlink
+        self.assertEqual(self.save("mentors_certificates/c.pdf"), name)
+        for callback in callbacks:
+            callback()
+
+        self.assertEqual(self.storage.references(name), 1)
+        self.assertTrue(self.storage.exists(name))
+
+    def test_file_without_row_is_deleted_directly(self):
+        legacy = os.path.join(self.root, "user_photos", "legacy.jpg")
+        os.makedirs(os.path.dirname(legacy))
+        with open(legacy, "wb") as file:
+            file.write(b"foto")
+
+        self.storage.delete("user_photos/legacy.jpg")
+        self.assertFalse(os.path.exists(legacy))
+
+
+class CredentialServiceTests(TestCase):
+    def create_users(self, *usernames):
+        User.objects.bulk_create([User(username=username) for username in usernames])
+
+    def test_base_is_ascii_and_first_suffix_is_100(self):
+        self.assertEqual(CredentialService.usernameBase("Ána María", "Gil-Peña"), "anamaria.gilpena")
+        self.assertEqual(CredentialService.generateUsernames([("Ana", "Gil")]), ["ana.gil100"])
+
+    def test_next_free_suffix_within_database_and_batch(self):
+        self.create_users("ana.gil100", "ana.gil101", "ana.gilbert500")
+
+        self.assertEqual(
+            CredentialService.generateUsernames([("Ana", "Gil"), ("Ana", "Gil"), ("Luis", "Paz")]),
+            ["ana.gil102", "ana.gil103", "luis.paz100"],
+        )
+
+    def test_suffix_is_compared_numerically(self):
+        # "ana.gil1100" es de la base "ana.gil" aunque empiece como "ana.gil11"
+        self.create_users("ana.gil11", "ana.gil1100", "ana.gil200")
+
+        self.assertEqual(CredentialService.generateUsernames([("Ana", "Gil")]), ["ana.gil1101"])
+        # Y también cuenta para la base "ana.gil1": no puede volver a generar "ana.gil1100"
+        self.assertEqual(
+            CredentialService.generateUsernames([("Ana", "Gil"), ("Ana", "Gil1")]),
+            ["ana.gil1101", "ana.gil1102"],
+        )
+
+    def test_reserved_usernames_count_as_taken(self):
+        self.assertEqual(
+            CredentialService.generateUsernames([("Ana", "Gil")], reserved=["ana.gil100", "otro"]),
+            ["ana.gil101"],
+        )
+
+    def test_allocate_retries_after_a_concurrent_insert(self):
+        self.create_users("ana.gil100")
+        last_suffixes = CredentialService._lastSuffixes
+        # La primera lectura no ve la fila que insertó el otro proceso
+        stale_then_real = [lambda bases, reserved=(): {}, last_suffixes]
+        attempts = []
+
+        def insert(usernames):
+            attempts.append(usernames)
+            return User.objects.bulk_create([User(username=username) for username in usernames])
+
+        with mock.patch.object(
+            CredentialService, "_lastSuffixes",
+            side_effect=lambda *args, **kwargs: stale_then_real.pop(0)(*args, **kwargs),
+        ):
+            users = CredentialService.allocateUsernames([("Ana", "Gil")], insert)
+
+        self.assertEqual(attempts, [["ana.gil100"], ["ana.gil101"]])
+        self.assertEqual([user.username for user in users], ["ana.gil101"])
+
+    def test_allocate_gives_up_after_the_last_attempt(self):
+        self.create_users("ana.gil100")
+
+        # Nunca ve la fila existente
+        with mock.patch.object(CredentialService, "_lastSuffixes", side_effect=lambda *args, **kwargs: {}):
+            with self.assertRaises(IntegrityError):
+                CredentialService.allocateUsernames(
+                    [("Ana", "Gil")],
+                    lambda usernames: User.objects.bulk_create([User(username=name) for name in usernames]),
+                    attempts=2,
+                )
+        self.assertEqual(User.objects.count(), 1)
+
+
+class ProtectedMediaTests(TestCase):
+    CERTIFICATE = "mentors_certificates/cert-a.pdf"
+    PHOTO = "user_photos/worker.jpg"
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root, MEDIA_SENDFILE_BACKEND="")
+        media.enable()
+        self.addCleanup(media.disable)
+        for name, content in ((self.CERTIFICATE, b"%PDF-1.7 a"), (self.PHOTO, b"jpeg")):
+            os.makedirs(os.path.join(self.media_root, os.path.dirname(name)), exist_ok=True)
+            with open(os.path.join(self.media_root, name), "wb") as file:
+                file.write(content)
+
+        self.owner = self.make_user("mentor-owner", "Mentor")
+        Mentor.objects.create(profile=self.owner.profile, charge="Mentor", certificate=self.CERTIFICATE)
+        self.other_mentor = self.make_user("mentor-other", "Mentor")
+        Mentor.objects.create(profile=self.other_mentor.profile, charge="Mentor")
+        self.admin = self.make_user("admin-media", "Admin")
+        self.worker = self.make_user("worker-media", "Trabajador", photo=self.PHOTO)
+        self.other_worker = self.make_user("worker-other", "Trabajador")
+
+    def make_user(self, username, role, photo=""):
+        user = User.objects.create_user(username=username, password="pw")
+        Profile.objects.create(user=user, role=role, photo=photo)
+        return user
+
+    def get(self, name, user=None, **params):
+        headers = {}
+        if user is not None:
+            headers["HTTP_AUTHORIZATION"] = f"Bearer {RoleRefreshToken.for_user(user).access_token}"
+        return self.client.get(f"{settings.MEDIA_URL}{name}", params, **headers)
+
+    def test_path_traversal_is_rejected(self):
+        for name in (
+            "mentors_certificates/../../config/settings.py",
+            "user_photos/../mentors_certificates/cert-a.pdf",
+            "./mentors_certificates/cert-a.pdf",
+            "mentors_certificates//cert-a.pdf",
+        ):
+            with self.subTest(name=name):
+                self.assertEqual(self.get(name, self.admin).status_code, 404)
+
+    def test_certificate_owner_admin_and_other_mentor(self):
+        self.assertEqual(self.get(self.CERTIFICATE).status_code, 401)
+        self.assertEqual(self.get(self.CERTIFICATE, self.other_mentor).status_code, 403)
+
+        response = self.get(self.CERTIFICATE, self.owner)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), b"%PDF-1.7 a")
+        self.assertEqual(self.get(self.CERTIFICATE, self.admin).status_code, 200)
+
+    def test_photo_owner_and_roles_without_user_read(self):
+        self.assertEqual(self.get(self.PHOTO, self.worker).status_code, 200)
+        self.assertEqual(self.get(self.PHOTO, self.other_worker).status_code, 403)
+        self.assertEqual(self.get(self.PHOTO, self.admin).status_code, 200)
+
+    def test_signed_token(self):
+        token = MediaAccessService.token(self.CERTIFICATE, self.owner.pk)
+        self.assertEqual(self.get(self.CERTIFICATE, token=token).status_code, 200)
+
+        user_id, window, signature = token.split(".")
+        tampered = f"{user_id}.{window}.{signature[:-1]}{'0' if signature[-1] != '0' else '1'}"
+        other_file = MediaAccessService.token(self.PHOTO, self.owner.pk)
+        other_user = f"{self.other_mentor.pk}.{window}.{signature}"
+        expired_window = int(window) - 2
+        expired = f"{user_id}.{expired_window}.{MediaAccessService._signature(self.owner.pk, expired_window, self.CERTIFICATE)}"
+        for bad_token in (tampered, other_file, other_user, expired, "basura"):
+            with self.subTest(token=bad_token):
+                self.assertEqual(self.get(self.CERTIFICATE, token=bad_token).status_code, 401)
+
+        # Un token válido de un usuario desactivado tampoco sirve
+        self.owner.is_active = False
+        self.owner.save()
+        self.assertEqual(self.get(self.CERTIFICATE, token=token).status_code, 401)
+
+    def test_sendfile_backends(self):
+        with override_settings(MEDIA_SENDFILE_BACKEND="nginx", MEDIA_ACCEL_REDIRECT_PREFIX="/protected-media/"):
+            response = self.get(self.CERTIFICATE, self.admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Accel-Redirect"], f"/protected-media/{self.CERTIFICATE}")
+        self.assertEqual(response.content, b"")
+
+        with override_settings(MEDIA_SENDFILE_BACKEND="apache"):
+            response = self.get(self.CERTIFICATE, self.admin)
+        self.assertEqual(response["X-Sendfile"], os.path.join(self.media_root, self.CERTIFICATE))
+        self.assertNotIn("X-Accel-Redirect", response)
+
+
+@override_settings(DASHBOARD_SNAPSHOT_MAX_AGE=300)
+class DashboardSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def counters(self, snapshot):
+        return {field: getattr(snapshot, field) for field in ("total_users", "total_projects", "total_groups")}
+
+    def test_writes_keep_the_counters_in_line_with_a_recompute(self):
+        snapshot = DashboardService.get_snapshot()
+        self.assertEqual(self.counters(snapshot), {"total_users": 0, "total_projects": 0, "total_groups": 0})
+
+        User.objects.create_user(username="dash-user", password="pw")
+        project = Project.objects.create(name="Fotografía")
+        group = Group.objects.create(
+            project=project, location="Sede", mode="virtual", start_date=date(2026, 3, 1), end_date=date(2026, 3, 31),
+        )
+        Group.objects.create(
+            project=project, location="Sede", mode="virtual", start_date=date(2026, 3, 1), end_date=date(2026, 3, 31),
+        )
+        group.delete()
+
+        snapshot = DashboardSnapshot.objects.get()
+        self.assertEqual(self.counters(snapshot), {"total_users": 1, "total_projects": 1, "total_groups": 1})
+        computed = DashboardService.compute()
+        self.assertEqual(
+            self.counters(snapshot),
+            {field: computed[field] for field in ("total_users", "total_projects", "total_groups")},
+        )
+
+    @override_settings(DASHBOARD_SNAPSHOT_STALE_WHILE_REVALIDATE=False)
+    def test_stale_snapshot_is_recomputed_before_answering(self):
+        computed_at = DashboardService.refresh().computed_at
+        DashboardSnapshot.objects.update(total_projects=99, computed_at=computed_at - timedelta(hours=1))
+
+        self.assertEqual(DashboardService.get_snapshot().total_projects, 0)
+
+    @override_settings(DASHBOARD_SNAPSHOT_STALE_WHILE_REVALIDATE=True)
+    def test_stale_snapshot_is_served_and_revalidated_once(self):
+        DashboardService.refresh()
+        DashboardService.mark_dirty()
+        DashboardSnapshot.objects.update(total_projects=99)
+
+        with mock.patch("apps.core.events.periodic.revalidate_dashboard_snapshot") as revalidate:
+            self.assertEqual(DashboardService.get_snapshot().total_projects, 99)
+            self.assertEqual(DashboardService.get_snapshot().total_projects, 99)
+        revalidate.assert_called_once_with()
+        self.assertTrue(cache.get(REVALIDATE_LOCK_KEY))
+
+        DashboardService.refresh()
+        snapshot = DashboardService.get_snapshot()
+        self.assertEqual((snapshot.total_projects, snapshot.dirty), (0, False))
+
+
+class MetricsCollectorTests(TestCase):
+    def setUp(self):
+        self.host_cpu = iter([(100, 1000), (150, 1200)])
+        self.process_cpu = iter([2.0, 2.5])
+        self.clock = iter([10.0, 20.0])
+        for name, side_effect in (
+            ("_read_host_cpu_times", lambda: next(self.host_cpu)),
+            ("_read_process_cpu_seconds", lambda: next(self.process_cpu)),
+            ("_read_host_memory", lambda: (256, 1024)),
+            ("_read_disk_usage", lambda path: (1, 4)),
+            ("_read_process_rss", lambda: 4096),
+        ):
+            patcher = mock.patch(f"apps.core.services.metrics.{name}", side_effect=side_effect)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch("apps.core.services.metrics.time.monotonic", side_effect=lambda: next(self.clock))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cpu_is_the_difference_between_two_samples(self):
+        collector = MetricsCollector(interval=1, history_size=2)
+
+        first = collector.sample()
+        self.assertEqual((first["cpu"], first["process"]["cpu"]), (0.0, 0.0))
+        second = collector.sample()
+        self.assertEqual(second["cpu"], 25.0)
+        self.assertEqual(second["process"]["cpu"], 5.0)
+        self.assertEqual((second["memory"], second["storage"]), (25.0, 25.0))
+        self.assertEqual(second["process"]["rssBytes"], 4096)
+        self.assertEqual(second["loginAttempts"], {"successful": 0, "failed": 0})
+        self.assertEqual(collector.latest(), second)
+
+    def test_history_keeps_the_last_samples(self):
+        self.host_cpu = iter([(100, 1000), (150, 1200), (200, 1400)])
+        self.process_cpu = iter([2.0, 2.5, 3.0])
+        self.clock = iter([10.0, 20.0, 30.0])
+        collector = MetricsCollector(interval=1, history_size=2)
+
+        samples = [collector.sample() for _ in range(3)]
+        self.assertEqual(collector.snapshot(), samples[1:])
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_dashboard_reports_the_latest_sample(self):
+        user = User.objects.create_user(username="admin-metrics", password="pw")
+        Profile.objects.create(user=user, role="Admin")
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {RoleRefreshToken.for_user(user).access_token}"
+
+        with mock.patch("apps.core.views.collector", MetricsCollector(interval=1, history_size=2)):
+            response = self.client.get(reverse("api:admin-dashboard-stats"), {"history": "1"})
+
+        self.assertEqual(response.status_code, 200)
+        health = response.json()["systemHealth"]
+        self.assertEqual((health["cpu"], health["memory"], health["storage"]), (0.0, 25.0, 25.0))
+        self.assertEqual(health["process"]["rssBytes"], 4096)
+        self.assertEqual(len(response.json()["systemHistory"]), 1)
+
+
+class HistogramTests(TestCase):
+    def test_percentiles_keep_the_relative_precision(self):
+        histogram = Histogram()
+        for value in range(1, 10001):
+            histogram.record(value)
+
+        self.assertEqual((histogram.count, histogram.min, histogram.max), (10000, 1, 10000))
+        for percent, exact in ((50, 5000), (90, 9000), (99, 9900)):
+            self.assertAlmostEqual(histogram.percentile(percent), exact, delta=exact * 0.016)
+        # Un bucket que cruza el límite no se cuenta en él
+        self.assertEqual(histogram.cumulative([0, 100, 9999, 20000]), [0, 100, 9983, 10000])
+
+
+class RouteMetricsTests(TestCase):
+    def setUp(self):
+        route_metrics.reset()
+        self.addCleanup(route_metrics.reset)
+        self.admin = User.objects.create_user(username="admin-routes", password="pw")
+        Profile.objects.create(user=self.admin, role="Admin")
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {RoleRefreshToken.for_user(self.admin).access_token}"
+        self.project = Project.objects.create(name="Cerámica")
+        self.url = reverse("api:projects-groups-list", args=[self.project.pk])
+
+    def route(self, snapshot, view):
+        return next(route for route in snapshot["routes"] if route["view"] == view)
+
+    def test_requests_are_grouped_by_route(self):
+        self.client.get(self.url)
+        self.client.get(reverse("api:projects-groups-detail", args=[self.project.pk, 999]))
+
+        response = self.client.get(reverse("api:admin-metrics"))
+
+        self.assertEqual(response.status_code, 200)
+        listing = self.route(response.json(), "api:projects-groups-list")
+        self.assertEqual((listing["method"], listing["requests"], listing["statuses"]), ("GET", 1, {"2xx": 1}))
+        self.assertGreater(listing["queries"]["max"], 0)
+        self.assertEqual(listing["serializer_queries"]["max"], 0)
+        detail = self.route(response.json(), "api:projects-groups-detail")
+        self.assertEqual(detail["statuses"], {"4xx": 1})
+
+    def test_prometheus_format(self):
+        self.client.get(self.url)
+        self.client.get(self.url)
+
+        response = self.client.get(reverse("api:admin-metrics"), {"format": "prometheus"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        lines = response.content.decode().splitlines()
+        labels = 'method="GET",view="api:projects-groups-list"'
+        self.assertIn(f'nodux_http_requests_total{{{labels},status="2xx"}} 2', lines)
+        self.assertIn("# TYPE nodux_http_request_duration_seconds histogram", lines)
+        self.assertIn(f'nodux_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 2', lines)
+        self.assertIn(f"nodux_http_request_duration_seconds_count{{{labels}}} 2", lines)
+        buckets = [
+            int(line.rsplit(" ", 1)[1]) for line in lines
+            if line.startswith(f"nodux_http_request_queries_bucket{{{labels},")
+        ]
+        self.assertEqual(buckets, sorted(buckets))
+
+    def test_delete_clears_and_requires_admin(self):
+        self.client.get(self.url)
+        self.assertEqual(self.client.delete(reverse("api:admin-metrics")).status_code, 204)
+        # Solo queda el propio DELETE, registrado después de limpiar
+        self.assertEqual([route["view"] for route in route_metrics.snapshot()["routes"]], ["api:admin-metrics"])
+
+        worker = User.objects.create_user(username="worker-routes", password="pw")
+        Profile.objects.create(user=worker, role="Trabajador")
+        response = self.client.get(
+            reverse("api:admin-metrics"), HTTP_AUTHORIZATION=f"Bearer {RoleRefreshToken.for_user(worker).access_token}",
+        )
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(INSTRUMENTATION_SERVER_TIMING=True)
+    def test_server_timing_header(self):
+        response = self.client.get(self.url)
+
+        self.assertRegex(response["Server-Timing"], r'^db;desc="\d+ queries";dur=[\d.]+, serializer;dur=[\d.]+, total;dur=[\d.]+$')
@@ -1,24 +1,56 @@
+import posixpath
 from rest_framework import viewsets, status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from django.contrib.auth.models import User
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_safe
 from django.db.models import Count
 from django.utils import timezone
 from datetime import timedelta
 from apps.users.models import Profile
+from apps.users.authentication import StatelessRoleJWTAuthentication
+from apps.users.permissions import get_user_role
 from apps.projects.models import Project, Group
 from apps.mentors.models import Mentor
+from .mixins import ConditionalGetMixin
+from .renderers import PrometheusRenderer
 from .serializers import ScheduleSerializer
+from .services.dashboard import DashboardService
+from .services.media import MediaAccessService
+from .services.instrumentation import route_metrics
+from .services.metrics import collector
 from .models import Schedule
 
-class ScheduleViewSet(viewsets.ModelViewSet):
+class ScheduleViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar horarios (Schedule)
     """
     queryset = Schedule.objects.all()
     serializer_class = ScheduleSerializer
     permission_classes = [IsAuthenticated]
+    etag_collections = ('schedules',)
+
+def _admin_role_required(request, message):
+    """
+    Retorna una respuesta de error si el usuario no es Admin o SuperAdmin.
+    El rol es el actual del usuario (caché de estado), no solo el claim del JWT.
+    """
+    role = get_user_role(request.user)
+    if role is None:
+        return Response(
+            {'error': 'Perfil de usuario no encontrado'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    if role not in ['Admin', 'SuperAdmin']:
+        return Response(
+            {'error': message},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    return None
 
 # TODO: Temporalmente comentado - Requiere configurar is_staff en usuarios Admin
 # @api_view(['GET'])
@@ -101,61 +133,50 @@ def admin_dashboard_stats(request):
     TODO: Agregar validación de roles en el futuro
     """
     try:
-        # Verificar si el usuario tiene rol Admin o SuperAdmin
-        try:
-            profile = Profile.objects.get(user=request.user)
-            if profile.role not in ['Admin', 'SuperAdmin']:
-                return Response(
-                    {'error': 'No tienes permisos para acceder a esta información'},
-                    status=status.HTTP_403_FORBIDDEN
-                )
-        except Profile.DoesNotExist:
-            return Response(
-                {'error': 'Perfil de usuario no encontrado'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        # Verificar si el usuario tiene rol Admin o SuperAdmin (claim del token)
+        denied = _admin_role_required(request, 'No tienes permisos para acceder a esta información')
+        if denied:
+            return denied
 
-        total_users = User.objects.count()
-        active_users = User.objects.filter(is_active=True).count()
-        
-        one_week_ago = timezone.now() - timedelta(days=7)
-        new_users_this_week = User.objects.filter(date_joined__gte=one_week_ago).count()
-        
-        unique_roles = Profile.objects.values('role').distinct().count()
+        # Estadísticas precalculadas (una lectura por clave primaria)
+        snapshot = DashboardService.get_snapshot()
         total_modules = 3
-        
-        total_projects = Project.objects.count()
-        total_groups = Group.objects.count()
-        total_mentors = Mentor.objects.count()
-        
-        recent_users = User.objects.order_by('-last_login')[:5]
+
         activity_logs = [
-            {
-                'id': str(user.pk),
-                'user': user.get_full_name() or user.username,
-                'action': 'Inicio de sesión',
-                'target': user.email,
-                'timestamp': user.last_login.isoformat() if user.last_login else timezone.now().isoformat()
-            }
-            for user in recent_users
+            {**log, 'timestamp': log['timestamp'] or timezone.now().isoformat()}
+            for log in snapshot.activity_logs
         ]
-        
-        system_health = {'cpu': 32, 'memory': 45, 'storage': 28}
-        login_attempts = {'successful': 245, 'failed': 18}
-        
-        return Response({
-            'totalUsers': total_users,
-            'activeUsers': active_users,
-            'totalRoles': unique_roles,
+
+        # Métricas del proceso y del host tomadas por el recolector en segundo plano
+        collector.ensure_started()
+        health = collector.latest() or collector.sample()
+        system_health = {
+            'cpu': health['cpu'],
+            'memory': health['memory'],
+            'storage': health['storage'],
+            'process': health['process'],
+            'sampledAt': health['timestamp'],
+        }
+        login_attempts = health['loginAttempts']
+
+        data = {
+            'totalUsers': snapshot.total_users,
+            'activeUsers': snapshot.active_users,
+            'totalRoles': snapshot.total_roles,
             'totalModules': total_modules,
-            'newUsersThisWeek': new_users_this_week,
-            'totalProjects': total_projects,
-            'totalGroups': total_groups,
-            'totalMentors': total_mentors,
+            'newUsersThisWeek': snapshot.new_users_this_week,
+            'totalProjects': snapshot.total_projects,
+            'totalGroups': snapshot.total_groups,
+            'totalMentors': snapshot.total_mentors,
             'loginAttempts': login_attempts,
             'systemHealth': system_health,
-            'activityLogs': activity_logs
-        })
+            'activityLogs': activity_logs,
+            'computedAt': snapshot.computed_at.isoformat() if snapshot.computed_at else None,
+        }
+        if request.query_params.get('history') in ('1', 'true'):
+            data['systemHistory'] = collector.snapshot()
+
+        return Response(data)
         
     except Exception as e:
         return Response(
@@ -163,6 +184,29 @@ def admin_dashboard_stats(request):
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
 
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([JSONRenderer, PrometheusRenderer])
+def admin_metrics(request):
+    """
+    Query count, database time, serializer time and latency histograms per
+    route, recorded by InstrumentationMiddleware in this worker process.
+
+    JSON by default; ?format=prometheus (or Accept: text/plain) returns the
+    Prometheus text format. DELETE clears the histograms.
+    """
+    denied = _admin_role_required(request, 'No tienes permisos para acceder a esta información')
+    if denied:
+        return denied
+
+    if request.method == 'DELETE':
+        route_metrics.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    if request.accepted_renderer.format == 'prometheus':
+        return Response(route_metrics.prometheus())
+    return Response(route_metrics.snapshot())
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def system_settings(request):
@@ -170,18 +214,9 @@ def system_settings(request):
     Obtiene la configuración actual del sistema
     TODO: Implementar guardado en base de datos
     """
-    try:
-        profile = Profile.objects.get(user=request.user)
-        if profile.role not in ['Admin', 'SuperAdmin']:
-            return Response(
-                {'error': 'No tienes permisos para acceder a esta información'},
-                status=status.HTTP_403_FORBIDDEN
-            )
-    except Profile.DoesNotExist:
-        return Response(
-            {'error': 'Perfil de usuario no encontrado'},
-            status=status.HTTP_404_NOT_FOUND
-        )
+    denied = _admin_role_required(request, 'No tienes permisos para acceder a esta información')
+    if denied:
+        return denied
 
     return Response({
         'general': {
@@ -216,18 +251,9 @@ def update_system_settings(request):
     Actualiza la configuración del sistema
     TODO: Implementar lógica de guardado en BD
     """
-    try:
-        profile = Profile.objects.get(user=request.user)
-        if profile.role not in ['Admin', 'SuperAdmin']:
-            return Response(
-                {'error': 'No tienes permisos para realizar esta acción'},
-                status=status.HTTP_403_FORBIDDEN
-            )
-    except Profile.DoesNotExist:
-        return Response(
-            {'error': 'Perfil de usuario no encontrado'},
-            status=status.HTTP_404_NOT_FOUND
-        )
+    denied = _admin_role_required(request, 'No tienes permisos para realizar esta acción')
+    if denied:
+        return denied
 
     settings_data = request.data
     
@@ -246,18 +272,9 @@ def role_statistics(request):
     """
     Obtiene estadísticas de roles del sistema
     """
-    try:
-        profile = Profile.objects.get(user=request.user)
-        if profile.role not in ['Admin', 'SuperAdmin']:
-            return Response(
-                {'error': 'No tienes permisos para acceder a esta información'},
-                status=status.HTTP_403_FORBIDDEN
-            )
-    except Profile.DoesNotExist:
-        return Response(
-            {'error': 'Perfil de usuario no encontrado'},
-            status=status.HTTP_404_NOT_FOUND
-        )
+    denied = _admin_role_required(request, 'No tienes permisos para acceder a esta información')
+    if denied:
+        return denied
     
     try:
         role_counts = Profile.objects.values('role').annotate(
@@ -313,3 +330,38 @@ def role_statistics(request):
             {'error': str(e)},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+@require_safe
+def protected_media(request, path):
+    """
+    Sirve un archivo de MEDIA_ROOT tras comprobar que el usuario puede verlo.
+    El usuario se toma del `?token=` firmado de la URL o del JWT del header;
+    la transferencia la hace el proxy (X-Accel-Redirect / X-Sendfile) si
+    MEDIA_SENDFILE_BACKEND está configurado.
+    """
+    name = posixpath.normpath(path)
+    if name != path or name.startswith(('/', '../')) or '\\' in name:
+        raise Http404
+
+    user = None
+    token = request.GET.get('token')
+    if token:
+        user_id = MediaAccessService.user_id_from_token(token, name)
+        user = User.objects.filter(pk=user_id, is_active=True).first() if user_id else None
+    else:
+        try:
+            authenticated = StatelessRoleJWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            authenticated = None
+        user = authenticated[0] if authenticated else None
+    if user is None:
+        return JsonResponse({'error': 'Autenticación requerida'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    if not MediaAccessService.can_access(user, get_user_role(user), name):
+        return JsonResponse({'error': 'No tienes permiso para ver este archivo'}, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        return MediaAccessService.serve(request, name)
+    except FileNotFoundError:
+        raise Http404
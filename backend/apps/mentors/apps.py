@@ -6,5 +6,7 @@ class MentorsConfig(AppConfig):
     name = 'apps.mentors'
     
     def ready(self):
+        from . import signals
         from .events import periodic
+        signals.register()
 
@@ -0,0 +1,61 @@
+import csv
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+from apps.mentors.services.importer import MentorImportService
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa mentores desde un archivo CSV (con encabezado) o JSON. Genera "
+        "usernames y contraseñas; si alguna fila es inválida no se crea ninguno."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Archivo .csv o .json")
+        parser.add_argument("--format", choices=["csv", "json"], help="Por defecto según la extensión")
+        parser.add_argument("--dry-run", action="store_true", help="Solo validar")
+        parser.add_argument("--workers", type=int, default=0, help="Procesos para hashear contraseñas (0: uno por CPU)")
+        parser.add_argument(
+            "--output",
+            help="CSV donde guardar id, username, email y contraseña de cada mentor (por defecto la salida estándar)",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.is_file():
+            raise CommandError(f"No existe el archivo {path}")
+
+        fmt = options["format"] or path.suffix.lstrip(".").lower()
+        try:
+            rows = MentorImportService.parse(path.read_bytes(), fmt)
+            cleaned_rows, errors = MentorImportService.validate(rows)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if errors:
+            for index, row_errors in sorted(errors.items()):
+                details = "; ".join(f"{field}: {message}" for field, message in row_errors.items())
+                self.stderr.write(f"Fila {index}: {details}")
+            raise CommandError(f"{len(errors)} filas con errores, no se creó ningún mentor")
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"{len(cleaned_rows)} mentores válidos"))
+            return
+
+        try:
+            created = MentorImportService.create(cleaned_rows, workers=options["workers"])
+        except IntegrityError as e:
+            raise CommandError(f"Un username o email fue registrado durante la importación: {e}")
+
+        fieldnames = ["id", "username", "email", "password"]
+        if options["output"]:
+            with open(options["output"], "w", newline="") as output:
+                writer = csv.DictWriter(output, fieldnames=fieldnames)
+                writer.writeheader()
+                writer.writerows(created)
+        else:
+            writer = csv.DictWriter(self.stdout, fieldnames=fieldnames, lineterminator="\n")
+            writer.writeheader()
+            writer.writerows(created)
+        self.stderr.write(self.style.SUCCESS(f"{len(created)} mentores creados"))
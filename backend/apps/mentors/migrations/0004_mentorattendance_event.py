@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentors', '0003_alter_mentorattendance_options_and_more'),
+        ('projects', '0005_event_attendance_generated'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mentorattendance',
+            name='event',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attendances', to='projects.event'),
+        ),
+        migrations.AddConstraint(
+            model_name='mentorattendance',
+            constraint=models.UniqueConstraint(condition=models.Q(('event__isnull', False)), fields=('event',), name='unique_attendance_per_event'),
+        ),
+    ]
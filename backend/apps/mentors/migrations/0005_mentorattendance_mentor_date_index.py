@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mentors', '0004_mentorattendance_event'),
+        ('projects', '0005_event_attendance_generated'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mentorattendance',
+            index=models.Index(fields=['mentor', 'date'], name='mentors_men_mentor__381bee_idx'),
+        ),
+    ]
@@ -1,3 +1,4 @@
+import uuid
 from django.db import models
 from django.contrib.auth.models import User
 from apps.core.models import Schedule
@@ -45,11 +46,52 @@ class MentorAttendance(models.Model):
     date = models.DateField(default=date.today)
     start_datetime = models.DateTimeField(null=True, blank=True)
     end_datetime = models.DateTimeField(null=True, blank=True)
+    # Evento que originó la asistencia (generada automáticamente)
+    event = models.ForeignKey(
+        to="projects.Event",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="attendances",
+    )
 
     class Meta:
         ordering = ["date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["event"],
+                condition=models.Q(event__isnull=False),
+                name="unique_attendance_per_event",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["mentor", "date"]),
+        ]
 
 
 class MentorAvailability(models.Model):
     mentor = models.ForeignKey(to=Mentor, on_delete=models.CASCADE)
     schedule = models.ForeignKey(to=Schedule, on_delete=models.CASCADE)
+
+
+class CertificateUpload(models.Model):
+    """
+    Resumable chunked upload of a Mentor.certificate. The chunks are
+    appended to a temporary file under MEDIA_ROOT until `offset` reaches
+    `size`; completing the upload moves it to the storage and replaces the
+    mentor certificate.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    mentor = models.ForeignKey(to=Mentor, on_delete=models.CASCADE, related_name="certificate_uploads")
+    created_by = models.ForeignKey(to=User, on_delete=models.SET_NULL, null=True, blank=True)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    # SHA-256 esperado del archivo completo (opcional, lo envía el cliente)
+    checksum = models.CharField(max_length=64, blank=True)
+    temp_path = models.CharField(max_length=500)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["created_at"]
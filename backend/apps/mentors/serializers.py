@@ -1,8 +1,12 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.db import transaction
 from apps.users.models import Profile
 from apps.users.serializers import ProfileSerializer
+from apps.users.services.photos import ProfilePhotoService
 from apps.core.services.credentials import CredentialService
+from apps.core.services.file_cleanup import FileCleanupService
+from apps.core.services.media import MediaAccessService
 from .models import Mentor, MentorAttendance
 from django.utils import timezone
 
@@ -21,38 +25,36 @@ class MentorSerializer(serializers.ModelSerializer):
         profile_data = validated_data.pop("profile")
         user_data = profile_data.pop("user")
 
-        username = CredentialService.generateUsername(
-            user_data["first_name"], user_data["last_name"]
-        )
         password = CredentialService.generatePassword()
 
-        user = User.objects.create_user(
-            username=username,
-            password=password,
-            first_name=user_data.get("first_name", ""),
-            last_name=user_data.get("last_name", ""),
-            email=user_data.get("email", ""),
-        )
+        with transaction.atomic():
+            user = CredentialService.allocateUsernames(
+                [(user_data["first_name"], user_data["last_name"])],
+                lambda usernames: User.objects.create_user(
+                    username=usernames[0],
+                    password=password,
+                    first_name=user_data.get("first_name", ""),
+                    last_name=user_data.get("last_name", ""),
+                    email=user_data.get("email", ""),
+                ),
+            )
 
         profile = Profile.objects.create(user=user, **profile_data)
         mentor = Mentor.objects.create(profile=profile, **validated_data)
 
         return mentor
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         profile_data = validated_data.pop("profile", None)
 
         # --- Update Mentor fields ---
         for attr, value in validated_data.items():
             if attr == "certificate":
-                # Delete old certificate if replacing
-                if value and instance.certificate:
-                    instance.certificate.delete(save=False)
-                # Allow deleting certificate
-                if value is None and instance.certificate:
-                    instance.certificate.delete(save=True)
-                else:
-                    setattr(instance, attr, value)
+                # Replacing or deleting: the old file is deleted after commit
+                if instance.certificate:
+                    FileCleanupService.schedule(instance.certificate.name)
+                setattr(instance, attr, value)
             else:
                 setattr(instance, attr, value)
         instance.save()
@@ -62,14 +64,10 @@ class MentorSerializer(serializers.ModelSerializer):
             user_data = profile_data.pop("user", None)
             for attr, value in profile_data.items():
                 if attr == "photo":
-                    # Delete old photo if replacing
-                    if value and instance.profile.photo:
-                        instance.profile.photo.delete(save=False)
-                    # Allow deleting photo
-                    if value is None and instance.profile.photo:
-                        instance.profile.photo.delete(save=True)
-                    else:
-                        setattr(instance.profile, attr, value)
+                    # Replacing or deleting: the old file is deleted after commit
+                    if instance.profile.photo:
+                        FileCleanupService.schedule(instance.profile.photo.name)
+                    setattr(instance.profile, attr, value)
                 else:
                     setattr(instance.profile, attr, value)
             instance.profile.save()
@@ -86,27 +84,20 @@ class MentorSerializer(serializers.ModelSerializer):
 
         return instance
     
+    @transaction.atomic
     def delete(self, instance):
         mentor = instance
         mentorUser = mentor.profile.user
-        
-        certificate = instance.certificate
-        photo = instance.profile.photo
-        print(certificate)
-        print(photo)
-        if certificate:
-            certificate.delete(save=False)
-
-        if photo:
-            photo.delete(save=False)
 
+        FileCleanupService.schedule(instance.certificate.name, instance.profile.photo.name)
         mentorUser.delete()
 
     def to_representation(self, instance):
         """
         Returns a flat representation of the mentor,
         expanding the data from the related profile and user.
-        Includes absolute URLs for the photo and certificate if they exist.
+        Includes absolute URLs (signed for the requesting user) for the
+        photo and certificate if they exist.
         """
 
         request = self.context.get("request")
@@ -115,22 +106,12 @@ class MentorSerializer(serializers.ModelSerializer):
         user = getattr(profile, "user", None) if profile else None
 
         photo_url = None
-        if profile and profile.photo and hasattr(profile.photo, "url"):
-            if request:
-                photo_url = request.build_absolute_uri(profile.photo.url)
-            else:
-                photo_url = profile.photo.url
+        if profile and profile.photo:
+            photo_url = MediaAccessService.url(profile.photo.name, request)
 
         certificate_url = None
-        if (
-            hasattr(instance, "certificate")
-            and instance.certificate
-            and hasattr(instance.certificate, "url")
-        ):
-            if request:
-                certificate_url = request.build_absolute_uri(instance.certificate.url)
-            else:
-                certificate_url = instance.certificate.url
+        if hasattr(instance, "certificate") and instance.certificate:
+            certificate_url = MediaAccessService.url(instance.certificate.name, request)
 
         return {
             "id": instance.id,
@@ -140,6 +121,7 @@ class MentorSerializer(serializers.ModelSerializer):
             "username": getattr(user, "username", None),
             "phone": getattr(profile, "phone", None),
             "photo": photo_url,
+            "photo_variants": ProfilePhotoService.variant_urls(profile, request) if profile else None,
             "charge": getattr(instance, "charge", None),
             "knowledge_level": getattr(instance, "knowledge_level", None),
             "certificate": certificate_url,
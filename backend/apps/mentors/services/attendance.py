@@ -0,0 +1,198 @@
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+from apps.core.services.versions import VersionService
+from apps.mentors.models import MentorAttendance
+from apps.projects.models import Event, Group
+from apps.projects.services.events import EventService
+
+
+class AttendanceService:
+
+    HOURS_GROUPINGS = ("day", "week", "month", "project")
+
+    @staticmethod
+    def event_bounds(event_date, start_time, end_time):
+        """
+        Returns the aware start and end datetimes of an event from its date
+        and the schedule of its group.
+        """
+        tz = timezone.get_current_timezone()
+        return (
+            timezone.make_aware(datetime.combine(event_date, start_time), tz),
+            timezone.make_aware(datetime.combine(event_date, end_time), tz),
+        )
+
+    @staticmethod
+    def materialize_occurrences(today, days=None) -> int:
+        """
+        Virtual recurrence mode stores no Event per weekly occurrence, so
+        there is nothing to attach attendance to. This stores as Event rows
+        the computed occurrences of the last `days` days
+        (ATTENDANCE_BACKFILL_DAYS) up to `today` of the groups with mentor
+        and schedule; stored exceptions (cancellations, overrides) win as in
+        the calendar. Returns the number of events created.
+        """
+        days = getattr(settings, "ATTENDANCE_BACKFILL_DAYS", 7) if days is None else days
+        date_from = today - timedelta(days=days)
+
+        with transaction.atomic():
+            # Serializa con regenerate_events y con otra ejecución de la tarea
+            groups = list(
+                Group.objects.select_for_update(of=("self",))
+                .filter(mentor__isnull=False, schedule__isnull=False, start_date__lte=today, end_date__gte=date_from)
+                .select_related("schedule")
+            )
+            if not groups:
+                return 0
+            stored = Event.objects.filter(
+                group__in=groups, event_date__gte=date_from, event_date__lte=today,
+            ).select_related("group__schedule")
+            missing = [
+                event for event in EventService.expand_occurrences(groups, stored, date_from, today)
+                if event.pk is None
+            ]
+            Event.objects.bulk_create(missing)
+            if missing:
+                VersionService.mark_changed("events")
+        return len(missing)
+
+    @staticmethod
+    def generate_pending(now=None, batch_size: int = 1000) -> dict:
+        """
+        Creates the MentorAttendance of every event that already started and
+        has no attendance yet, in batches of `batch_size` events.
+
+        Each batch is one joined SELECT, one bulk INSERT and one UPDATE that
+        marks the events as processed. Cancelled events are marked without
+        attendance. Concurrent workers skip the rows locked by each other
+        (SELECT ... FOR UPDATE SKIP LOCKED) and the unique constraint on
+        MentorAttendance.event discards any duplicate that slips through.
+
+        In virtual recurrence mode the recent occurrences are stored first
+        (materialize_occurrences).
+
+        Returns the number of attendances created (counted in the table, so
+        duplicates discarded by the constraint are not included), events
+        processed and occurrences materialized.
+        """
+        now = now or timezone.now()
+        today = timezone.localdate(now)
+        created = processed = 0
+        last_id = 0
+        materialized = 0 if EventService.materialized() else AttendanceService.materialize_occurrences(today)
+
+        while True:
+            with transaction.atomic():
+                rows = list(
+                    Event.objects.select_for_update(skip_locked=True, of=("self",))
+                    .filter(
+                        id__gt=last_id,
+                        attendance_generated=False,
+                        event_date__lte=today,
+                        group__mentor__isnull=False,
+                        group__schedule__isnull=False,
+                    )
+                    .order_by("id")
+                    .values(
+                        "id",
+                        "event_date",
+                        "is_cancelled",
+                        "group__mentor_id",
+                        "group__schedule__start_time",
+                        "group__schedule__end_time",
+                    )[:batch_size]
+                )
+                if not rows:
+                    break
+                last_id = rows[-1]["id"]
+
+                attendances = []
+                finished_ids = []
+                for row in rows:
+                    start, end = AttendanceService.event_bounds(
+                        row["event_date"], row["group__schedule__start_time"], row["group__schedule__end_time"]
+                    )
+                    if start > now:
+                        # Evento de hoy que todavía no empieza
+                        continue
+                    finished_ids.append(row["id"])
+                    if row["is_cancelled"]:
+                        continue
+                    attendances.append(
+                        MentorAttendance(
+                            mentor_id=row["group__mentor_id"],
+                            event_id=row["id"],
+                            date=row["event_date"],
+                            start_datetime=start,
+                            end_datetime=end,
+                            hours=int((end - start).total_seconds() // 3600),
+                        )
+                    )
+
+                # ignore_conflicts descarta en silencio las que ya existían: contar las filas reales
+                batch_attendances = MentorAttendance.objects.filter(
+                    event_id__in=[attendance.event_id for attendance in attendances]
+                )
+                existing = batch_attendances.count() if attendances else 0
+                MentorAttendance.objects.bulk_create(attendances, ignore_conflicts=True)
+                Event.objects.filter(id__in=finished_ids).update(attendance_generated=True)
+                if attendances:
+                    created += batch_attendances.count() - existing
+
+            processed += len(finished_ids)
+            if len(rows) < batch_size:
+                break
+
+        return {"created": created, "processed": processed, "materialized": materialized}
+
+    @staticmethod
+    def hours_summary(mentor_id, date_from=None, date_to=None, groupings=HOURS_GROUPINGS) -> dict:
+        """
+        Returns the hours of a mentor totalled by the database, overall and
+        per day, week (starting on Monday), month and project, optionally
+        limited to [date_from, date_to].
+
+        Every grouping is a single GROUP BY over the (mentor, date) index.
+        Attendances registered by hand have no event and are reported with
+        project None.
+        """
+        attendances = MentorAttendance.objects.filter(mentor_id=mentor_id)
+        if date_from:
+            attendances = attendances.filter(date__gte=date_from)
+        if date_to:
+            attendances = attendances.filter(date__lte=date_to)
+        # Sin el ordering por defecto para que no entre en el GROUP BY
+        attendances = attendances.order_by()
+
+        summary = {
+            "total_hours": attendances.aggregate(total=Sum("hours"))["total"] or 0,
+        }
+
+        if "day" in groupings:
+            summary["by_day"] = list(
+                attendances.values("date").annotate(hours=Sum("hours")).order_by("date")
+            )
+        if "week" in groupings:
+            summary["by_week"] = [
+                {"week_start": row["week_start"], "hours": row["hours"]}
+                for row in attendances.annotate(week_start=TruncWeek("date"))
+                .values("week_start").annotate(hours=Sum("hours")).order_by("week_start")
+            ]
+        if "month" in groupings:
+            summary["by_month"] = [
+                {"month": row["month"].strftime("%Y-%m"), "hours": row["hours"]}
+                for row in attendances.annotate(month=TruncMonth("date"))
+                .values("month").annotate(hours=Sum("hours")).order_by("month")
+            ]
+        if "project" in groupings:
+            summary["by_project"] = list(
+                attendances.values(
+                    project_id=F("event__group__project_id"),
+                    project_name=F("event__group__project__name"),
+                ).annotate(hours=Sum("hours")).order_by("project_id")
+            )
+        return summary
@@ -0,0 +1,283 @@
+import hashlib
+import mimetypes
+import os
+import re
+import shutil
+import tempfile
+from collections import OrderedDict
+from datetime import timedelta
+from threading import Lock
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from apps.core.services.file_cleanup import FileCleanupService
+from apps.core.services.versions import VersionService
+from apps.mentors.models import CertificateUpload, Mentor, generateCertificatePath
+
+
+class UploadOffsetMismatch(Exception):
+    """The chunk does not start where the upload currently ends."""
+
+    def __init__(self, offset):
+        super().__init__(f"El upload continúa en el byte {offset}")
+        self.offset = offset
+
+
+class CertificateUploadService:
+    """
+    Resumable chunked uploads of Mentor.certificate.
+
+    Each chunk is streamed from the request body straight into a temporary
+    file under MEDIA_ROOT (same filesystem as the storage), so no request
+    holds more than one read block in memory and a large PDF never pins a
+    worker for the whole transfer. The SHA-256 of the file is updated with
+    every chunk; the hasher is kept per process and rebuilt from the
+    temporary file only when a chunk lands in another process.
+
+    Completing the upload checks size and checksum, then moves a link to
+    the file into the storage and replaces the certificate in one
+    transaction; the temporary file is removed once it commits.
+    """
+
+    READ_BLOCK = 64 * 1024
+
+    # Primeros bytes esperados por extensión
+    SIGNATURES = {
+        ".pdf": (b"%PDF-",),
+        ".png": (b"\x89PNG\r\n\x1a\n",),
+        ".jpg": (b"\xff\xd8\xff",),
+        ".jpeg": (b"\xff\xd8\xff",),
+    }
+
+    _hashers = OrderedDict()
+    _hashers_lock = Lock()
+    MAX_CACHED_HASHERS = 64
+
+    @staticmethod
+    def _new_temp_path():
+        if hasattr(default_storage, "temp_path"):
+            return default_storage.temp_path()
+        temp_dir = os.path.join(settings.MEDIA_ROOT, ".incoming")
+        os.makedirs(temp_dir, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=temp_dir)
+        os.close(fd)
+        return path
+
+    @staticmethod
+    def validate_start(filename, size, checksum=None, content_type=None) -> dict:
+        """
+        Returns the field errors of a new upload (empty if valid). The
+        extension must be in ALLOWED_FILE_EXTENSIONS and agree with the
+        declared content type; the content itself is checked with the
+        first chunk.
+        """
+        errors = {}
+        ext = os.path.splitext(filename or "")[1].lower()
+        allowed = getattr(settings, "ALLOWED_FILE_EXTENSIONS", [".pdf"])
+        if not filename:
+            errors["filename"] = "Campo requerido"
+        elif ext not in allowed:
+            errors["filename"] = f"Extensiones permitidas: {', '.join(allowed)}"
+        elif mimetypes.guess_type(filename)[0] is None:
+            errors["filename"] = "Tipo de archivo desconocido"
+        elif content_type and content_type != mimetypes.guess_type(filename)[0]:
+            errors["content_type"] = f"Se esperaba {mimetypes.guess_type(filename)[0]}"
+
+        max_size = getattr(settings, "CERTIFICATE_UPLOAD_MAX_SIZE", 50 * 1024 * 1024)
+        if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+            errors["size"] = "Debe ser un entero positivo (bytes)"
+        elif size > max_size:
+            errors["size"] = f"Máximo {max_size} bytes"
+
+        if checksum and not re.fullmatch(r"[0-9a-f]{64}", checksum):
+            errors["checksum"] = "SHA-256 en hexadecimal (64 caracteres)"
+        return errors
+
+    @staticmethod
+    def start(mentor, user, filename, size, checksum="") -> CertificateUpload:
+        return CertificateUpload.objects.create(
+            mentor=mentor,
+            # request.user puede ser un RoleTokenUser (autenticación sin consultas)
+            created_by_id=user.pk if user and user.is_authenticated else None,
+            filename=os.path.basename(filename),
+            size=size,
+            checksum=(checksum or "").lower(),
+            temp_path=CertificateUploadService._new_temp_path(),
+        )
+
+    @staticmethod
+    def _hasher(upload, offset):
+        """
+        SHA-256 of the first `offset` bytes of the upload: the cached one
+        if this process received the previous chunk, else rebuilt from disk.
+        """
+        with CertificateUploadService._hashers_lock:
+            cached = CertificateUploadService._hashers.pop(upload.pk, None)
+        if cached is not None and cached[0] == offset:
+            return cached[1]
+
+        hasher = hashlib.sha256()
+        remaining = offset
+        with open(upload.temp_path, "rb") as partial:
+            while remaining:
+                block = partial.read(min(CertificateUploadService.READ_BLOCK, remaining))
+                if not block:
+                    break
+                hasher.update(block)
+                remaining -= len(block)
+        return hasher
+
+    @staticmethod
+    def _keep_hasher(upload_id, offset, hasher):
+        with CertificateUploadService._hashers_lock:
+            CertificateUploadService._hashers[upload_id] = (offset, hasher)
+            while len(CertificateUploadService._hashers) > CertificateUploadService.MAX_CACHED_HASHERS:
+                CertificateUploadService._hashers.popitem(last=False)
+
+    @staticmethod
+    def append(upload_id, offset, stream, length, chunk_checksum=None) -> CertificateUpload:
+        """
+        Writes `length` bytes of `stream` at `offset` of the upload.
+        Raises UploadOffsetMismatch if the upload is not at `offset` and
+        ValueError if the chunk is invalid; the upload is left as it was.
+        """
+        max_chunk = getattr(settings, "CERTIFICATE_UPLOAD_CHUNK_SIZE", 5 * 1024 * 1024)
+        if length <= 0:
+            raise ValueError("El chunk está vacío")
+        if length > max_chunk:
+            raise ValueError(f"Máximo {max_chunk} bytes por chunk")
+
+        with transaction.atomic():
+            # Un chunk a la vez por upload
+            upload = CertificateUpload.objects.select_for_update().get(pk=upload_id)
+            if offset != upload.offset:
+                raise UploadOffsetMismatch(upload.offset)
+            if offset + length > upload.size:
+                raise ValueError(f"El chunk excede el tamaño declarado ({upload.size} bytes)")
+
+            hasher = CertificateUploadService._hasher(upload, offset)
+            chunk_hasher = hashlib.sha256()
+            written = 0
+            with open(upload.temp_path, "r+b") as partial:
+                partial.seek(offset)
+                try:
+                    while written < length:
+                        block = stream.read(min(CertificateUploadService.READ_BLOCK, length - written))
+                        if not block:
+                            raise ValueError(f"Se recibieron {written} de {length} bytes")
+                        if offset == 0 and written == 0:
+                            CertificateUploadService._check_signature(upload.filename, block)
+                        partial.write(block)
+                        hasher.update(block)
+                        chunk_hasher.update(block)
+                        written += len(block)
+                    if chunk_checksum and chunk_hasher.hexdigest() != chunk_checksum.lower():
+                        raise ValueError("El checksum del chunk no coincide")
+                except BaseException:
+                    # Descartar lo escrito: el cliente reenvía el chunk desde offset
+                    partial.truncate(offset)
+                    raise
+                partial.truncate(offset + length)
+
+            upload.offset = offset + length
+            upload.save(update_fields=["offset", "updated_at"])
+        CertificateUploadService._keep_hasher(upload.pk, upload.offset, hasher)
+        return upload
+
+    @staticmethod
+    def _check_signature(filename, first_block):
+        ext = os.path.splitext(filename)[1].lower()
+        signatures = CertificateUploadService.SIGNATURES.get(ext)
+        if signatures and not first_block.startswith(signatures):
+            raise ValueError(f"El contenido no corresponde a un archivo {ext}")
+
+    @staticmethod
+    def _stage(upload):
+        """
+        Links (or copies) the temporary file of the upload to a new path for
+        the storage to consume, so the upload keeps its own file until the
+        transaction commits.
+        """
+        staged = CertificateUploadService._new_temp_path()
+        try:
+            os.unlink(staged)
+            os.link(upload.temp_path, staged)
+        except OSError:
+            shutil.copyfile(upload.temp_path, staged)
+        return staged
+
+    @staticmethod
+    def _reset(upload) -> None:
+        with CertificateUploadService._hashers_lock:
+            CertificateUploadService._hashers.pop(upload.pk, None)
+        with open(upload.temp_path, "r+b") as partial:
+            partial.truncate(0)
+        upload.offset = 0
+        upload.save(update_fields=["offset", "updated_at"])
+
+    @staticmethod
+    def _discard_temp(upload) -> None:
+        with CertificateUploadService._hashers_lock:
+            CertificateUploadService._hashers.pop(upload.pk, None)
+        if os.path.exists(upload.temp_path):
+            os.unlink(upload.temp_path)
+
+    @staticmethod
+    def complete(upload_id) -> Mentor:
+        """
+        Stores the finished upload as the mentor certificate, releasing the
+        previous one. Raises ValueError if the upload is incomplete, or if
+        its checksum does not match, in which case the upload is reset to
+        offset 0 to be sent again. The temporary file is removed only after
+        the transaction commits, so a rolled back completion can be retried.
+        """
+        with transaction.atomic():
+            upload = CertificateUpload.objects.select_for_update().select_related("mentor").get(pk=upload_id)
+            if upload.offset != upload.size:
+                raise ValueError(f"Faltan {upload.size - upload.offset} bytes")
+            digest = CertificateUploadService._hasher(upload, upload.offset).hexdigest()
+            mismatch = bool(upload.checksum) and digest != upload.checksum
+            if mismatch:
+                # Los bytes recibidos no sirven: se vuelve a enviar el archivo desde 0
+                CertificateUploadService._reset(upload)
+            else:
+                mentor = upload.mentor
+                name = generateCertificatePath(mentor, upload.filename)
+                if hasattr(default_storage, "store_local"):
+                    name = default_storage.store_local(
+                        name, CertificateUploadService._stage(upload), digest, upload.size,
+                    )
+                else:
+                    with open(upload.temp_path, "rb") as content:
+                        name = default_storage.save(name, File(content))
+
+                previous = mentor.certificate.name if mentor.certificate else None
+                mentor.certificate.name = name
+                Mentor.objects.filter(pk=mentor.pk).update(certificate=name)
+                upload.delete()
+                FileCleanupService.schedule(previous)
+                # update() no emite señales
+                VersionService.mark_changed("mentors")
+                transaction.on_commit(lambda: CertificateUploadService._discard_temp(upload))
+        if mismatch:
+            raise ValueError("El checksum del archivo no coincide; el upload se reinició desde el byte 0")
+        return mentor
+
+    @staticmethod
+    def abort(upload) -> None:
+        CertificateUploadService._discard_temp(upload)
+        upload.delete()
+
+    @staticmethod
+    def purge_expired(now=None) -> int:
+        """
+        Aborts the uploads without chunks for CERTIFICATE_UPLOAD_EXPIRY_HOURS.
+        """
+        now = now or timezone.now()
+        hours = getattr(settings, "CERTIFICATE_UPLOAD_EXPIRY_HOURS", 24)
+        expired = list(CertificateUpload.objects.filter(updated_at__lt=now - timedelta(hours=hours)))
+        for upload in expired:
+            CertificateUploadService.abort(upload)
+        return len(expired)
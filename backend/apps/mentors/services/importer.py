@@ -0,0 +1,192 @@
+import csv
+import io
+import json
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from apps.core.services.credentials import CredentialService
+from apps.core.services.dashboard import DashboardService
+from apps.core.services.versions import VersionService
+from apps.mentors.models import Mentor
+from apps.users.models import Profile
+
+
+class MentorImportService:
+    """
+    Bulk onboarding of mentors from CSV or JSON rows.
+
+    Rows are validated together (emails and usernames are checked against
+    the database with one query) and, if all are valid, users, profiles and
+    mentors are inserted with bulk_create in a single transaction. Passwords
+    are generated and hashed in a process pool beforehand, so the
+    transaction only holds the inserts.
+    """
+
+    FIELDS = ("first_name", "last_name", "email", "phone", "charge", "knowledge_level", "username")
+    REQUIRED = ("first_name", "last_name", "email", "charge")
+    MAX_LENGTHS = {"first_name": 150, "last_name": 150, "email": 254, "phone": 20, "charge": 20, "username": 150}
+
+    @staticmethod
+    def parse(content, fmt: str) -> list:
+        """
+        Returns the rows of a CSV (header with the FIELDS columns) or JSON
+        (list of objects, or {"mentors": [...]}) document.
+        Raises ValueError if the document cannot be read.
+        """
+        if isinstance(content, bytes):
+            content = content.decode("utf-8-sig")
+        if fmt == "csv":
+            reader = csv.DictReader(io.StringIO(content))
+            if not reader.fieldnames:
+                raise ValueError("El CSV no tiene encabezado")
+            return [{key.strip(): value for key, value in row.items() if key} for row in reader]
+        if fmt == "json":
+            try:
+                data = json.loads(content)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"JSON inválido: {e}")
+            rows = data.get("mentors") if isinstance(data, dict) else data
+            if not isinstance(rows, list):
+                raise ValueError('Se espera una lista de mentores o un objeto con "mentors"')
+            return rows
+        raise ValueError(f"Formato no soportado: {fmt}. Opciones: csv, json")
+
+    @staticmethod
+    def _clean_row(row):
+        if not isinstance(row, dict):
+            return {}, {"non_field_errors": "Cada mentor debe ser un objeto"}
+
+        cleaned = {field: str(row.get(field) or "").strip() for field in MentorImportService.FIELDS}
+        cleaned["email"] = cleaned["email"].lower()
+        cleaned["knowledge_level"] = cleaned["knowledge_level"].lower() or "basico"
+
+        errors = {}
+        for field in MentorImportService.REQUIRED:
+            if not cleaned[field]:
+                errors[field] = "Campo requerido"
+        for field, max_length in MentorImportService.MAX_LENGTHS.items():
+            if len(cleaned[field]) > max_length:
+                errors[field] = f"Máximo {max_length} caracteres"
+        if cleaned["email"] and "email" not in errors:
+            try:
+                validate_email(cleaned["email"])
+            except ValidationError:
+                errors["email"] = "Email inválido"
+        if cleaned["knowledge_level"] not in dict(Mentor.CHOICES_KNOWLEDGE):
+            errors["knowledge_level"] = f"Opciones: {', '.join(dict(Mentor.CHOICES_KNOWLEDGE))}"
+        if cleaned["username"] and "username" not in errors:
+            try:
+                UnicodeUsernameValidator()(cleaned["username"])
+            except ValidationError:
+                errors["username"] = "Solo letras, números y @/./+/-/_"
+        return cleaned, errors
+
+    @staticmethod
+    def validate(rows) -> tuple:
+        """
+        Returns (cleaned_rows, errors) where errors maps the row index to its
+        field errors. Emails and explicit usernames must be unique in the
+        batch and in the database.
+        """
+        max_rows = getattr(settings, "MENTOR_IMPORT_MAX_ROWS", 1000)
+        if len(rows) > max_rows:
+            raise ValueError(f"Máximo {max_rows} mentores por importación, se recibieron {len(rows)}")
+
+        cleaned_rows = []
+        errors = {}
+        for index, row in enumerate(rows):
+            cleaned, row_errors = MentorImportService._clean_row(row)
+            if row_errors:
+                errors[index] = row_errors
+            cleaned_rows.append(cleaned)
+
+        # Duplicados dentro del mismo archivo
+        seen = {"email": {}, "username": {}}
+        for index, row in enumerate(cleaned_rows):
+            for field, values in seen.items():
+                value = row.get(field)
+                if not value:
+                    continue
+                if value in values:
+                    errors.setdefault(index, {})[field] = f"Repetido en la fila {values[value]}"
+                else:
+                    values[value] = index
+
+        # Emails y usernames ya registrados, con una sola consulta
+        emails, usernames = set(seen["email"]), set(seen["username"])
+        if emails or usernames:
+            existing = User.objects.annotate(email_lower=Lower("email")).filter(
+                Q(email_lower__in=emails) | Q(username__in=usernames)
+            ).values_list("email_lower", "username")
+            taken_emails, taken_usernames = set(), set()
+            for email, username in existing:
+                taken_emails.add(email)
+                taken_usernames.add(username)
+            for index, row in enumerate(cleaned_rows):
+                if row.get("email") in taken_emails:
+                    errors.setdefault(index, {})["email"] = "El email ya está registrado."
+                if row.get("username") in taken_usernames:
+                    errors.setdefault(index, {})["username"] = "El username ya está en uso."
+
+        return cleaned_rows, errors
+
+    @staticmethod
+    def create(cleaned_rows, workers: int = None) -> list:
+        """
+        Creates the users, profiles and mentors of already validated rows.
+        Returns one dict per row with the mentor id and its credentials.
+
+        Generated usernames are allocated again if a concurrent insert took
+        one of them. Raises IntegrityError if an explicit username was
+        registered in the meantime; nothing is created in that case.
+        """
+        passwords = [CredentialService.generatePassword() for _ in cleaned_rows]
+        hashes = CredentialService.hashPasswords(passwords, workers or getattr(settings, "MENTOR_IMPORT_HASH_WORKERS", 0))
+
+        def insert_users(generated):
+            generated = iter(generated)
+            return User.objects.bulk_create([
+                User(
+                    username=row["username"] or next(generated),
+                    password=password_hash,
+                    first_name=row["first_name"],
+                    last_name=row["last_name"],
+                    email=row["email"],
+                )
+                for row, password_hash in zip(cleaned_rows, hashes)
+            ])
+
+        with transaction.atomic():
+            # Los usernames se asignan dentro de la transacción que los inserta
+            users = CredentialService.allocateUsernames(
+                [(row["first_name"], row["last_name"]) for row in cleaned_rows if not row["username"]],
+                insert_users,
+                reserved=[row["username"] for row in cleaned_rows if row["username"]],
+            )
+            profiles = Profile.objects.bulk_create([
+                Profile(user=user, phone=row["phone"] or None, role="Mentor")
+                for row, user in zip(cleaned_rows, users)
+            ])
+            mentors = Mentor.objects.bulk_create([
+                Mentor(profile=profile, charge=row["charge"], knowledge_level=row["knowledge_level"])
+                for row, profile in zip(cleaned_rows, profiles)
+            ])
+            # bulk_create no emite señales: invalidar los ETag y ajustar el dashboard manualmente
+            VersionService.mark_changed("mentors", "profiles")
+            DashboardService.apply_delta(
+                total_users=len(users),
+                active_users=len(users),
+                new_users_this_week=len(users),
+                total_mentors=len(mentors),
+            )
+            DashboardService.mark_dirty()
+
+        return [
+            {"id": mentor.id, "username": user.username, "email": user.email, "password": password}
+            for mentor, user, password in zip(mentors, users, passwords)
+        ]
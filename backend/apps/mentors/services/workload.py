@@ -0,0 +1,235 @@
+import threading
+from bisect import insort
+from collections import namedtuple
+from datetime import date
+from django.utils.dateparse import parse_time
+from apps.core.services.versions import VersionService
+
+# Intervalo semanal ocupado por un grupo
+BusySlot = namedtuple("BusySlot", ["start", "end", "start_date", "end_date", "group_id"])
+# Intervalo semanal declarado como disponible (MentorAvailability)
+FreeSlot = namedtuple("FreeSlot", ["start", "end", "availability_id"])
+
+
+def _as_time(value):
+    return parse_time(value) if isinstance(value, str) else value
+
+
+class MentorWorkloadIndex:
+    """
+    In-memory interval index of the weekly workload of every mentor.
+
+    For each mentor and weekday it keeps the busy intervals (groups with that
+    mentor and schedule) and the declared availability (MentorAvailability),
+    sorted by start time, so availability and conflict queries only look at
+    the handful of intervals of one mentor and day instead of scanning groups.
+
+    The index is built lazily with three queries. Save/delete signals apply
+    each committed change in place and adopt the version that commit gave
+    to the collection; writes from other processes (or bulk writes without
+    signals) are detected through the CollectionVersion counters, checked
+    with one primary-key query before answering, and trigger a rebuild.
+    """
+
+    COLLECTIONS = ("mentors", "groups", "schedules", "availability")
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._versions = None
+        self._mentors = set()
+        self._busy = {}            # mentor_id -> day -> [BusySlot]
+        self._groups = {}          # group_id -> (mentor_id, day, BusySlot)
+        self._free = {}            # mentor_id -> day -> [FreeSlot]
+        self._availabilities = {}  # availability_id -> (mentor_id, day, FreeSlot)
+
+    # ------------------------------------------------------------------
+    # Construcción y mantenimiento
+    # ------------------------------------------------------------------
+
+    def rebuild(self):
+        from apps.mentors.models import Mentor, MentorAvailability
+        from apps.projects.models import Group
+
+        with self._lock:
+            versions = VersionService.get(*self.COLLECTIONS)
+            self._mentors = set(Mentor.objects.values_list("id", flat=True))
+            self._busy, self._groups = {}, {}
+            self._free, self._availabilities = {}, {}
+
+            groups = Group.objects.filter(mentor__isnull=False, schedule__isnull=False).values_list(
+                "id", "mentor_id", "schedule__day", "schedule__start_time", "schedule__end_time",
+                "start_date", "end_date",
+            )
+            for group_id, mentor_id, day, start, end, start_date, end_date in groups:
+                self._add_group(group_id, mentor_id, day, start, end, start_date, end_date)
+
+            availabilities = MentorAvailability.objects.values_list(
+                "id", "mentor_id", "schedule__day", "schedule__start_time", "schedule__end_time",
+            )
+            for availability_id, mentor_id, day, start, end in availabilities:
+                self._add_availability(availability_id, mentor_id, day, start, end)
+
+            self._versions = versions
+
+    def ensure_current(self):
+        """
+        Rebuilds the index if another process changed the underlying data.
+        """
+        with self._lock:
+            if self._versions is None or VersionService.get(*self.COLLECTIONS) != self._versions:
+                self.rebuild()
+
+    def invalidate(self):
+        with self._lock:
+            self._versions = None
+
+    def _applied(self, collection):
+        # Versión que dejó el commit de este cambio (varias escrituras en una
+        # transacción la incrementan una sola vez). Si el índice estaba en la
+        # anterior queda al día; si no, otro proceso también escribió y
+        # ensure_current reconstruye.
+        VersionService.flush()
+        version = VersionService.flushed(collection)
+        if self._versions is None or version is None:
+            return
+        if self._versions[collection] in (version - 1, version):
+            self._versions = {**self._versions, collection: version}
+
+    def _add_group(self, group_id, mentor_id, day, start, end, start_date, end_date):
+        slot = BusySlot(_as_time(start), _as_time(end), start_date, end_date, group_id)
+        insort(self._busy.setdefault(mentor_id, {}).setdefault(day, []), slot)
+        self._groups[group_id] = (mentor_id, day, slot)
+
+    def _remove_group(self, group_id):
+        entry = self._groups.pop(group_id, None)
+        if entry:
+            mentor_id, day, slot = entry
+            self._busy[mentor_id][day].remove(slot)
+
+    def _add_availability(self, availability_id, mentor_id, day, start, end):
+        slot = FreeSlot(_as_time(start), _as_time(end), availability_id)
+        insort(self._free.setdefault(mentor_id, {}).setdefault(day, []), slot)
+        self._availabilities[availability_id] = (mentor_id, day, slot)
+
+    def _remove_availability(self, availability_id):
+        entry = self._availabilities.pop(availability_id, None)
+        if entry:
+            mentor_id, day, slot = entry
+            self._free[mentor_id][day].remove(slot)
+
+    def group_saved(self, group):
+        with self._lock:
+            self._remove_group(group.pk)
+            if group.mentor_id and group.schedule_id:
+                schedule = group.schedule
+                self._add_group(
+                    group.pk, group.mentor_id, int(schedule.day), schedule.start_time, schedule.end_time,
+                    group.start_date, group.end_date,
+                )
+            self._applied("groups")
+
+    def group_deleted(self, group_id):
+        with self._lock:
+            self._remove_group(group_id)
+            self._applied("groups")
+
+    def availability_saved(self, availability):
+        with self._lock:
+            self._remove_availability(availability.pk)
+            schedule = availability.schedule
+            self._add_availability(
+                availability.pk, availability.mentor_id, int(schedule.day), schedule.start_time, schedule.end_time,
+            )
+            self._applied("availability")
+
+    def availability_deleted(self, availability_id):
+        with self._lock:
+            self._remove_availability(availability_id)
+            self._applied("availability")
+
+    def schedule_created(self):
+        # Un horario nuevo todavía no tiene grupos: solo avanza la versión
+        with self._lock:
+            self._applied("schedules")
+
+    def mentor_saved(self, mentor_id):
+        with self._lock:
+            self._mentors.add(mentor_id)
+            self._applied("mentors")
+
+    def mentor_deleted(self, mentor_id):
+        with self._lock:
+            # Sus disponibilidades se eliminan en cascada con sus propias señales
+            self._mentors.discard(mentor_id)
+            self._applied("mentors")
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def conflicts(self, mentor_id, day, start, end, start_date=None, end_date=None,
+                  exclude_group=None, ensure_current=True) -> list:
+        """
+        Returns the ids of the groups of `mentor_id` whose weekly interval on
+        `day` overlaps [start, end) and whose date range overlaps
+        [start_date, end_date] (open ends match everything).
+
+        Pass ensure_current=False when checking many intervals in a row after
+        a single ensure_current() call.
+        """
+        if ensure_current:
+            self.ensure_current()
+        with self._lock:
+            return self._conflicts(
+                mentor_id, int(day), _as_time(start), _as_time(end), start_date, end_date, exclude_group
+            )
+
+    def _conflicts(self, mentor_id, day, start, end, start_date, end_date, exclude_group=None):
+        start_date = start_date or date.min
+        end_date = end_date or date.max
+        conflicting = []
+        for slot in self._busy.get(mentor_id, {}).get(day, ()):
+            if slot.start >= end:
+                # Ordenados por inicio: ninguno de los siguientes se solapa
+                break
+            if slot.end > start and slot.group_id != exclude_group \
+                    and slot.start_date <= end_date and slot.end_date >= start_date:
+                conflicting.append(slot.group_id)
+        return conflicting
+
+    def _declared_available(self, mentor_id, day, start, end):
+        """
+        True if one availability slot covers [start, end], None if the mentor
+        has not declared any availability.
+        """
+        declared = self._free.get(mentor_id, {})
+        if not any(declared.values()):
+            return None
+        return any(slot.start <= start and slot.end >= end for slot in declared.get(day, ()))
+
+    def available(self, day, start, end, start_date=None, end_date=None) -> list:
+        """
+        Returns the mentors free on `day` between `start` and `end`, as
+        (mentor_id, declared) pairs sorted by id.
+
+        Mentors with declared availability must have a slot covering the
+        whole interval (declared=True); mentors without any declared
+        availability are only required to have no overlapping group
+        (declared=False).
+        """
+        day, start, end = int(day), _as_time(start), _as_time(end)
+
+        self.ensure_current()
+        with self._lock:
+            result = []
+            for mentor_id in sorted(self._mentors):
+                declared = self._declared_available(mentor_id, day, start, end)
+                if declared is False:
+                    continue
+                if self._conflicts(mentor_id, day, start, end, start_date, end_date):
+                    continue
+                result.append((mentor_id, bool(declared)))
+            return result
+
+
+workload_index = MentorWorkloadIndex()
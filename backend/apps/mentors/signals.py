@@ -0,0 +1,55 @@
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from apps.mentors.services.workload import workload_index
+
+
+def _group_saved(sender, instance, **kwargs):
+    transaction.on_commit(lambda: workload_index.group_saved(instance))
+
+
+def _group_deleted(sender, instance, **kwargs):
+    group_id = instance.pk
+    transaction.on_commit(lambda: workload_index.group_deleted(group_id))
+
+
+def _availability_saved(sender, instance, **kwargs):
+    transaction.on_commit(lambda: workload_index.availability_saved(instance))
+
+
+def _availability_deleted(sender, instance, **kwargs):
+    availability_id = instance.pk
+    transaction.on_commit(lambda: workload_index.availability_deleted(availability_id))
+
+
+def _mentor_saved(sender, instance, created, **kwargs):
+    if created:
+        mentor_id = instance.pk
+        transaction.on_commit(lambda: workload_index.mentor_saved(mentor_id))
+
+
+def _mentor_deleted(sender, instance, **kwargs):
+    mentor_id = instance.pk
+    transaction.on_commit(lambda: workload_index.mentor_deleted(mentor_id))
+
+
+def _schedule_saved(sender, created, **kwargs):
+    if created:
+        transaction.on_commit(workload_index.schedule_created)
+    else:
+        # Cambiar el horario afecta a todos los grupos que lo usan: reconstruir
+        transaction.on_commit(workload_index.invalidate)
+
+
+def register():
+    group = apps.get_model("projects.Group")
+    availability = apps.get_model("mentors.MentorAvailability")
+    mentor = apps.get_model("mentors.Mentor")
+    schedule = apps.get_model("core.Schedule")
+    post_save.connect(_group_saved, sender=group, dispatch_uid="workload-save-group")
+    post_delete.connect(_group_deleted, sender=group, dispatch_uid="workload-delete-group")
+    post_save.connect(_availability_saved, sender=availability, dispatch_uid="workload-save-availability")
+    post_delete.connect(_availability_deleted, sender=availability, dispatch_uid="workload-delete-availability")
+    post_save.connect(_mentor_saved, sender=mentor, dispatch_uid="workload-save-mentor")
+    post_delete.connect(_mentor_deleted, sender=mentor, dispatch_uid="workload-delete-mentor")
+    post_save.connect(_schedule_saved, sender=schedule, dispatch_uid="workload-save-schedule")
@@ -1,3 +1,417 @@
-from django.test import TestCase
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from datetime import date, datetime, time, timezone as dt_timezone
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from apps.core.models import Schedule
+from apps.core.services.versions import VersionService
+from apps.mentors.models import CertificateUpload, Mentor, MentorAttendance
+from apps.mentors.services.attendance import AttendanceService
+from apps.mentors.services.certificates import CertificateUploadService, UploadOffsetMismatch
+from apps.mentors.services.importer import MentorImportService
+from apps.mentors.services.workload import workload_index
+from apps.projects.models import Event, Group, Project
+from apps.users.authentication import RoleRefreshToken
+from apps.users.models import Profile
 
-# Create your tests here.
+
+def make_mentor(username):
+    user = User.objects.create_user(username=username, password="pw")
+    return Mentor.objects.create(profile=Profile.objects.create(user=user, role="Mentor"), charge="Mentor")
+
+
+class MentorWorkloadIndexTests(TestCase):
+    def setUp(self):
+        workload_index.invalidate()
+        self.addCleanup(workload_index.invalidate)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mentor = make_mentor("mentor-a")
+            self.other = make_mentor("mentor-b")
+            self.project = Project.objects.create(name="Robótica")
+            self.monday = Schedule.objects.create(day=0, start_time=time(8), end_time=time(10))
+            self.tuesday = Schedule.objects.create(day=1, start_time=time(8), end_time=time(10))
+
+    def make_group(self, schedule, mentor=None, start=date(2026, 2, 1), end=date(2026, 6, 30)):
+        return Group.objects.create(
+            project=self.project, mentor=mentor or self.mentor, schedule=schedule,
+            location="Sede", mode="presencial", start_date=start, end_date=end,
+        )
+
+    def test_overlapping_interval_conflicts(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            group = self.make_group(self.monday)
+
+        self.assertEqual(workload_index.conflicts(self.mentor.pk, 0, time(9), time(11)), [group.pk])
+        self.assertEqual(workload_index.conflicts(self.mentor.pk, 0, time(7), time(8, 30)), [group.pk])
+
+    def test_adjacent_or_other_day_or_mentor_does_not_conflict(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            group = self.make_group(self.monday)
+
+        self.assertEqual(workload_index.conflicts(self.mentor.pk, 0, time(10), time(12)), [])
+        self.assertEqual(workload_index.conflicts(self.mentor.pk, 1, time(8), time(10)), [])
+        self.assertEqual(workload_index.conflicts(self.other.pk, 0, time(8), time(10)), [])
+        self.assertEqual(
+            workload_index.conflicts(self.mentor.pk, 0, time(8), time(10), exclude_group=group.pk), []
+        )
+
+    def test_date_ranges_must_overlap(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            group = self.make_group(self.monday, start=date(2026, 2, 1), end=date(2026, 3, 31))
+
+        self.assertEqual(
+            workload_index.conflicts(self.mentor.pk, 0, time(8), time(10), date(2026, 4, 1), date(2026, 6, 30)), []
+        )
+        self.assertEqual(
+            workload_index.conflicts(self.mentor.pk, 0, time(8), time(10), date(2026, 3, 31), None), [group.pk]
+        )
+
+    def test_deleted_group_stops_conflicting(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            group = self.make_group(self.monday)
+        workload_index.ensure_current()
+        with self.captureOnCommitCallbacks(execute=True):
+            group.delete()
+
+        self.assertEqual(workload_index.conflicts(self.mentor.pk, 0, time(8), time(10)), [])
+
+    def test_write_from_another_process_after_local_transaction_rebuilds(self):
+        workload_index.ensure_current()
+        # Dos escrituras locales en una transacción: la versión sube una sola vez
+        with self.captureOnCommitCallbacks(execute=True):
+            monday_group = self.make_group(self.monday)
+            self.make_group(self.tuesday)
+
+        # Otro proceso reasigna el grupo (sin señales en este proceso)
+        Group.objects.filter(pk=monday_group.pk).update(mentor=self.other)
+        VersionService.bump("groups")
+
+        self.assertEqual(workload_index.conflicts(self.mentor.pk, 0, time(8), time(10)), [])
+        self.assertEqual(workload_index.conflicts(self.other.pk, 0, time(8), time(10)), [monday_group.pk])
+
+
+class AttendanceServiceTests(TestCase):
+    # Miércoles 11/03/2026 al mediodía: la ocurrencia del lunes 09/03 ya terminó
+    NOW = datetime(2026, 3, 11, 12, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        self.mentor = make_mentor("mentor-attendance")
+        self.group = Group.objects.create(
+            project=Project.objects.create(name="Arte"), mentor=self.mentor,
+            schedule=Schedule.objects.create(day=0, start_time=time(8), end_time=time(10)),
+            location="Sede", mode="presencial", start_date=date(2026, 2, 1), end_date=date(2026, 6, 30),
+        )
+
+    @override_settings(EVENTS_RECURRENCE_MODE="virtual", ATTENDANCE_BACKFILL_DAYS=7, TIME_ZONE="UTC")
+    def test_virtual_mode_generates_attendance_for_recent_occurrences(self):
+        result = AttendanceService.generate_pending(now=self.NOW)
+
+        self.assertEqual(result["materialized"], 1)
+        self.assertEqual(result["created"], 1)
+        attendance = MentorAttendance.objects.get()
+        self.assertEqual((attendance.mentor_id, attendance.date, attendance.hours), (self.mentor.pk, date(2026, 3, 9), 2))
+
+        # Una segunda ejecución no duplica eventos ni asistencias
+        result = AttendanceService.generate_pending(now=self.NOW)
+        self.assertEqual((result["materialized"], result["created"]), (0, 0))
+        self.assertEqual(Event.objects.filter(group=self.group).count(), 1)
+
+    @override_settings(EVENTS_RECURRENCE_MODE="virtual", ATTENDANCE_BACKFILL_DAYS=7, TIME_ZONE="UTC")
+    def test_virtual_mode_keeps_cancelled_exceptions(self):
+        Event.objects.create(group=self.group, location="Sede", event_date=date(2026, 3, 9), is_cancelled=True)
+
+        result = AttendanceService.generate_pending(now=self.NOW)
+
+        self.assertEqual((result["materialized"], result["created"]), (0, 0))
+        self.assertFalse(MentorAttendance.objects.exists())
+        self.assertTrue(Event.objects.get(group=self.group).attendance_generated)
+
+    @override_settings(EVENTS_RECURRENCE_MODE="materialized", TIME_ZONE="UTC")
+    def test_existing_attendance_is_not_counted_as_created(self):
+        events = [
+            Event.objects.create(group=self.group, location="Sede", event_date=event_date)
+            for event_date in (date(2026, 3, 2), date(2026, 3, 9))
+        ]
+        MentorAttendance.objects.create(mentor=self.mentor, event=events[0], date=events[0].event_date, hours=2)
+
+        result = AttendanceService.generate_pending(now=self.NOW)
+
+        self.assertEqual((result["created"], result["processed"]), (1, 2))
+        self.assertEqual(MentorAttendance.objects.count(), 2)
+
+    @override_settings(EVENTS_RECURRENCE_MODE="materialized", TIME_ZONE="UTC")
+    def test_materialized_mode_does_not_create_events(self):
+        result = AttendanceService.generate_pending(now=self.NOW)
+
+        self.assertEqual(result, {"created": 0, "processed": 0, "materialized": 0})
+        self.assertFalse(Event.objects.exists())
+
+
+class MentorHoursTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user(username="admin-hours", password="pw")
+        Profile.objects.create(user=admin, role="Admin")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RoleRefreshToken.for_user(admin).access_token}")
+        self.mentor = make_mentor("mentor-hours")
+        self.project = Project.objects.create(name="Teatro")
+        group = Group.objects.create(
+            project=self.project, mentor=self.mentor, location="Sede", mode="presencial",
+            start_date=date(2026, 2, 1), end_date=date(2026, 6, 30),
+        )
+        # Lunes y martes de la misma semana, y un lunes de abril
+        for event_date, hours in ((date(2026, 3, 30), 2), (date(2026, 3, 31), 3), (date(2026, 4, 6), 4)):
+            event = Event.objects.create(group=group, location="Sede", event_date=event_date)
+            MentorAttendance.objects.create(mentor=self.mentor, event=event, date=event_date, hours=hours)
+        # Registrada a mano, sin evento
+        MentorAttendance.objects.create(mentor=self.mentor, date=date(2026, 4, 6), hours=1)
+        MentorAttendance.objects.create(mentor=make_mentor("mentor-other-hours"), date=date(2026, 4, 6), hours=8)
+
+    def get(self, **params):
+        return self.client.get(reverse("api:mentor-hours", args=[self.mentor.pk]), params)
+
+    def test_hours_are_totalled_per_day_week_month_and_project(self):
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total_hours"], 10)
+        self.assertEqual(
+            [(row["date"], row["hours"]) for row in response.data["by_day"]],
+            [(date(2026, 3, 30), 2), (date(2026, 3, 31), 3), (date(2026, 4, 6), 5)],
+        )
+        self.assertEqual(
+            [(row["week_start"], row["hours"]) for row in response.data["by_week"]],
+            [(date(2026, 3, 30), 5), (date(2026, 4, 6), 5)],
+        )
+        self.assertEqual(response.data["by_month"], [{"month": "2026-03", "hours": 5}, {"month": "2026-04", "hours": 5}])
+        self.assertEqual(
+            sorted(response.data["by_project"], key=lambda row: row["project_id"] or 0),
+            [
+                {"project_id": None, "project_name": None, "hours": 1},
+                {"project_id": self.project.pk, "project_name": "Teatro", "hours": 9},
+            ],
+        )
+
+    def test_date_range_and_group_by(self):
+        response = self.get(date_from="2026-04-01", date_to="2026-04-30", group_by="month")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total_hours"], 5)
+        self.assertEqual(response.data["by_month"], [{"month": "2026-04", "hours": 5}])
+        self.assertNotIn("by_day", response.data)
+
+        self.assertEqual(self.get(group_by="year").status_code, 400)
+        self.assertEqual(self.get(date_from="01/04/2026").status_code, 400)
+
+
+class CertificateUploadServiceTests(TestCase):
+    CONTENT = b"%PDF-1.7 " + b"x" * 200
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.mentor = make_mentor("mentor-upload")
+
+    def start(self, checksum=None):
+        checksum = hashlib.sha256(self.CONTENT).hexdigest() if checksum is None else checksum
+        return CertificateUploadService.start(self.mentor, None, "cert.pdf", len(self.CONTENT), checksum)
+
+    def append(self, upload, offset, length, chunk_checksum=None):
+        chunk = self.CONTENT[offset:offset + length]
+        return CertificateUploadService.append(upload.pk, offset, io.BytesIO(chunk), len(chunk), chunk_checksum)
+
+    def send_all(self, upload):
+        for offset in range(0, len(self.CONTENT), 64):
+            upload = self.append(upload, offset, 64)
+        return upload
+
+    def test_chunks_must_start_at_current_offset(self):
+        upload = self.append(self.start(), 0, 100)
+        self.assertEqual(upload.offset, 100)
+
+        with self.assertRaises(UploadOffsetMismatch) as raised:
+            self.append(upload, 50, 50)
+        self.assertEqual(raised.exception.offset, 100)
+        with self.assertRaises(ValueError):
+            self.append(upload, 100, 50, chunk_checksum="0" * 64)
+
+        upload.refresh_from_db()
+        self.assertEqual(upload.offset, 100)
+        self.assertEqual(os.path.getsize(upload.temp_path), 100)
+
+    def test_complete_stores_certificate_and_removes_temp_file(self):
+        upload = self.send_all(self.start())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            mentor = CertificateUploadService.complete(upload.pk)
+
+        with default_storage.open(mentor.certificate.name) as stored:
+            self.assertEqual(stored.read(), self.CONTENT)
+        self.assertFalse(CertificateUpload.objects.filter(pk=upload.pk).exists())
+        self.assertFalse(os.path.exists(upload.temp_path))
+
+    def test_checksum_mismatch_resets_upload(self):
+        upload = self.send_all(self.start(checksum="0" * 64))
+
+        with self.assertRaises(ValueError):
+            CertificateUploadService.complete(upload.pk)
+
+        upload.refresh_from_db()
+        self.assertEqual(upload.offset, 0)
+        self.assertEqual(os.path.getsize(upload.temp_path), 0)
+        self.assertFalse(Mentor.objects.get(pk=self.mentor.pk).certificate)
+
+    def test_rolled_back_complete_can_be_retried(self):
+        upload = self.send_all(self.start())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    CertificateUploadService.complete(upload.pk)
+                    raise RuntimeError("fallo después de completar")
+
+        upload.refresh_from_db()
+        self.assertTrue(os.path.exists(upload.temp_path))
+        with self.captureOnCommitCallbacks(execute=True):
+            mentor = CertificateUploadService.complete(upload.pk)
+        with default_storage.open(mentor.certificate.name) as stored:
+            self.assertEqual(stored.read(), self.CONTENT)
+
+
+class CertificateUploadViewTests(TestCase):
+    CONTENT = b"%PDF-1.7 " + b"y" * 100
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        admin = User.objects.create_user(username="admin-uploads", password="pw")
+        Profile.objects.create(user=admin, role="Admin")
+        self.admin = admin
+        self.mentor = make_mentor("mentor-view-upload")
+        # Token real: request.user es un RoleTokenUser, no un User
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RoleRefreshToken.for_user(admin).access_token}")
+
+    def test_start_chunk_and_complete(self):
+        response = self.client.post(
+            reverse("api:mentor-certificate-uploads", args=[self.mentor.pk]),
+            {"filename": "cert.pdf", "size": len(self.CONTENT), "checksum": hashlib.sha256(self.CONTENT).hexdigest()},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.data["id"]
+        self.assertEqual(CertificateUpload.objects.get(pk=upload_id).created_by_id, self.admin.pk)
+
+        response = self.client.generic(
+            "PATCH", reverse("api:mentor-certificate-upload", args=[self.mentor.pk, upload_id]),
+            self.CONTENT, content_type="application/offset+octet-stream", HTTP_UPLOAD_OFFSET="0",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["complete"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("api:mentor-complete-certificate-upload", args=[self.mentor.pk, upload_id])
+            )
+        self.assertEqual(response.status_code, 200)
+        with default_storage.open(Mentor.objects.get(pk=self.mentor.pk).certificate.name) as stored:
+            self.assertEqual(stored.read(), self.CONTENT)
+        self.assertFalse(CertificateUpload.objects.exists())
+
+
+class MentorDestroyTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user(username="admin-destroy", password="pw")
+        Profile.objects.create(user=admin, role="Admin")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RoleRefreshToken.for_user(admin).access_token}")
+        self.mentor = make_mentor("mentor-destroy")
+
+    def test_mentor_with_groups_returns_conflict(self):
+        Group.objects.create(
+            project=Project.objects.create(name="Coro"), mentor=self.mentor, location="Sede",
+            mode="presencial", start_date=date(2026, 2, 1), end_date=date(2026, 6, 30),
+        )
+
+        response = self.client.delete(reverse("api:mentor-detail", args=[self.mentor.pk]))
+
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(Mentor.objects.filter(pk=self.mentor.pk).exists())
+
+    def test_mentor_without_groups_is_deleted_with_its_user(self):
+        user_id = self.mentor.profile.user_id
+
+        response = self.client.delete(reverse("api:mentor-detail", args=[self.mentor.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(User.objects.filter(pk=user_id).exists())
+
+
+class MentorImportTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_user(username="admin-import", password="pw", email="admin@nodux.co")
+        Profile.objects.create(user=admin, role="Admin")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RoleRefreshToken.for_user(admin).access_token}")
+
+    def row(self, **fields):
+        return {"first_name": "Ana", "last_name": "Gil", "email": "ana@nodux.co", "charge": "Mentor", **fields}
+
+    def test_invalid_and_duplicate_rows_are_reported_by_index(self):
+        rows = [
+            self.row(),
+            self.row(email="ANA@nodux.co"),
+            self.row(email="admin@Nodux.co"),
+            self.row(email="no-es-email", first_name=""),
+            self.row(email="luis@nodux.co", username="admin-import"),
+            self.row(email="eva@nodux.co", knowledge_level="experto"),
+            "no es un objeto",
+        ]
+
+        _, errors = MentorImportService.validate(rows)
+
+        self.assertEqual(sorted(errors), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(errors[1]["email"], "Repetido en la fila 0")
+        self.assertIn("ya está registrado", errors[2]["email"])
+        self.assertEqual(set(errors[3]), {"email", "first_name"})
+        self.assertIn("username", errors[4])
+        self.assertIn("knowledge_level", errors[5])
+        self.assertIn("non_field_errors", errors[6])
+
+    def test_rejected_import_creates_nothing(self):
+        response = self.client.post(
+            reverse("api:mentor-import-mentors"),
+            {"mentors": [self.row(), self.row(email="ana@NODUX.co")]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["errors"], [{"index": 1, "errors": {"email": "Repetido en la fila 0"}}])
+        self.assertFalse(Mentor.objects.exists())
+
+    def test_csv_import_generates_credentials(self):
+        User.objects.create_user(username="ana.gil100", password="pw")
+        content = "first_name,last_name,email,charge,username\nAna,Gil,ana@nodux.co,Mentor,\nLuis,Paz,luis@nodux.co,Mentor,lpaz\n"
+
+        rows = MentorImportService.parse(content.encode(), "csv")
+        cleaned, errors = MentorImportService.validate(rows)
+        self.assertEqual(errors, {})
+        created = MentorImportService.create(cleaned, workers=1)
+
+        self.assertEqual([row["username"] for row in created], ["ana.gil101", "lpaz"])
+        user = User.objects.get(username="ana.gil101")
+        self.assertTrue(user.check_password(created[0]["password"]))
+        self.assertEqual(Mentor.objects.get(pk=created[0]["id"]).profile.user_id, user.pk)
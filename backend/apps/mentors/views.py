@@ -1,14 +1,26 @@
+from datetime import datetime
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import ProtectedError
+from django.utils import timezone
+from django.utils.dateparse import parse_time
 from rest_framework import viewsets
 from rest_framework.decorators import action
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from apps.core.mixins import ConditionalGetMixin
+from apps.core.services.file_cleanup import FileCleanupService
 from apps.users.permissions import RolePermission
 from .serializers import MentorSerializer, MentorAttendanceSerializer
-from .models import Mentor, MentorAttendance
+from .models import CertificateUpload, Mentor, MentorAttendance
+from .services.certificates import CertificateUploadService, UploadOffsetMismatch
+from .services.attendance import AttendanceService
+from .services.importer import MentorImportService
+from .services.workload import workload_index
 
 
-class MentorViewSet(viewsets.ModelViewSet):
+class MentorViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing mentors.
     
@@ -19,12 +31,14 @@ class MentorViewSet(viewsets.ModelViewSet):
     queryset = Mentor.objects.all()
     serializer_class = MentorSerializer
     permission_classes = [IsAuthenticated, RolePermission]
+    etag_collections = ('mentors', 'profiles')
+    etag_vary_media = True
 
     def get_permissions(self):
         """
         Permisos dinámicos por acción.
         """
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'available']:
             # Solo autenticación para ver
             return [IsAuthenticated()]
         else:
@@ -35,9 +49,12 @@ class MentorViewSet(viewsets.ModelViewSet):
         """
         Retorna el permiso requerido basado en la acción.
         """
-        if self.action in ['list', 'retrieve', 'hours']:
+        if self.action in ['list', 'retrieve', 'hours', 'available']:
             return 'mentors.read'
-        elif self.action in ['create', 'update', 'partial_update', 'destroy']:
+        elif self.action in [
+            'create', 'update', 'partial_update', 'destroy', 'import_mentors',
+            'certificate_uploads', 'certificate_upload', 'complete_certificate_upload',
+        ]:
             return 'mentors.write'
         return 'mentors.read'
     
@@ -49,36 +66,286 @@ class MentorViewSet(viewsets.ModelViewSet):
     def destroy(self, request, *_args, **_kwargs):
         """
         Deletes a mentor along with all related resources.
-        Only accessible by Admin and SuperAdmin roles.
+        Only accessible by Admin and SuperAdmin roles. Returns 409 if the
+        mentor still has groups.
         """
         mentor = self.get_object()
 
-        # Delete certificate file
-        if mentor.certificate:
-            mentor.certificate.delete(save=False)
+        try:
+            with transaction.atomic():
+                # The files are deleted by a background task once the
+                # deletion of the user, profile and mentor commits
+                FileCleanupService.schedule(mentor.certificate.name, mentor.profile.photo.name)
+                mentor.profile.user.delete()
+        except ProtectedError:
+            # Group.mentor es PROTECT: primero hay que reasignar sus grupos
+            return Response(
+                {"error": "El mentor tiene grupos asignados; reasígnalos antes de eliminarlo"},
+                status=status.HTTP_409_CONFLICT,
+            )
 
-        # Delete profile photo if exists
-        if mentor.profile.photo:
-            mentor.profile.photo.delete(save=False)
+        return Response({"deleted": True, "id": mentor.id}, status=status.HTTP_200_OK)
 
-        # Delete associated user, profile and mentor.
-        mentor.profile.user.delete()
+    @action(detail=False, methods=["post"], url_path="import")
+    def import_mentors(self, request):
+        """
+        Creates many mentors at once with generated usernames and passwords.
+        POST /api/mentors/import/
+        - multipart with a `file` (.csv with header or .json), or
+        - JSON body {"mentors": [{"first_name", "last_name", "email",
+          "charge", "knowledge_level", "phone", "username"}]}
+        Optional: dry_run=true only validates.
 
-        return Response({"deleted": True, "id": mentor.id}, status=status.HTTP_200_OK)
+        All rows are validated together: if any is invalid no mentor is
+        created and the errors are returned by row index. The generated
+        passwords are only returned in this response.
+        """
+        upload = request.FILES.get("file")
+        try:
+            if upload:
+                fmt = request.data.get("format") or upload.name.rsplit(".", 1)[-1].lower()
+                rows = MentorImportService.parse(upload.read(), fmt)
+            else:
+                rows = request.data.get("mentors") if isinstance(request.data, dict) else request.data
+                if not isinstance(rows, list):
+                    raise ValueError('Se requiere un archivo en "file" o una lista en "mentors"')
+            if not rows:
+                raise ValueError("No hay mentores para importar")
+            cleaned_rows, errors = MentorImportService.validate(rows)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if errors:
+            return Response({
+                "error": f"{len(errors)} filas con errores, no se creó ningún mentor",
+                "errors": [
+                    {"index": index, "errors": row_errors}
+                    for index, row_errors in sorted(errors.items())
+                ],
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = request.query_params.get("dry_run")
+        if dry_run is None and isinstance(request.data, dict):
+            dry_run = request.data.get("dry_run")
+        if str(dry_run).lower() in ("1", "true"):
+            return Response({"dry_run": True, "valid": len(cleaned_rows)})
+
+        try:
+            created = MentorImportService.create(cleaned_rows)
+        except IntegrityError:
+            return Response(
+                {"error": "Otro registro usó uno de los usernames o emails durante la importación, intenta de nuevo"},
+                status=status.HTTP_409_CONFLICT,
+            )
+
+        return Response({
+            "mentors_created": len(created),
+            "mentors": created,
+            "message": f"✅ {len(created)} mentores creados",
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["post"], url_path="certificate/uploads")
+    def certificate_uploads(self, request, pk=None):
+        """
+        Starts a resumable upload of the mentor certificate.
+        POST /api/mentors/{id}/certificate/uploads/
+        {"filename": "cert.pdf", "size": 1048576, "checksum": "<sha256>",
+         "content_type": "application/pdf"}  (checksum and content_type optional)
+
+        The chunks are then sent with PATCH to the returned upload and the
+        upload is finished with POST .../complete/.
+        """
+        mentor = self.get_object()
+        data = request.data if isinstance(request.data, dict) else {}
+        filename, size = data.get("filename"), data.get("size")
+        if isinstance(size, str) and size.isdigit():
+            size = int(size)
+        errors = CertificateUploadService.validate_start(
+            filename, size, data.get("checksum"), data.get("content_type"),
+        )
+        if errors:
+            return Response({"error": "Upload inválido", "errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        upload = CertificateUploadService.start(mentor, request.user, filename, size, data.get("checksum"))
+        return self._upload_response(upload, status.HTTP_201_CREATED)
+
+    @action(
+        detail=True,
+        methods=["get", "patch", "delete"],
+        url_path=r"certificate/uploads/(?P<upload_id>[0-9a-f-]{36})",
+    )
+    def certificate_upload(self, request, pk=None, upload_id=None):
+        """
+        GET: current offset of the upload (to resume after a failure).
+        PATCH: appends the raw request body (Content-Type:
+               application/offset+octet-stream) at the `Upload-Offset`
+               header. Optional `Upload-Checksum: sha256 <hex>` of the chunk.
+               409 with the current offset if it does not match.
+        DELETE: aborts the upload.
+        """
+        mentor = self.get_object()
+        upload = CertificateUpload.objects.filter(pk=upload_id, mentor=mentor).first()
+        if upload is None:
+            return Response({"error": "Upload no encontrado"}, status=status.HTTP_404_NOT_FOUND)
+
+        if request.method == "GET":
+            return self._upload_response(upload)
+        if request.method == "DELETE":
+            CertificateUploadService.abort(upload)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+            length = int(request.headers.get("Content-Length") or 0)
+        except ValueError:
+            return Response({"error": "Upload-Offset es requerido"}, status=status.HTTP_400_BAD_REQUEST)
+        chunk_checksum = None
+        checksum_header = request.headers.get("Upload-Checksum", "")
+        if checksum_header:
+            algorithm, _, chunk_checksum = checksum_header.partition(" ")
+            if algorithm.lower() != "sha256":
+                return Response({"error": "Upload-Checksum debe ser sha256"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # Leer el cuerpo sin pasar por los parsers de DRF (sin cargarlo en memoria)
+            upload = CertificateUploadService.append(upload.pk, offset, request._request, length, chunk_checksum)
+        except UploadOffsetMismatch as e:
+            response = Response({"error": str(e), "offset": e.offset}, status=status.HTTP_409_CONFLICT)
+            response["Upload-Offset"] = e.offset
+            return response
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return self._upload_response(upload)
+
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path=r"certificate/uploads/(?P<upload_id>[0-9a-f-]{36})/complete",
+    )
+    def complete_certificate_upload(self, request, pk=None, upload_id=None):
+        """
+        Replaces the mentor certificate with the finished upload.
+        POST /api/mentors/{id}/certificate/uploads/{upload_id}/complete/
+        """
+        mentor = self.get_object()
+        if not CertificateUpload.objects.filter(pk=upload_id, mentor=mentor).exists():
+            return Response({"error": "Upload no encontrado"}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            mentor = CertificateUploadService.complete(upload_id)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(mentor).data)
+
+    def _upload_response(self, upload, status_code=status.HTTP_200_OK):
+        response = Response({
+            "id": str(upload.pk),
+            "filename": upload.filename,
+            "size": upload.size,
+            "offset": upload.offset,
+            "complete": upload.offset == upload.size,
+            "chunk_size": getattr(settings, "CERTIFICATE_UPLOAD_CHUNK_SIZE", 5 * 1024 * 1024),
+        }, status=status_code)
+        response["Upload-Offset"] = upload.offset
+        return response
+
+    @action(detail=False, methods=["get"])
+    def available(self, request):
+        """
+        Lists the mentors free on a weekday and time range.
+        GET /api/mentors/available/?day=1&start=10:00&end=12:00
+        Optional: date_from (default today) and date_to (YYYY-MM-DD) limit
+        the groups taken into account to those active in that range.
+        """
+        params = request.query_params
+        try:
+            day = int(params.get("day", ""))
+            if not 0 <= day <= 6:
+                raise ValueError
+        except ValueError:
+            return Response(
+                {"error": "day debe ser un entero entre 0 (Lunes) y 6 (Domingo)"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            start = parse_time(params.get("start", ""))
+            end = parse_time(params.get("end", ""))
+        except ValueError:
+            start = end = None
+        if start is None or end is None:
+            return Response(
+                {"error": "start y end son requeridos con formato HH:MM"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if end <= start:
+            return Response(
+                {"error": "end debe ser posterior a start"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            date_from = datetime.strptime(params["date_from"], "%Y-%m-%d").date() if params.get("date_from") else timezone.localdate()
+            date_to = datetime.strptime(params["date_to"], "%Y-%m-%d").date() if params.get("date_to") else None
+        except ValueError:
+            return Response(
+                {"error": "Formato de fecha inválido, se espera YYYY-MM-DD"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        available = dict(workload_index.available(day, start, end, date_from, date_to))
+        mentors = Mentor.objects.filter(pk__in=available).select_related("profile__user")
+        data = [
+            {**mentor, "declared_availability": available[mentor["id"]]}
+            for mentor in MentorSerializer(mentors, many=True, context={"request": request}).data
+        ]
+        return Response({
+            "day": day,
+            "start": start,
+            "end": end,
+            "count": len(data),
+            "results": data,
+        })
 
     @action(detail=True, methods=["get", "post"])
     def hours(self, request, pk=None):
         """
         Allows registering hours for a mentor.
-        GET: Anyone with mentors.read permission
+        GET: Anyone with mentors.read permission. Returns the hours of the
+             mentor totalled per day, week, month and project.
+             Query params: date_from, date_to (YYYY-MM-DD) and
+             group_by (comma separated subset of day,week,month,project).
         POST: Anyone with attendance.write permission
         """
-        _ = pk  # Mark pk as intentionally unused
         if request.method == "GET":
-            # Get all registered attendances
-            registeredAttendance = MentorAttendance.objects.all()
-            serializer = MentorAttendanceSerializer(registeredAttendance, many=True)
-            return Response(serializer.data)
+            mentor = self.get_object()
+            params = request.query_params
+
+            try:
+                date_from = datetime.strptime(params["date_from"], "%Y-%m-%d").date() if params.get("date_from") else None
+                date_to = datetime.strptime(params["date_to"], "%Y-%m-%d").date() if params.get("date_to") else None
+            except ValueError:
+                return Response(
+                    {"error": "Formato de fecha inválido, se espera YYYY-MM-DD"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            groupings = AttendanceService.HOURS_GROUPINGS
+            if params.get("group_by"):
+                groupings = [value.strip() for value in params["group_by"].split(",")]
+                invalid = [value for value in groupings if value not in AttendanceService.HOURS_GROUPINGS]
+                if invalid:
+                    return Response(
+                        {"error": f"group_by inválido: {', '.join(invalid)}. Opciones: {', '.join(AttendanceService.HOURS_GROUPINGS)}"},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+
+            summary = AttendanceService.hours_summary(mentor.pk, date_from, date_to, groupings)
+            return Response({
+                "mentor": mentor.pk,
+                "date_from": date_from,
+                "date_to": date_to,
+                **summary,
+            })
         elif request.method == "POST":
             # Register new hours for the mentor
             mentor = self.get_object()
@@ -93,7 +360,7 @@ class MentorViewSet(viewsets.ModelViewSet):
 
             serializer = MentorAttendanceSerializer(data=data)
             serializer.is_valid(raise_exception=True)
-            serializer.save(registered_by=user)
+            serializer.save()
 
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
@@ -0,0 +1,117 @@
+import time
+from datetime import date, time as dt_time, timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from apps.core.services.schedules import ScheduleService
+from apps.mentors.models import Mentor
+from apps.projects.models import Project, Group, Event
+from apps.projects.serializers import EventListSerializer, EventListRowSerializer
+from apps.users.models import Profile
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara filas/segundo de EventListSerializer contra la ruta rápida "
+        "EventListRowSerializer usada por /api/events/. Por defecto genera datos "
+        "de prueba dentro de una transacción que se revierte al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=5000, help="Eventos a generar")
+        parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por serializer (se usa la mejor)")
+        parser.add_argument("--use-existing", action="store_true", help="Medir sobre los eventos existentes sin generar datos")
+
+    def handle(self, *args, **options):
+        if options["use_existing"]:
+            self._run(options["repeat"])
+            return
+
+        try:
+            with transaction.atomic():
+                self._seed(options["events"])
+                self._run(options["repeat"])
+                raise _Rollback()
+        except _Rollback:
+            self.stdout.write("Datos de prueba revertidos.")
+
+    def _seed(self, total_events):
+        weeks = 26
+        total_groups = max(1, total_events // weeks)
+        total_mentors = max(1, total_groups // 4)
+
+        users = User.objects.bulk_create([
+            User(username=f"bench.mentor{i}", first_name="Mentor", last_name=str(i))
+            for i in range(total_mentors)
+        ])
+        profiles = Profile.objects.bulk_create([Profile(user=user, role="Mentor") for user in users])
+        mentors = Mentor.objects.bulk_create([
+            Mentor(profile=profile, charge="bench", knowledge_level="basico") for profile in profiles
+        ])
+        project = Project.objects.create(name="Benchmark", is_active=True)
+        # Los horarios son únicos por (day, start_time, end_time): reutilizar los existentes
+        slots = [(day, dt_time(hour), dt_time(hour + 2)) for day in range(5) for hour in (8, 10, 14)]
+        resolved = ScheduleService.resolve_many(slots)
+        schedules = [resolved[slot] for slot in slots]
+
+        start_date = date(2024, 1, 1)
+        groups = Group.objects.bulk_create([
+            Group(
+                project=project,
+                mentor=mentors[i % len(mentors)],
+                schedule=schedules[i % len(schedules)],
+                location=f"Sala {i}",
+                mode="presencial",
+                start_date=start_date,
+                end_date=start_date + timedelta(weeks=weeks),
+            )
+            for i in range(total_groups)
+        ])
+        Event.objects.bulk_create([
+            Event(group=group, location=group.location, event_date=start_date + timedelta(weeks=week))
+            for group in groups
+            for week in range(weeks)
+        ][:total_events], batch_size=1000)
+
+    def _run(self, repeat):
+        queryset = Event.objects.select_related(
+            "group",
+            "group__schedule",
+            "group__project",
+            "group__mentor",
+            "group__mentor__profile",
+            "group__mentor__profile__user",
+        ).order_by("event_date", "group__schedule__start_time", "id")
+
+        rows = queryset.count()
+        if not rows:
+            raise CommandError("No hay eventos para medir.")
+
+        serializer_time, serializer_data = self._best_of(
+            repeat, lambda: EventListSerializer(list(queryset), many=True).data
+        )
+        rows_time, rows_data = self._best_of(
+            repeat, lambda: EventListRowSerializer.to_list(EventListRowSerializer.values(queryset))
+        )
+
+        if [dict(item) for item in serializer_data] != rows_data:
+            raise CommandError("EventListRowSerializer no produce la misma salida que EventListSerializer.")
+
+        self.stdout.write(f"Eventos: {rows}")
+        self.stdout.write(f"EventListSerializer:    {rows / serializer_time:>12,.0f} filas/s ({serializer_time * 1000:.1f} ms)")
+        self.stdout.write(f"EventListRowSerializer: {rows / rows_time:>12,.0f} filas/s ({rows_time * 1000:.1f} ms)")
+        self.stdout.write(self.style.SUCCESS(f"Mejora: {serializer_time / rows_time:.1f}x"))
+
+    def _best_of(self, repeat, func):
+        best = None
+        result = None
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-17 18:21
+
+from datetime import date
+from django.db import migrations, models
+
+
+def mark_past_events_generated(apps, schema_editor):
+    # No generar de golpe la asistencia de todo el histórico
+    Event = apps.get_model('projects', 'Event')
+    Event.objects.filter(event_date__lt=date.today()).update(attendance_generated=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_merge_20251210_1519'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='attendance_generated',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_past_events_generated, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('attendance_generated', False)), fields=['event_date'], name='event_pending_attendance_idx'),
+        ),
+    ]
@@ -37,12 +37,19 @@ class Event(models.Model):
     event_date = models.DateField()
     is_cancelled = models.BooleanField(default=False)
     cancellation_reason = models.TextField(null=True, blank=True)
+    attendance_generated = models.BooleanField(default=False)
     
     class Meta:
         ordering = ['event_date', 'group__schedule__start_time']
         indexes = [
             models.Index(fields=['event_date']),
             models.Index(fields=['group', 'event_date']),
+            # Solo eventos pendientes de asistencia (tarea generate_attendance)
+            models.Index(
+                fields=['event_date'],
+                condition=models.Q(attendance_generated=False),
+                name='event_pending_attendance_idx',
+            ),
         ]
     
     def __str__(self):
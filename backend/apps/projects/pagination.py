@@ -0,0 +1,110 @@
+import base64
+from datetime import date, time
+from django.db.models import Q, TimeField, Value
+from django.db.models.functions import Coalesce
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class EventKeysetPagination(BasePagination):
+    """
+    Keyset pagination for the global events feed.
+
+    Orders by (event_date, group__schedule__start_time, id) and seeks from the
+    last row of the previous page with a WHERE clause instead of OFFSET, so
+    deep pages cost the same as the first one and no COUNT(*) is issued.
+    Events without schedule sort after the others of the same day.
+
+    Works on querysets of `values()` rows that include `id`, `event_date` and
+    `group__schedule__start_time` (see EventListRowSerializer).
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 100
+    max_page_size = 1000
+
+    # Hora usada para ordenar eventos sin horario (equivale a NULLS LAST)
+    missing_time = time.max
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        position = self.decode_cursor(request)
+
+        queryset = self.order_queryset(queryset)
+
+        if position is not None:
+            event_date, sort_time, pk = position
+            queryset = queryset.filter(
+                Q(event_date__gt=event_date)
+                | Q(event_date=event_date, sort_time__gt=sort_time)
+                | Q(event_date=event_date, sort_time=sort_time, id__gt=pk)
+            )
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        return self.page
+
+    @classmethod
+    def order_queryset(cls, queryset):
+        """
+        Applies the keyset ordering, with events without schedule last on
+        every database backend.
+        """
+        return queryset.annotate(
+            sort_time=Coalesce(
+                'group__schedule__start_time',
+                Value(cls.missing_time, output_field=TimeField()),
+            )
+        ).order_by('event_date', 'sort_time', 'id')
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        start_time = last['group__schedule__start_time'] or self.missing_time
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(last['event_date'], start_time, last['id'])
+        )
+
+    def encode_cursor(self, event_date, start_time, pk):
+        raw = f"{event_date.isoformat()}|{start_time.isoformat()}|{pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(encoded.encode()).decode()
+            event_date, start_time, pk = raw.split('|')
+            return date.fromisoformat(event_date), time.fromisoformat(start_time), int(pk)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise NotFound('Cursor inválido')
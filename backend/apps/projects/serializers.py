@@ -1,4 +1,6 @@
+from django.db.models import Count, Q
 from rest_framework import serializers
+from apps.core.models import Schedule
 from .models import Project, Group, Event
 
 
@@ -9,8 +11,33 @@ class ProjectSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class ProjectStatsSerializer(ProjectSerializer):
+    """
+    Project with the aggregates annotated by ProjectStatsService.
+    """
+    groups_count = serializers.IntegerField(read_only=True)
+    mentors_count = serializers.IntegerField(read_only=True)
+    upcoming_events_count = serializers.IntegerField(read_only=True)
+    scheduled_hours = serializers.SerializerMethodField()
+
+    def get_scheduled_hours(self, instance):
+        return round(instance.scheduled_hours, 2)
+
+
 # --- Group ---
 class GroupSerializer(serializers.ModelSerializer):
+    """
+    Group serializer with optional inline expansions, requested through the
+    `expand` context entry (see GroupViewSet.get_expand):
+    - schedule: replaces the schedule id with the schedule object
+    - mentor: adds `mentor_name`
+    - events: adds `events_count` and `cancelled_events_count`
+
+    The view loads them with select_related and annotations, so expanding
+    does not add queries per group.
+    """
+    EXPANSIONS = ("schedule", "mentor", "events")
+
     class Meta:
         model = Group
         fields = "__all__"
@@ -18,6 +45,38 @@ class GroupSerializer(serializers.ModelSerializer):
             "project": {"read_only": True}
         }
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        expand = self.context.get("expand", ())
+
+        if "schedule" in expand:
+            schedule = instance.schedule
+            data["schedule"] = {
+                "id": schedule.id,
+                "day": schedule.day,
+                "day_display": schedule.get_day_display(),
+                "start_time": schedule.start_time.strftime("%H:%M:%S"),
+                "end_time": schedule.end_time.strftime("%H:%M:%S"),
+            } if schedule else None
+
+        if "mentor" in expand:
+            user = instance.mentor.profile.user if instance.mentor else None
+            data["mentor_name"] = (user.get_full_name() or user.username) if user else None
+
+        if "events" in expand:
+            if not hasattr(instance, "events_count"):
+                # Instancias sin anotar (respuestas de create/update)
+                counts = instance.event_set.aggregate(
+                    events_count=Count("id"),
+                    cancelled_events_count=Count("id", filter=Q(is_cancelled=True)),
+                )
+                instance.events_count = counts["events_count"]
+                instance.cancelled_events_count = counts["cancelled_events_count"]
+            data["events_count"] = instance.events_count
+            data["cancelled_events_count"] = instance.cancelled_events_count
+
+        return data
+
 
 # --- Event (used in nested routes) ---
 class EventSerializer(serializers.ModelSerializer):
@@ -76,6 +135,11 @@ class EventListSerializer(serializers.ModelSerializer):
         """
         representation = super().to_representation(instance)
         
+        # Ocurrencias calculadas (modo de recurrencia virtual) no tienen fila propia
+        representation['is_virtual'] = instance.pk is None
+        if instance.pk is None:
+            representation['id'] = f"{instance.group_id}-{instance.event_date:%Y%m%d}"
+        
         # Renombrar event_date a date para el frontend
         if 'event_date' in representation:
             representation['date'] = representation.pop('event_date')
@@ -103,3 +167,87 @@ class EventListSerializer(serializers.ModelSerializer):
             representation['duration'] = 2
         
         return representation
+
+
+# --- Event (flat fast path for the global `/api/events/` list) ---
+class EventListRowSerializer:
+    """
+    Builds the same JSON shape as `EventListSerializer` from `values()` rows.
+    Skips model instantiation and DRF field machinery, so calendar pages with
+    thousands of events are rendered from a single joined query.
+    """
+    fields = (
+        'id',
+        'group_id',
+        'location',
+        'event_date',
+        'is_cancelled',
+        'cancellation_reason',
+        'group__location',
+        'group__mode',
+        'group__project__name',
+        'group__mentor_id',
+        'group__mentor__profile__user__first_name',
+        'group__mentor__profile__user__last_name',
+        'group__schedule_id',
+        'group__schedule__day',
+        'group__schedule__start_time',
+        'group__schedule__end_time',
+    )
+    day_names = dict(Schedule.DAYS_OF_WEEK)
+
+    @classmethod
+    def values(cls, queryset):
+        return queryset.values(*cls.fields)
+
+    @classmethod
+    def to_representation(cls, row):
+        mentor_id = row['group__mentor_id']
+        representation = {
+            'id': row['id'],
+            'group': row['group_id'],
+            'location': row['location'],
+            'group_info': {
+                'id': row['group_id'],
+                'location': row['group__location'],
+                'mode': row['group__mode'],
+                'project': row['group__project__name'],
+                'mentor': {
+                    'id': mentor_id,
+                    'name': f"{row['group__mentor__profile__user__first_name']} "
+                            f"{row['group__mentor__profile__user__last_name']}"
+                } if mentor_id is not None else None
+            },
+            'is_cancelled': row['is_cancelled'],
+            'cancellation_reason': row['cancellation_reason'],
+            'is_virtual': False,
+            'date': row['event_date'].isoformat(),
+        }
+
+        start_time = row['group__schedule__start_time']
+        end_time = row['group__schedule__end_time']
+        if row['group__schedule_id'] is not None:
+            day = row['group__schedule__day']
+            representation['schedule_id'] = row['group__schedule_id']
+            representation['schedule_day'] = day
+            representation['schedule_day_name'] = cls.day_names.get(day, day)
+            representation['start_time'] = str(start_time)
+            representation['end_time'] = str(end_time)
+            representation['start_hour'] = start_time.hour
+            representation['end_hour'] = end_time.hour
+            representation['duration'] = end_time.hour - start_time.hour
+        else:
+            representation['schedule_id'] = None
+            representation['schedule_day'] = None
+            representation['schedule_day_name'] = None
+            representation['start_time'] = "08:00:00"
+            representation['end_time'] = "10:00:00"
+            representation['start_hour'] = 8
+            representation['end_hour'] = 10
+            representation['duration'] = 2
+
+        return representation
+
+    @classmethod
+    def to_list(cls, rows):
+        return [cls.to_representation(row) for row in rows]
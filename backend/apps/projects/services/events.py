@@ -0,0 +1,187 @@
+from datetime import date, time, timedelta
+from django.conf import settings
+from django.db import transaction
+from apps.core.services.versions import VersionService
+from apps.projects.models import Event
+
+
+class EventService:
+
+    @staticmethod
+    def materialized() -> bool:
+        """
+        True when every weekly occurrence is stored as an Event row.
+        In "virtual" mode only exceptions (cancellations, location overrides
+        and one-off events) are stored and occurrences are computed on read.
+        """
+        return getattr(settings, "EVENTS_RECURRENCE_MODE", "materialized") != "virtual"
+
+    @staticmethod
+    def recurrence_dates(schedule_day: int, start_date: date, end_date: date) -> list:
+        """
+        Returns every weekly occurrence of `schedule_day` (0=Lunes, 6=Domingo)
+        between `start_date` and `end_date`, both inclusive.
+        """
+        if schedule_day is None or start_date is None or end_date is None:
+            return []
+
+        offset = (schedule_day - start_date.weekday()) % 7
+        current_date = start_date + timedelta(days=offset)
+
+        dates = []
+        while current_date <= end_date:
+            dates.append(current_date)
+            current_date += timedelta(days=7)
+        return dates
+
+    @staticmethod
+    def generate_events(group, schedule_day: int, start_date: date, end_date: date, location: str) -> int:
+        """
+        Creates one event per weekly occurrence in a single bulk insert.
+        Does nothing in virtual recurrence mode.
+        """
+        if not EventService.materialized():
+            return 0
+        dates = EventService.recurrence_dates(schedule_day, start_date, end_date)
+        return EventService.generate_events_for_dates(group, dates, location)
+
+    @staticmethod
+    def regenerate_events(group, old_schedule_day, old_start_date, old_end_date, old_location=None) -> dict:
+        """
+        Reconciles the stored events of `group` with its current recurrence.
+
+        Only the difference between the old and the new recurrence is written:
+        - Events on dates present in both recurrences are kept untouched
+          (cancellations and location overrides survive).
+        - Obsolete events that have a counterpart in the same week of the new
+          recurrence (e.g. the day moved from Lunes to Martes) are moved with
+          an UPDATE instead of being deleted and re-inserted. Cancelled events
+          are not moved (the cancellation belongs to its date) and events whose
+          attendance was already generated stay on their date as history,
+          standing in for their week.
+        - Remaining obsolete events are deleted and missing dates are inserted.
+        - One-off events (dates outside the old recurrence) are kept while they
+          fall inside the new date range.
+        - In virtual recurrence mode missing dates are not inserted, only the
+          stored exceptions are moved or deleted.
+
+        Returns the number of events kept, moved, created and deleted.
+        """
+        new_schedule_day = group.schedule.day if group.schedule else None
+        old_dates = set(EventService.recurrence_dates(old_schedule_day, old_start_date, old_end_date))
+        new_dates = set(EventService.recurrence_dates(new_schedule_day, group.start_date, group.end_date))
+
+        with transaction.atomic():
+            existing = list(
+                Event.objects.select_for_update()
+                .filter(group=group)
+                .only("id", "event_date", "is_cancelled", "attendance_generated")
+                .order_by("event_date", "id")
+            )
+
+            kept_dates = set()
+            obsolete = []
+            for event in existing:
+                if event.event_date in new_dates and event.event_date not in kept_dates:
+                    kept_dates.add(event.event_date)
+                elif event.event_date not in old_dates and event.event_date not in new_dates \
+                        and group.start_date <= event.event_date <= group.end_date:
+                    # Evento puntual creado manualmente: se conserva
+                    kept_dates.add(event.event_date)
+                else:
+                    obsolete.append(event)
+
+            missing_dates = new_dates - kept_dates
+
+            # Mover eventos a la misma semana cuando solo cambió el día
+            moved = []
+            if old_schedule_day is not None and new_schedule_day is not None:
+                delta = timedelta(days=new_schedule_day - old_schedule_day)
+                to_delete = []
+                for event in obsolete:
+                    target_date = event.event_date + delta
+                    if target_date not in missing_dates:
+                        to_delete.append(event)
+                    elif event.attendance_generated and not event.is_cancelled:
+                        # Ya tiene asistencia en su fecha: queda como historial de esa semana
+                        missing_dates.discard(target_date)
+                    elif event.is_cancelled:
+                        # La cancelación es de esa fecha (p. ej. un festivo): no se traslada
+                        to_delete.append(event)
+                    else:
+                        missing_dates.discard(target_date)
+                        event.event_date = target_date
+                        moved.append(event)
+                obsolete = to_delete
+
+            if not EventService.materialized():
+                missing_dates = set()
+
+            if moved:
+                Event.objects.bulk_update(moved, ["event_date"])
+                VersionService.mark_changed("events")
+            if obsolete:
+                Event.objects.filter(pk__in=[event.pk for event in obsolete]).delete()
+
+            events_created = EventService.generate_events_for_dates(group, sorted(missing_dates), group.location)
+
+            # Propagar la nueva ubicación a los eventos que heredaban la anterior
+            if old_location is not None and old_location != group.location:
+                Event.objects.filter(group=group, location=old_location).update(location=group.location)
+                VersionService.mark_changed("events")
+
+        return {
+            "kept": len(existing) - len(moved) - len(obsolete),
+            "moved": len(moved),
+            "created": events_created,
+            "deleted": len(obsolete),
+        }
+
+    @staticmethod
+    def generate_events_for_dates(group, dates: list, location: str) -> int:
+        """
+        Inserts one event per date in a single bulk insert.
+        """
+        if not dates:
+            return 0
+        Event.objects.bulk_create(
+            [Event(group=group, location=location, event_date=event_date) for event_date in dates]
+        )
+        VersionService.mark_changed("events")
+        return len(dates)
+
+    @staticmethod
+    def expand_occurrences(groups, stored_events, date_from=None, date_to=None) -> list:
+        """
+        Expands the weekly recurrence of each group inside [date_from, date_to]
+        and merges it with the stored events.
+
+        A stored event replaces the computed occurrence of its group on the same
+        date, so cancellations and location overrides win; stored one-off events
+        are included as they are. Computed occurrences are unsaved Event
+        instances (pk=None). The result is ordered by date, start time and group.
+        """
+        stored_by_key = {}
+        occurrences = []
+        for event in stored_events:
+            stored_by_key.setdefault((event.group_id, event.event_date), event)
+            occurrences.append(event)
+
+        for group in groups:
+            if not group.schedule:
+                continue
+            start_date = max(group.start_date, date_from) if date_from else group.start_date
+            end_date = min(group.end_date, date_to) if date_to else group.end_date
+            for event_date in EventService.recurrence_dates(group.schedule.day, start_date, end_date):
+                if (group.id, event_date) not in stored_by_key:
+                    occurrences.append(
+                        Event(group=group, location=group.location, event_date=event_date)
+                    )
+
+        def sort_key(event):
+            schedule = event.group.schedule
+            start_time = schedule.start_time if schedule else time.max
+            return (event.event_date, start_time, event.group_id, event.pk or 0)
+
+        occurrences.sort(key=sort_key)
+        return occurrences
@@ -0,0 +1,47 @@
+from django.db.models import Count, ExpressionWrapper, FloatField, Q, Sum
+from django.db.models.functions import Coalesce, ExtractHour, ExtractMinute
+from django.utils import timezone
+
+
+def _minutes(field):
+    return ExtractHour(field) * 60 + ExtractMinute(field)
+
+
+class ProjectStatsService:
+
+    @staticmethod
+    def annotate(queryset, today=None):
+        """
+        Annotates each project with its aggregates in a single query:
+        - groups_count: groups of the project
+        - mentors_count: distinct mentors assigned to those groups
+        - upcoming_events_count: events from today on that are not cancelled
+        - scheduled_hours: hours of all non-cancelled events, using the
+          duration of the schedule of their group
+
+        Counts are distinct because the group -> event join multiplies rows;
+        the hour sum runs over event rows, which that join does not duplicate.
+        Only stored events are counted (see EVENTS_RECURRENCE_MODE).
+        Meta.ordering is not applied to GROUP BY queries, so the result is
+        explicitly ordered by id.
+        """
+        today = today or timezone.localdate()
+        active_event = Q(group__event__is_cancelled=False)
+        duration = ExpressionWrapper(
+            (_minutes("group__schedule__end_time") - _minutes("group__schedule__start_time")) / 60.0,
+            output_field=FloatField(),
+        )
+        return queryset.annotate(
+            groups_count=Count("group", distinct=True),
+            mentors_count=Count("group__mentor", distinct=True),
+            upcoming_events_count=Count(
+                "group__event",
+                filter=active_event & Q(group__event__event_date__gte=today),
+                distinct=True,
+            ),
+            scheduled_hours=Coalesce(
+                Sum(duration, filter=active_event & Q(group__event__isnull=False)),
+                0.0,
+                output_field=FloatField(),
+            ),
+        ).order_by("id")
@@ -1,3 +1,410 @@
-from django.test import TestCase
+from datetime import date, time
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from apps.core.models import Schedule
+from apps.core.services.versions import VersionService
+from apps.mentors.models import Mentor, MentorAttendance
+from apps.projects.models import Event, Group, Project
+from apps.projects.services.events import EventService
+from apps.users.authentication import RoleRefreshToken
+from apps.users.models import Profile
 
-# Create your tests here.
+
+@override_settings(EVENTS_RECURRENCE_MODE="materialized")
+class RegenerateEventsTests(TestCase):
+    def setUp(self):
+        self.monday = Schedule.objects.create(day=0, start_time=time(8), end_time=time(10))
+        self.tuesday = Schedule.objects.create(day=1, start_time=time(8), end_time=time(10))
+        self.group = Group.objects.create(
+            project=Project.objects.create(name="Música"), schedule=self.monday,
+            location="Sede", mode="presencial", start_date=date(2026, 3, 2), end_date=date(2026, 3, 29),
+        )
+        EventService.generate_events(self.group, 0, self.group.start_date, self.group.end_date, "Sede")
+
+    def regenerate(self):
+        return EventService.regenerate_events(self.group, 0, date(2026, 3, 2), date(2026, 3, 29))
+
+    def dates(self):
+        return list(Event.objects.filter(group=self.group).order_by("event_date").values_list("event_date", flat=True))
+
+    def test_day_change_moves_events_within_the_week(self):
+        one_off = Event.objects.create(group=self.group, location="Auditorio", event_date=date(2026, 3, 12))
+        moved = Event.objects.get(group=self.group, event_date=date(2026, 3, 23))
+        moved.location = "Aula 2"
+        moved.save()
+
+        self.group.schedule = self.tuesday
+        self.group.save()
+        result = self.regenerate()
+
+        self.assertEqual(result, {"kept": 1, "moved": 4, "created": 0, "deleted": 0})
+        self.assertEqual(
+            self.dates(),
+            [date(2026, 3, 3), date(2026, 3, 10), date(2026, 3, 12), date(2026, 3, 17), date(2026, 3, 24)],
+        )
+        moved.refresh_from_db()
+        self.assertEqual((moved.event_date, moved.location), (date(2026, 3, 24), "Aula 2"))
+        self.assertTrue(Event.objects.filter(pk=one_off.pk, event_date=date(2026, 3, 12)).exists())
+
+    def test_day_change_keeps_history_and_drops_dated_cancellations(self):
+        mentor_user = User.objects.create_user(username="mentor-history", password="pw")
+        mentor = Mentor.objects.create(profile=Profile.objects.create(user=mentor_user, role="Mentor"), charge="Mentor")
+        attended = Event.objects.get(group=self.group, event_date=date(2026, 3, 2))
+        attended.attendance_generated = True
+        attended.save()
+        attendance = MentorAttendance.objects.create(mentor=mentor, event=attended, date=attended.event_date, hours=2)
+        # Festivo del lunes 16
+        holiday = Event.objects.get(group=self.group, event_date=date(2026, 3, 16))
+        holiday.is_cancelled, holiday.cancellation_reason = True, "Festivo"
+        holiday.save()
+
+        self.group.schedule = self.tuesday
+        self.group.save()
+        result = self.regenerate()
+
+        self.assertEqual(result, {"kept": 1, "moved": 2, "created": 1, "deleted": 1})
+        # El lunes con asistencia ocupa su semana: no se crea el martes 3
+        self.assertEqual(
+            self.dates(),
+            [date(2026, 3, 2), date(2026, 3, 10), date(2026, 3, 17), date(2026, 3, 24)],
+        )
+        attendance.refresh_from_db()
+        self.assertEqual((attendance.event_id, attendance.date), (attended.pk, date(2026, 3, 2)))
+        self.assertFalse(Event.objects.filter(pk=holiday.pk).exists())
+        self.assertFalse(Event.objects.get(group=self.group, event_date=date(2026, 3, 17)).is_cancelled)
+
+    def test_range_change_only_writes_the_difference(self):
+        kept_ids = set(
+            Event.objects.filter(group=self.group, event_date__lte=date(2026, 3, 9)).values_list("id", flat=True)
+        )
+
+        self.group.start_date, self.group.end_date = date(2026, 2, 23), date(2026, 3, 15)
+        self.group.save()
+        result = self.regenerate()
+
+        self.assertEqual(result, {"kept": 2, "moved": 0, "created": 1, "deleted": 2})
+        self.assertEqual(self.dates(), [date(2026, 2, 23), date(2026, 3, 2), date(2026, 3, 9)])
+        self.assertTrue(kept_ids <= set(Event.objects.filter(group=self.group).values_list("id", flat=True)))
+
+    def test_unchanged_recurrence_is_a_no_op(self):
+        before = list(Event.objects.filter(group=self.group).values_list("id", "event_date"))
+
+        result = self.regenerate()
+
+        self.assertEqual(result, {"kept": 4, "moved": 0, "created": 0, "deleted": 0})
+        self.assertEqual(list(Event.objects.filter(group=self.group).values_list("id", "event_date")), before)
+
+
+@override_settings(EVENTS_RECURRENCE_MODE="virtual", EVENTS_VIRTUAL_MAX_DAYS=366)
+class VirtualEventListTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username="admin-events", password="pw")
+        Profile.objects.create(user=user, role="Admin")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RoleRefreshToken.for_user(user).access_token}")
+        self.group = Group.objects.create(
+            project=Project.objects.create(name="Teatro"),
+            schedule=Schedule.objects.create(day=0, start_time=time(8), end_time=time(10)),
+            location="Sede", mode="presencial", start_date=date(2026, 3, 2), end_date=date(2026, 3, 29),
+        )
+        self.url = reverse("api:events-list")
+
+    def test_lists_occurrences_of_the_window(self):
+        response = self.client.get(self.url, {
+            "group": self.group.pk, "event_date__gte": "2026-03-01", "event_date__lte": "2026-03-15",
+        })
+
+        self.assertEqual(response.status_code, 200)
+        rows = response.data["results"] if isinstance(response.data, dict) else response.data
+        self.assertEqual([row["id"] for row in rows], [f"{self.group.pk}-20260302", f"{self.group.pk}-20260309"])
+
+    def test_invalid_filters_and_oversized_window_are_rejected(self):
+        self.assertEqual(self.client.get(self.url, {"group": "abc"}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {"group__project": "1;"}).status_code, 400)
+        response = self.client.get(self.url, {"event_date__gte": "2026-01-01", "event_date__lte": "2027-06-30"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_virtual_id_has_no_detail(self):
+        response = self.client.get(reverse("api:events-detail", args=[f"{self.group.pk}-20260302"]))
+
+        self.assertEqual(response.status_code, 404)
+        self.assertIn("error", response.data)
+
+
+@override_settings(EVENTS_RECURRENCE_MODE="materialized")
+class EventKeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username="admin-keyset", password="pw")
+        Profile.objects.create(user=user, role="Admin")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RoleRefreshToken.for_user(user).access_token}")
+        project = Project.objects.create(name="Danza")
+        self.morning, self.afternoon, self.unscheduled = [
+            Group.objects.create(
+                project=project, schedule=schedule, location="Sede", mode="presencial",
+                start_date=date(2026, 3, 1), end_date=date(2026, 3, 31),
+            )
+            for schedule in (
+                Schedule.objects.create(day=0, start_time=time(8), end_time=time(10)),
+                Schedule.objects.create(day=0, start_time=time(14), end_time=time(16)),
+                None,
+            )
+        ]
+        for event_date in (date(2026, 3, 2), date(2026, 3, 9)):
+            for group in (self.unscheduled, self.afternoon, self.morning, self.morning):
+                Event.objects.create(group=group, location="Sede", event_date=event_date)
+        self.url = reverse("api:events-list")
+
+    def expected_ids(self):
+        # Orden esperado: fecha, hora de inicio (sin horario al final) e id
+        rows = Event.objects.values_list("event_date", "group__schedule__start_time", "id")
+        return [pk for _, _, pk in sorted(rows, key=lambda row: (row[0], row[1] is None, row[1] or time.min, row[2]))]
+
+    def walk(self, page_size=3):
+        ids, url, params = [], self.url, {"cursor": "", "page_size": page_size}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(row["id"] for row in response.data["results"])
+            url, params = response.data["next"], None
+        return ids
+
+    def test_pages_follow_date_time_and_id_with_unscheduled_last(self):
+        expected = self.expected_ids()
+
+        self.assertEqual(self.walk(), expected)
+        self.assertEqual(self.walk(page_size=1), expected)
+
+    def test_rows_inserted_before_the_cursor_do_not_shift_pages(self):
+        first = self.client.get(self.url, {"cursor": "", "page_size": 3})
+        seen = [row["id"] for row in first.data["results"]]
+        remaining = [pk for pk in self.walk() if pk not in seen]
+
+        # Eventos nuevos antes y en el mismo punto del cursor
+        Event.objects.create(group=self.morning, location="Sede", event_date=date(2026, 3, 1))
+        Event.objects.create(group=self.morning, location="Sede", event_date=date(2026, 3, 2))
+
+        rest, url = [], first.data["next"]
+        while url:
+            response = self.client.get(url)
+            rest.extend(row["id"] for row in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(rest, remaining)
+
+    def test_invalid_cursor_returns_404(self):
+        self.assertEqual(self.client.get(self.url, {"cursor": "no-es-un-cursor"}).status_code, 404)
+
+
+@override_settings(EVENTS_RECURRENCE_MODE="materialized")
+class GroupUpdateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username="admin-groups", password="pw")
+        Profile.objects.create(user=user, role="Admin")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RoleRefreshToken.for_user(user).access_token}")
+        self.group = Group.objects.create(
+            project=Project.objects.create(name="Pintura"),
+            schedule=Schedule.objects.create(day=0, start_time=time(8), end_time=time(10)),
+            location="Sede", mode="presencial", start_date=date(2026, 3, 2), end_date=date(2026, 3, 29),
+        )
+        EventService.generate_events(self.group, 0, self.group.start_date, self.group.end_date, "Sede")
+        self.url = reverse("api:projects-groups-detail", args=[self.group.project_id, self.group.pk])
+
+    def test_invalid_fields_return_400_without_changes(self):
+        for payload in (
+            {"schedule_day": "x"},
+            {"schedule_day": 9},
+            {"start_time": "25:00"},
+            {"start_date": "01/03/2026"},
+            {"end_date": "2026-02-01"},
+            {"mentor": "abc"},
+            {"mode": "remoto"},
+        ):
+            with self.subTest(payload=payload):
+                response = self.client.patch(self.url, payload, format="json")
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(next(iter(payload)), response.data["errors"])
+
+        self.group.refresh_from_db()
+        self.assertEqual((self.group.schedule.day, self.group.end_date), (0, date(2026, 3, 29)))
+        self.assertEqual(Event.objects.filter(group=self.group).count(), 4)
+
+    def test_day_only_change_keeps_the_current_times(self):
+        response = self.client.patch(self.url, {"schedule_day": 1}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["events_moved"], 4)
+        self.group.refresh_from_db()
+        self.assertEqual(
+            (self.group.schedule.day, self.group.schedule.start_time, self.group.schedule.end_time),
+            (1, time(8), time(10)),
+        )
+
+
+@override_settings(EVENTS_RECURRENCE_MODE="materialized")
+class GroupBulkCreateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username="admin-bulk", password="pw")
+        Profile.objects.create(user=user, role="Admin")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RoleRefreshToken.for_user(user).access_token}")
+        self.project = Project.objects.create(name="Ajedrez")
+        self.mentors = [
+            Mentor.objects.create(
+                profile=Profile.objects.create(user=User.objects.create_user(username=f"mentor-bulk-{n}"), role="Mentor"),
+                charge="Mentor",
+            )
+            for n in range(2)
+        ]
+        self.url = reverse("api:projects-groups-bulk", args=[self.project.pk])
+
+    def row(self, mentor, **fields):
+        return {
+            "mentor": mentor.pk, "location": "Sala A", "mode": "presencial",
+            "start_date": "2026-03-02", "end_date": "2026-03-29",
+            "schedule_day": 0, "start_time": "08:00:00", "end_time": "10:00:00", **fields,
+        }
+
+    def test_creates_groups_with_shared_schedule_and_events(self):
+        response = self.client.post(
+            self.url, {"groups": [self.row(self.mentors[0]), self.row(self.mentors[1])]}, format="json",
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual((response.data["groups_created"], response.data["events_created"]), (2, 8))
+        self.assertEqual(Schedule.objects.count(), 1)
+        self.assertEqual(Event.objects.filter(group__project=self.project).count(), 8)
+
+    def test_any_invalid_row_rejects_the_whole_batch(self):
+        response = self.client.post(self.url, {"groups": [
+            self.row(self.mentors[0]),
+            self.row(self.mentors[0], start_time="09:00:00", end_time="11:00:00"),
+            self.row(self.mentors[1], schedule_day=7, end_date="2026-02-01"),
+        ]}, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        errors = {row["index"]: row["errors"] for row in response.data["errors"]}
+        self.assertEqual(sorted(errors), [1, 2])
+        self.assertIn("fila 0", errors[1]["mentor"])
+        self.assertIn("schedule_day", errors[2])
+        self.assertFalse(Group.objects.exists())
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="admin-etag", password="pw")
+        Profile.objects.create(user=self.user, role="Admin")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RoleRefreshToken.for_user(self.user).access_token}")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group = Group.objects.create(
+                project=Project.objects.create(name="Robótica"),
+                schedule=Schedule.objects.create(day=0, start_time=time(8), end_time=time(10)),
+                location="Sede", mode="presencial", start_date=date(2026, 3, 2), end_date=date(2026, 3, 29),
+            )
+            Event.objects.create(group=self.group, location="Sede", event_date=date(2026, 3, 2))
+
+    def test_unchanged_listing_returns_304(self):
+        for url in (reverse("api:events-list"), reverse("api:projects-groups-list", args=[self.group.project_id])):
+            with self.subTest(url=url):
+                etag = self.client.get(url)["ETag"]
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response["ETag"], etag)
+
+    def test_write_invalidates_the_etag(self):
+        url = reverse("api:events-list")
+        etag = self.client.get(url)["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Event.objects.create(group=self.group, location="Sede", event_date=date(2026, 3, 9))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["count"], 2)
+
+    def test_etag_depends_on_the_query(self):
+        url = reverse("api:events-list")
+        etag = self.client.get(url)["ETag"]
+
+        response = self.client.get(url, {"group": self.group.pk}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class GroupExpandTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username="admin-expand", password="pw")
+        Profile.objects.create(user=user, role="Admin")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RoleRefreshToken.for_user(user).access_token}")
+        mentor_user = User.objects.create_user(username="mentor-expand", password="pw", first_name="Ana", last_name="Ríos")
+        self.mentor = Mentor.objects.create(profile=Profile.objects.create(user=mentor_user, role="Mentor"), charge="Mentor")
+        self.project = Project.objects.create(name="Danza")
+        self.schedule = Schedule.objects.create(day=2, start_time=time(14), end_time=time(16))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group = self.make_group()
+            Event.objects.create(group=self.group, location="Sede", event_date=date(2026, 3, 4))
+            Event.objects.create(group=self.group, location="Sede", event_date=date(2026, 3, 11), is_cancelled=True)
+        self.url = reverse("api:projects-groups-list", args=[self.project.pk])
+
+    def make_group(self):
+        return Group.objects.create(
+            project=self.project, mentor=self.mentor, schedule=self.schedule, location="Sede",
+            mode="presencial", start_date=date(2026, 3, 2), end_date=date(2026, 3, 29),
+        )
+
+    def results(self, response):
+        return response.data["results"]
+
+    def test_expansions_are_embedded(self):
+        response = self.client.get(self.url, {"expand": "all"})
+
+        self.assertEqual(response.status_code, 200)
+        group = self.results(response)[0]
+        self.assertEqual(group["schedule"], {
+            "id": self.schedule.pk, "day": 2, "day_display": self.schedule.get_day_display(),
+            "start_time": "14:00:00", "end_time": "16:00:00",
+        })
+        self.assertEqual(group["mentor_name"], "Ana Ríos")
+        self.assertEqual((group["events_count"], group["cancelled_events_count"]), (2, 1))
+
+        plain = self.results(self.client.get(self.url))[0]
+        self.assertEqual(plain["schedule"], self.schedule.pk)
+        self.assertNotIn("mentor_name", plain)
+        self.assertEqual(self.client.get(self.url, {"expand": "students"}).status_code, 400)
+
+    def test_query_count_does_not_grow_with_the_groups(self):
+        # La primera petición carga el estado del usuario en caché
+        self.client.get(self.url, {"expand": "all"})
+        with CaptureQueriesContext(connection) as single:
+            self.client.get(self.url, {"expand": "all"})
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(3):
+                self.make_group()
+
+        with self.assertNumQueries(len(single)):
+            response = self.client.get(self.url, {"expand": "all"})
+        self.assertEqual(len(self.results(response)), 4)
+
+    def test_expanded_etag_tracks_the_events(self):
+        etag = self.client.get(self.url, {"expand": "events"})["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Event.objects.filter(group=self.group, is_cancelled=False).update(is_cancelled=True)
+            VersionService.bump("events")
+
+        response = self.client.get(self.url, {"expand": "events"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.results(response)[0]["cancelled_events_count"], 2)
@@ -1,33 +1,144 @@
 from rest_framework import viewsets, mixins, filters, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from django.db.models import Prefetch
+from rest_framework.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Q
 from django_filters.rest_framework import DjangoFilterBackend
 from datetime import datetime, timedelta
+import json
+import logging
 from django.conf import settings
-from apps.core.models import Schedule
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_time
+from apps.core.mixins import ConditionalGetMixin
+from apps.core.services.dashboard import DashboardService
+from apps.core.services.schedules import ScheduleService
+from apps.core.services.versions import VersionService
+from apps.mentors.services.workload import workload_index
 from .models import Project, Group, Event
+from .pagination import EventKeysetPagination
+from .services.events import EventService
+from .services.stats import ProjectStatsService
 from .serializers import (
     ProjectSerializer,
+    ProjectStatsSerializer,
     GroupSerializer,
     EventSerializer,
     EventListSerializer,
+    EventListRowSerializer,
 )
 
+logger = logging.getLogger(__name__)
+
 DEBUG = getattr(settings, 'DEBUG', False)
 
 
 class ProjectViewSet(viewsets.ModelViewSet):
+    """
+    CRUD de proyectos.
+
+    GET /api/projects/?stats=true agrega a cada proyecto sus conteos de grupos,
+    mentores y eventos próximos y las horas programadas, calculados en una
+    sola consulta agregada. GET /api/projects/summary/ retorna lo mismo para
+    todos los proyectos, sin paginar, junto con los totales.
+    """
     queryset = Project.objects.all()
     serializer_class = ProjectSerializer
 
+    def with_stats(self):
+        return self.action == 'summary' or (
+            self.action == 'list' and self.request.query_params.get('stats') in ('1', 'true')
+        )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.with_stats():
+            queryset = ProjectStatsService.annotate(queryset)
+        return queryset
+
+    def get_serializer_class(self):
+        if self.with_stats():
+            return ProjectStatsSerializer
+        return super().get_serializer_class()
 
-class GroupViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """
+        Estadísticas de todos los proyectos para el dashboard académico.
+        """
+        from apps.mentors.models import Mentor
+
+        projects = self.get_serializer(self.filter_queryset(self.get_queryset()), many=True).data
+        return Response({
+            'totals': {
+                'projects': len(projects),
+                'active_projects': sum(1 for project in projects if project['is_active']),
+                'groups': sum(project['groups_count'] for project in projects),
+                'mentors': Mentor.objects.count(),
+                'upcoming_events': sum(project['upcoming_events_count'] for project in projects),
+                'scheduled_hours': round(sum(project['scheduled_hours'] for project in projects), 2),
+            },
+            'results': projects,
+        })
+
+
+class GroupViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = GroupSerializer
+    etag_collections = ('groups',)
 
     def get_queryset(self):
         project_id = self.kwargs["project_pk"]
-        return Group.objects.filter(project_id=project_id)
+        queryset = Group.objects.filter(project_id=project_id)
+
+        expand = self.get_expand()
+        if "schedule" in expand:
+            queryset = queryset.select_related("schedule")
+        if "mentor" in expand:
+            queryset = queryset.select_related("mentor__profile__user")
+        if "events" in expand:
+            queryset = queryset.annotate(
+                events_count=Count("event"),
+                cancelled_events_count=Count("event", filter=Q(event__is_cancelled=True)),
+            )
+        return queryset
+
+    def get_expand(self):
+        """
+        Expansiones pedidas en ?expand=schedule,mentor,events (o ?expand=all).
+        """
+        if not hasattr(self, "_expand"):
+            raw = self.request.query_params.get("expand", "") if self.request else ""
+            values = {value.strip() for value in raw.split(",") if value.strip()}
+            if "all" in values:
+                values = set(GroupSerializer.EXPANSIONS)
+            invalid = values - set(GroupSerializer.EXPANSIONS)
+            if invalid:
+                raise ValidationError({
+                    "expand": f"Valores inválidos: {', '.join(sorted(invalid))}. "
+                              f"Opciones: {', '.join(GroupSerializer.EXPANSIONS)}, all"
+                })
+            self._expand = values
+        return self._expand
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["expand"] = self.get_expand()
+        return context
+
+    def get_etag_collections(self):
+        # Cada expansión agrega las colecciones de las que depende la respuesta
+        expand = self.get_expand()
+        collections = list(self.etag_collections)
+        if "schedule" in expand:
+            collections.append("schedules")
+        if "mentor" in expand:
+            collections += ["mentors", "profiles"]
+        if "events" in expand:
+            collections.append("events")
+        return collections
 
     def create(self, request, *args, **kwargs):
         """
@@ -35,13 +146,6 @@ class GroupViewSet(viewsets.ModelViewSet):
         """
         project_id = self.kwargs.get("project_pk")
         
-        # ✅ DEBUG: Ver qué datos llegan
-        import json
-        print("=" * 80)
-        print("📥 Request data recibida:")
-        print(json.dumps(request.data, indent=2, default=str))
-        print("=" * 80)
-        
         try:
             # Validar que el proyecto existe
             project = Project.objects.get(pk=project_id)
@@ -58,18 +162,6 @@ class GroupViewSet(viewsets.ModelViewSet):
             start_time_str = request.data.get('start_time')
             end_time_str = request.data.get('end_time')
             
-            # ✅ VALIDACIÓN: Imprimir valores recibidos
-            print("🔍 Valores extraídos:")
-            print(f"  mentor_id: {mentor_id} (type: {type(mentor_id)})")
-            print(f"  location: {location}")
-            print(f"  mode: {mode}")
-            print(f"  start_date_str: {start_date_str}")
-            print(f"  end_date_str: {end_date_str}")
-            print(f"  schedule_day: {schedule_day} (type: {type(schedule_day)})")
-            print(f"  start_time_str: {start_time_str}")
-            print(f"  end_time_str: {end_time_str}")
-            print("=" * 80)
-            
             # Validar campos requeridos
             if not all([mentor_id, location, start_date_str, end_date_str]):
                 missing = []
@@ -79,7 +171,6 @@ class GroupViewSet(viewsets.ModelViewSet):
                 if not end_date_str: missing.append('end_date')
                 
                 error_msg = f'Faltan campos requeridos: {", ".join(missing)}'
-                print(f"❌ ERROR: {error_msg}")
                 
                 return Response({
                     'error': error_msg,
@@ -97,7 +188,6 @@ class GroupViewSet(viewsets.ModelViewSet):
                 start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
                 end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
             except ValueError as e:
-                print(f"❌ ERROR de fecha: {e}")
                 return Response({
                     'error': f'Formato de fecha inválido: {str(e)}'
                 }, status=status.HTTP_400_BAD_REQUEST)
@@ -111,24 +201,26 @@ class GroupViewSet(viewsets.ModelViewSet):
             try:
                 from apps.mentors.models import Mentor
                 mentor = Mentor.objects.get(pk=mentor_id)
-                print(f"✅ Mentor encontrado: {mentor.pk}")
             except Mentor.DoesNotExist:
-                print(f"❌ ERROR: Mentor {mentor_id} no encontrado")
                 return Response({
                     'error': f'Mentor con ID {mentor_id} no encontrado'
                 }, status=status.HTTP_404_NOT_FOUND)
             
+            # Verificar que el mentor no tenga otro grupo en el mismo horario
+            conflict = self._mentor_conflict_response(
+                mentor.pk, schedule_day, start_time_str, end_time_str, start_date, end_date
+            )
+            if conflict:
+                return conflict
+            
             # 1. Buscar o crear Schedule
-            print(f"🔍 Buscando/creando Schedule: day={schedule_day}, start={start_time_str}, end={end_time_str}")
-            schedule, schedule_created = Schedule.objects.get_or_create(
+            schedule, schedule_created = ScheduleService.get_or_create(
                 day=int(schedule_day),
                 start_time=start_time_str,
                 end_time=end_time_str
             )
-            print(f"✅ Schedule {'creado' if schedule_created else 'encontrado'}: {schedule.pk}")
             
             # 2. Crear Grupo
-            print(f"🔍 Creando Group...")
             group = Group.objects.create(
                 project=project,
                 mentor_id=mentor_id,
@@ -138,10 +230,8 @@ class GroupViewSet(viewsets.ModelViewSet):
                 start_date=start_date,
                 end_date=end_date
             )
-            print(f"✅ Group creado: {group.pk}")
             
             # 3. 🔥 GENERAR EVENTOS AUTOMÁTICAMENTE
-            print(f"🔍 Generando eventos...")
             events_created = self._generate_events_for_group(
                 group=group,
                 schedule_day=int(schedule_day),
@@ -149,7 +239,6 @@ class GroupViewSet(viewsets.ModelViewSet):
                 end_date=end_date,
                 location=location
             )
-            print(f"✅ {events_created} eventos creados")
             
             # 4. Serializar y retornar respuesta
             serializer = self.get_serializer(group)
@@ -167,54 +256,46 @@ class GroupViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_201_CREATED)
             
         except Project.DoesNotExist:
-            print(f"❌ ERROR: Proyecto {project_id} no encontrado")
             return Response({
                 'error': f'Proyecto con ID {project_id} no encontrado'
             }, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             import traceback
             error_detail = traceback.format_exc()
-            print(f"❌ ERROR INESPERADO:")
-            print(error_detail)
+            logger.error(f"Error al crear grupo en el proyecto {project_id}:\n{error_detail}")
             return Response({
                 'error': f'Error al crear grupo: {str(e)}',
                 'detail': error_detail if DEBUG else None
             }, status=status.HTTP_400_BAD_REQUEST)
 
+    def _mentor_conflict_response(self, mentor_id, schedule_day, start_time, end_time,
+                                  start_date, end_date, exclude_group=None):
+        """
+        Retorna una respuesta 409 si el mentor ya tiene un grupo que se solapa
+        con el horario y rango de fechas indicados.
+        """
+        conflicts = workload_index.conflicts(
+            int(mentor_id), int(schedule_day), start_time, end_time,
+            start_date, end_date, exclude_group=exclude_group,
+        )
+        if not conflicts:
+            return None
+        return Response({
+            'error': f'El mentor {mentor_id} ya tiene grupos en ese horario',
+            'conflicting_groups': conflicts,
+        }, status=status.HTTP_409_CONFLICT)
+
     def _generate_events_for_group(self, group, schedule_day, start_date, end_date, location):
         """
         Genera eventos automáticamente para un grupo basado en su horario.
         """
-        # Encontrar el primer día que coincida con schedule_day
-        current_date = start_date
-        
-        # current_date.weekday() retorna 0=Lunes, 6=Domingo (igual que schedule_day)
-        while current_date.weekday() != schedule_day:
-            current_date += timedelta(days=1)
-            # Si superamos end_date sin encontrar el día, retornar 0
-            if current_date > end_date:
-                return 0
-        
-        # Crear eventos para cada ocurrencia del día especificado
-        events_created = 0
-        events_to_create = []
-        
-        while current_date <= end_date:
-            events_to_create.append(
-                Event(
-                    group=group,
-                    location=location,
-                    event_date=current_date,
-                )
-            )
-            events_created += 1
-            current_date += timedelta(days=7)  # Siguiente semana (mismo día)
-        
-        # Crear todos los eventos en una sola operación (bulk_create es más eficiente)
-        if events_to_create:
-            Event.objects.bulk_create(events_to_create)
-        
-        return events_created
+        return EventService.generate_events(
+            group=group,
+            schedule_day=schedule_day,
+            start_date=start_date,
+            end_date=end_date,
+            location=location
+        )
 
     def perform_create(self, serializer):
         """
@@ -223,9 +304,214 @@ class GroupViewSet(viewsets.ModelViewSet):
         """
         pass
 
+    @action(detail=False, methods=['post'])
+    def bulk(self, request, *args, **kwargs):
+        """
+        Crea varios grupos del proyecto y sus eventos en una sola transacción.
+
+        POST /api/projects/{project_id}/groups/bulk/
+        {
+            "groups": [
+                {
+                    "mentor": 2,
+                    "location": "Sala A",
+                    "mode": "presencial",
+                    "start_date": "2024-01-15",
+                    "end_date": "2024-06-15",
+                    "schedule_day": 0,
+                    "start_time": "08:00:00",
+                    "end_time": "10:00:00"
+                }
+            ]
+        }
+
+        Todas las filas se validan juntas: si alguna es inválida no se crea
+        ningún grupo y se retorna la lista de errores por índice.
+        """
+        project_id = self.kwargs.get("project_pk")
+        if not Project.objects.filter(pk=project_id).exists():
+            return Response({
+                'error': f'Proyecto con ID {project_id} no encontrado'
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        rows = request.data.get('groups') if isinstance(request.data, dict) else request.data
+        if not isinstance(rows, list) or not rows:
+            return Response({
+                'error': 'Se requiere una lista no vacía de grupos en "groups"'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        cleaned_rows = []
+        errors = {}
+        for index, row in enumerate(rows):
+            cleaned, row_errors = self._validate_bulk_row(row)
+            if row_errors:
+                errors[index] = row_errors
+            cleaned_rows.append(cleaned)
+
+        # Resolver todos los mentores con una sola consulta
+        from apps.mentors.models import Mentor
+        mentor_ids = {row['mentor'] for row in cleaned_rows if row.get('mentor') is not None}
+        existing_mentors = set(Mentor.objects.filter(pk__in=mentor_ids).values_list('pk', flat=True))
+        for index, row in enumerate(cleaned_rows):
+            if row.get('mentor') is not None and row['mentor'] not in existing_mentors:
+                errors.setdefault(index, {})['mentor'] = f"Mentor con ID {row['mentor']} no encontrado"
+
+        # Solapamientos con grupos existentes y entre filas del mismo lote
+        workload_index.ensure_current()
+        accepted = []
+        for index, row in enumerate(cleaned_rows):
+            if index in errors:
+                continue
+            key = (row['mentor'], row['schedule_day'], row['start_time'], row['end_time'], row['start_date'], row['end_date'])
+            conflicts = workload_index.conflicts(*key, ensure_current=False)
+            if conflicts:
+                errors[index] = {'mentor': f"El mentor ya tiene grupos en ese horario: {conflicts}"}
+                continue
+            for other_index, other in accepted:
+                if other[:2] == key[:2] and other[2] < key[3] and key[2] < other[3] \
+                        and other[4] <= key[5] and key[4] <= other[5]:
+                    errors[index] = {'mentor': f"Se solapa con la fila {other_index} del mismo mentor"}
+                    break
+            else:
+                accepted.append((index, key))
+
+        if errors:
+            return Response({
+                'error': f'{len(errors)} filas con errores, no se creó ningún grupo',
+                'errors': [
+                    {'index': index, 'errors': row_errors}
+                    for index, row_errors in sorted(errors.items())
+                ]
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            schedules = self._resolve_schedules(
+                {(row['schedule_day'], row['start_time'], row['end_time']) for row in cleaned_rows}
+            )
+
+            groups = Group.objects.bulk_create([
+                Group(
+                    project_id=project_id,
+                    mentor_id=row['mentor'],
+                    schedule=schedules[(row['schedule_day'], row['start_time'], row['end_time'])],
+                    location=row['location'],
+                    mode=row['mode'],
+                    start_date=row['start_date'],
+                    end_date=row['end_date'],
+                )
+                for row in cleaned_rows
+            ])
+
+            events_to_create = [
+                Event(group=group, location=group.location, event_date=event_date)
+                for group in groups
+                for event_date in EventService.recurrence_dates(
+                    group.schedule.day, group.start_date, group.end_date
+                )
+            ] if EventService.materialized() else []
+            Event.objects.bulk_create(events_to_create, batch_size=1000)
+            # bulk_create no emite señales: invalidar los ETag y ajustar el dashboard manualmente
+            VersionService.mark_changed('groups', 'schedules', 'events')
+            DashboardService.apply_delta(total_groups=len(groups))
+
+        serializer = self.get_serializer(groups, many=True)
+        return Response({
+            'groups_created': len(groups),
+            'events_created': len(events_to_create),
+            'groups': serializer.data,
+            'message': f'✅ {len(groups)} grupos creados con {len(events_to_create)} eventos generados automáticamente'
+        }, status=status.HTTP_201_CREATED)
+
+    def _validate_bulk_row(self, row):
+        """
+        Valida y normaliza una fila de creación masiva.
+        Retorna los datos limpios y un diccionario de errores por campo.
+        """
+        if not isinstance(row, dict):
+            return {}, {'non_field_errors': 'Cada grupo debe ser un objeto'}
+
+        errors = {}
+        for field in ('mentor', 'location', 'start_date', 'end_date', 'schedule_day', 'start_time', 'end_time'):
+            if row.get(field) in (None, ''):
+                errors[field] = 'Campo requerido'
+
+        present = {field: value for field, value in row.items() if field not in errors}
+        present.setdefault('mode', 'presencial')
+        cleaned, field_errors = self._clean_group_fields(present)
+        cleaned.setdefault('location', row.get('location'))
+        errors.update(field_errors)
+
+        if 'start_date' not in errors and 'end_date' not in errors and cleaned['end_date'] < cleaned['start_date']:
+            errors['end_date'] = 'La fecha de fin debe ser posterior a la fecha de inicio'
+
+        if 'start_time' not in errors and 'end_time' not in errors and cleaned['end_time'] <= cleaned['start_time']:
+            errors['end_time'] = 'La hora de fin debe ser posterior a la hora de inicio'
+
+        return cleaned, errors
+
+    def _clean_group_fields(self, data):
+        """
+        Convierte los campos de grupo presentes en `data` (mentor, location,
+        mode, schedule_day, fechas y horas) a sus tipos.
+        Retorna los datos limpios y un diccionario de errores por campo.
+        """
+        errors = {}
+        cleaned = {}
+
+        if 'location' in data:
+            cleaned['location'] = data['location']
+
+        if 'mentor' in data:
+            try:
+                cleaned['mentor'] = int(data['mentor'])
+            except (TypeError, ValueError):
+                errors['mentor'] = 'Debe ser un ID numérico'
+
+        if 'mode' in data:
+            cleaned['mode'] = data['mode']
+            if cleaned['mode'] not in dict(Group.CHOICES_MODE):
+                errors['mode'] = f"Modalidad inválida: {cleaned['mode']}"
+
+        if 'schedule_day' in data:
+            try:
+                cleaned['schedule_day'] = int(data['schedule_day'])
+                if not 0 <= cleaned['schedule_day'] <= 6:
+                    raise ValueError
+            except (TypeError, ValueError):
+                errors['schedule_day'] = 'Debe ser un entero entre 0 y 6'
+
+        for field in ('start_date', 'end_date'):
+            if field in data:
+                try:
+                    cleaned[field] = datetime.strptime(str(data[field]), '%Y-%m-%d').date()
+                except ValueError:
+                    errors[field] = 'Formato de fecha inválido, se espera YYYY-MM-DD'
+
+        for field in ('start_time', 'end_time'):
+            if field in data:
+                try:
+                    cleaned[field] = parse_time(str(data[field]))
+                except ValueError:
+                    cleaned[field] = None
+                if cleaned[field] is None:
+                    errors[field] = 'Formato de hora inválido, se espera HH:MM:SS'
+
+        return cleaned, errors
+
+    def _resolve_schedules(self, keys):
+        """
+        Obtiene los Schedule para cada (day, start_time, end_time) con una sola
+        consulta y crea los que falten en un solo INSERT.
+        """
+        return ScheduleService.resolve_many(keys)
+
     def update(self, request, *args, **kwargs):
         """
-        Actualiza un grupo y REGENERA todos sus eventos si cambió el horario.
+        Actualiza un grupo y sincroniza sus eventos si cambió el horario o las fechas.
+        
+        Solo se escriben las fechas afectadas: los eventos que siguen en la nueva
+        recurrencia se conservan (incluidas cancelaciones), los que cambian de día
+        dentro de la misma semana se mueven, y el resto se crea o elimina.
         
         Request body:
         {
@@ -239,66 +525,110 @@ class GroupViewSet(viewsets.ModelViewSet):
             "end_time": "12:00:00"
         }
         """
-        partial = kwargs.pop('partial', False)
         instance = self.get_object()
         
-        # Obtener datos del request
-        schedule_day = request.data.get('schedule_day')
-        start_time_str = request.data.get('start_time')
-        end_time_str = request.data.get('end_time')
-        start_date_str = request.data.get('start_date')
-        end_date_str = request.data.get('end_date')
-        
-        # Verificar si cambió el horario
-        schedule_changed = False
-        if schedule_day is not None or start_time_str or end_time_str:
-            schedule_changed = True
+        # Estado anterior para calcular la diferencia de recurrencias
+        old_schedule_day = instance.schedule.day if instance.schedule else None
+        old_start_date = instance.start_date
+        old_end_date = instance.end_date
+        old_location = instance.location
+        
+        # Solo los campos enviados (los vacíos se ignoran, como antes)
+        data = request.data if isinstance(request.data, dict) else {}
+        cleaned, errors = self._clean_group_fields({
+            field: data[field]
+            for field in ('mentor', 'location', 'mode', 'start_date', 'end_date', 'schedule_day', 'start_time', 'end_time')
+            if data.get(field) not in (None, '')
+        })
+        
+        # Los campos de horario que no se envían se toman del horario actual
+        schedule_changed = any(field in cleaned for field in ('schedule_day', 'start_time', 'end_time'))
+        if schedule_changed and not errors:
+            current = instance.schedule
+            slot = {
+                'schedule_day': cleaned.get('schedule_day', current.day if current else None),
+                'start_time': cleaned.get('start_time', current.start_time if current else None),
+                'end_time': cleaned.get('end_time', current.end_time if current else None),
+            }
+            for field, value in slot.items():
+                if value is None:
+                    errors[field] = 'Campo requerido: el grupo no tiene horario'
+            if not errors and slot['end_time'] <= slot['start_time']:
+                errors['end_time'] = 'La hora de fin debe ser posterior a la hora de inicio'
+        
+        if 'mentor' in cleaned:
+            from apps.mentors.models import Mentor
+            if not Mentor.objects.filter(pk=cleaned['mentor']).exists():
+                errors['mentor'] = f"Mentor con ID {cleaned['mentor']} no encontrado"
+        
+        start_date = cleaned.get('start_date', instance.start_date)
+        end_date = cleaned.get('end_date', instance.end_date)
+        if 'start_date' not in errors and 'end_date' not in errors and end_date < start_date:
+            errors['end_date'] = 'La fecha de fin debe ser posterior a la fecha de inicio'
+        
+        if errors:
+            return Response({
+                'error': 'Datos inválidos',
+                'errors': errors,
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        with transaction.atomic():
+            if schedule_changed:
+                instance.schedule, _ = ScheduleService.get_or_create(
+                    day=slot['schedule_day'],
+                    start_time=slot['start_time'],
+                    end_time=slot['end_time']
+                )
+            
+            # Actualizar otros campos
+            if 'mentor' in cleaned:
+                instance.mentor_id = cleaned['mentor']
+            if 'location' in cleaned:
+                instance.location = cleaned['location']
+            if 'mode' in cleaned:
+                instance.mode = cleaned['mode']
+            instance.start_date = start_date
+            instance.end_date = end_date
+            dates_changed = 'start_date' in cleaned or 'end_date' in cleaned
             
-            # Buscar o crear nuevo schedule
-            if schedule_day and start_time_str and end_time_str:
-                new_schedule, _ = Schedule.objects.get_or_create(
-                    day=int(schedule_day),
-                    start_time=start_time_str,
-                    end_time=end_time_str
+            # Verificar solapamientos si cambió el mentor, el horario o las fechas
+            if instance.mentor_id and instance.schedule and (
+                schedule_changed or 'mentor' in cleaned or dates_changed
+            ):
+                conflict = self._mentor_conflict_response(
+                    instance.mentor_id, instance.schedule.day,
+                    instance.schedule.start_time, instance.schedule.end_time,
+                    instance.start_date, instance.end_date, exclude_group=instance.pk,
                 )
-                instance.schedule = new_schedule
-        
-        # Actualizar otros campos
-        if request.data.get('mentor'):
-            instance.mentor_id = request.data['mentor']
-        if request.data.get('location'):
-            instance.location = request.data['location']
-        if request.data.get('mode'):
-            instance.mode = request.data['mode']
-        if start_date_str:
-            instance.start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-        if end_date_str:
-            instance.end_date = datetime.strptime(end_date_str, '%Y-%m-%d').date()
-        
-        instance.save()
-        
-        # Si cambió el horario o fechas, REGENERAR eventos
-        if schedule_changed or start_date_str or end_date_str:
-            # 1. Eliminar eventos antiguos
-            old_events_count = instance.event_set.count()
-            instance.event_set.all().delete()
+                if conflict:
+                    transaction.set_rollback(True)
+                    return conflict
             
-            # 2. Generar nuevos eventos
-            new_events_count = self._generate_events_for_group(
-                group=instance,
-                schedule_day=instance.schedule.day,
-                start_date=instance.start_date,
-                end_date=instance.end_date,
-                location=instance.location
-            )
+            instance.save()
             
-            serializer = self.get_serializer(instance)
-            return Response({
-                **serializer.data,
-                'events_deleted': old_events_count,
-                'events_created': new_events_count,
-                'message': f'✅ Grupo actualizado. {old_events_count} eventos eliminados, {new_events_count} eventos creados'
-            })
+            # Si cambió el horario o fechas, sincronizar eventos de forma incremental
+            if schedule_changed or dates_changed:
+                result = EventService.regenerate_events(
+                    group=instance,
+                    old_schedule_day=old_schedule_day,
+                    old_start_date=old_start_date,
+                    old_end_date=old_end_date,
+                    old_location=old_location
+                )
+                
+                serializer = self.get_serializer(instance)
+                return Response({
+                    **serializer.data,
+                    'events_kept': result['kept'],
+                    'events_moved': result['moved'],
+                    'events_deleted': result['deleted'],
+                    'events_created': result['created'],
+                    'message': (
+                        f"✅ Grupo actualizado. {result['kept']} eventos conservados, "
+                        f"{result['moved']} movidos, {result['deleted']} eliminados, "
+                        f"{result['created']} creados"
+                    )
+                })
         
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
@@ -377,10 +707,12 @@ class EventViewSet(viewsets.ModelViewSet):
         })
 
 
-class EventListViewSet(mixins.ListModelMixin,
+class EventListViewSet(ConditionalGetMixin,
+                       mixins.ListModelMixin,
                        mixins.RetrieveModelMixin,
                        viewsets.GenericViewSet):
     serializer_class = EventListSerializer
+    etag_collections = ('events', 'groups', 'schedules', 'projects', 'mentors', 'profiles')
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['event_date', 'group', 'group__project']
     ordering_fields = ['event_date', 'group__schedule__start_time']
@@ -404,4 +736,183 @@ class EventListViewSet(mixins.ListModelMixin,
         if date_to:
             queryset = queryset.filter(event_date__lte=date_to)
         
-        return queryset.order_by('event_date', 'group__schedule__start_time')
\ No newline at end of file
+        return queryset.order_by('event_date', 'group__schedule__start_time')
+
+    def list(self, request, *args, **kwargs):
+        """
+        Lista eventos para el calendario.
+        
+        En modo de recurrencia virtual (settings.EVENTS_RECURRENCE_MODE = "virtual"
+        o ?recurrence=virtual) las ocurrencias semanales se calculan a partir del
+        horario y las fechas de cada grupo para el rango solicitado, y se combinan
+        con los eventos guardados (cancelaciones, cambios de ubicación y eventos
+        puntuales). Las ocurrencias calculadas tienen `is_virtual: true` y un id
+        con formato "{group_id}-{YYYYMMDD}", que no se puede consultar en el
+        detalle. El rango se limita a EVENTS_VIRTUAL_MAX_DAYS días: los extremos
+        ausentes se completan hasta ese largo y un rango mayor retorna 400.
+        """
+        mode = request.query_params.get('recurrence')
+        if mode is None:
+            mode = 'materialized' if EventService.materialized() else 'virtual'
+        if mode != 'virtual':
+            return self._list_rows()
+        
+        try:
+            date_from, date_to = self._requested_window()
+        except ValueError as e:
+            return Response({
+                'error': f'Formato de fecha inválido: {str(e)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Las ocurrencias se expanden en memoria: acotar el rango
+        max_days = getattr(settings, 'EVENTS_VIRTUAL_MAX_DAYS', 366)
+        if date_from is None and date_to is None:
+            date_from = timezone.localdate() - timedelta(days=max_days // 2)
+        if date_to is None:
+            date_to = date_from + timedelta(days=max_days - 1)
+        elif date_from is None:
+            date_from = date_to - timedelta(days=max_days - 1)
+        if (date_to - date_from).days >= max_days:
+            return Response({
+                'error': f'El rango de fechas no puede superar {max_days} días'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        filters_by_id = {}
+        for param in ('group', 'group__project'):
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    filters_by_id[param] = int(value)
+                except ValueError:
+                    return Response({
+                        'error': f'{param} debe ser un número entero'
+                    }, status=status.HTTP_400_BAD_REQUEST)
+        
+        groups = Group.objects.select_related(
+            'schedule',
+            'project',
+            'mentor',
+            'mentor__profile',
+            'mentor__profile__user'
+        )
+        if 'group' in filters_by_id:
+            groups = groups.filter(pk=filters_by_id['group'])
+        if 'group__project' in filters_by_id:
+            groups = groups.filter(project_id=filters_by_id['group__project'])
+        groups = list(groups.filter(end_date__gte=date_from, start_date__lte=date_to))
+        
+        stored_events = Event.objects.filter(
+            group__in=[group.id for group in groups],
+            event_date__gte=date_from,
+            event_date__lte=date_to,
+        )
+        
+        # Reutilizar los grupos ya cargados en lugar de volver a unir las tablas
+        groups_by_id = {group.id: group for group in groups}
+        stored_events = list(stored_events)
+        for event in stored_events:
+            event.group = groups_by_id[event.group_id]
+        
+        occurrences = EventService.expand_occurrences(groups, stored_events, date_from, date_to)
+        
+        page = self.paginate_queryset(occurrences)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(occurrences, many=True)
+        return Response(serializer.data)
+
+    def get_etag_parts(self):
+        # Sin rango, el listado virtual se centra en hoy
+        params = self.request.query_params
+        if not any(params.get(name) for name in ('event_date', 'event_date__gte', 'event_date__lte')):
+            return [timezone.localdate().isoformat()]
+        return []
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Detalle de un evento guardado. Las ocurrencias virtuales
+        ("{group_id}-{YYYYMMDD}") no tienen fila propia: se consultan en el
+        listado con ?group=<id>&event_date=<YYYY-MM-DD>.
+        """
+        if not str(kwargs.get(self.lookup_field, '')).isdigit():
+            return Response({
+                'error': 'Las ocurrencias virtuales no tienen detalle; '
+                         'usar /api/events/?group=<id>&event_date=<YYYY-MM-DD>'
+            }, status=status.HTTP_404_NOT_FOUND)
+        return super().retrieve(request, *args, **kwargs)
+
+    def _list_rows(self):
+        """
+        Ruta rápida del listado: una sola consulta con values() y
+        EventListRowSerializer, sin instanciar modelos.
+        
+        Con ?cursor= se usa paginación por keyset (sin COUNT ni OFFSET)
+        ordenada por fecha, hora de inicio e id.
+        """
+        queryset = EventListRowSerializer.values(self.filter_queryset(self.get_queryset()))
+        
+        if EventKeysetPagination.cursor_query_param in self.request.query_params:
+            self._paginator = EventKeysetPagination()
+        
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(EventListRowSerializer.to_list(page))
+        return Response(EventListRowSerializer.to_list(queryset))
+
+    @action(detail=False, methods=['get'])
+    def export(self, request, *args, **kwargs):
+        """
+        Exporta todos los eventos filtrados como respuesta en streaming,
+        sin paginación ni COUNT y con memoria constante.
+        
+        GET /api/events/export/?event_date__gte=2024-01-01&event_date__lte=2024-12-31
+        GET /api/events/export/?output=ndjson
+        
+        `output=json` (por defecto) retorna un arreglo JSON; `output=ndjson`
+        retorna un evento por línea.
+        """
+        output = request.query_params.get('output', 'json')
+        if output not in ('json', 'ndjson'):
+            return Response({
+                'error': 'output debe ser "json" o "ndjson"'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        queryset = EventListRowSerializer.values(self.filter_queryset(self.get_queryset()))
+        rows = (
+            EventListRowSerializer.to_representation(row)
+            for row in EventKeysetPagination.order_queryset(queryset).iterator(chunk_size=2000)
+        )
+        
+        if output == 'ndjson':
+            content = (json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in rows)
+            content_type = 'application/x-ndjson'
+        else:
+            content = self._stream_json_array(rows)
+            content_type = 'application/json'
+        
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="events.{output}"'
+        return response
+
+    def _stream_json_array(self, rows):
+        yield '['
+        separator = ''
+        for row in rows:
+            yield separator + json.dumps(row, cls=DjangoJSONEncoder)
+            separator = ','
+        yield ']'
+
+    def _requested_window(self):
+        """
+        Retorna el rango (date_from, date_to) pedido por query params.
+        `event_date` fija ambos extremos; los extremos ausentes son None.
+        """
+        params = self.request.query_params
+        exact = params.get('event_date')
+        date_from = params.get('event_date__gte') or exact
+        date_to = params.get('event_date__lte') or exact
+        
+        date_from = datetime.strptime(date_from, '%Y-%m-%d').date() if date_from else None
+        date_to = datetime.strptime(date_to, '%Y-%m-%d').date() if date_to else None
+        return date_from, date_to
\ No newline at end of file
@@ -0,0 +1,104 @@
+import logging
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from apps.users.permissions import get_user_state
+
+logger = logging.getLogger(__name__)
+
+ROLE_CLAIM = "role"
+PROFILE_ID_CLAIM = "profile_id"
+
+
+def set_profile_claims(token, role, profile_id):
+    if role is None:
+        token.payload.pop(ROLE_CLAIM, None)
+        token.payload.pop(PROFILE_ID_CLAIM, None)
+        return
+    token[ROLE_CLAIM] = role
+    token[PROFILE_ID_CLAIM] = profile_id
+
+
+class RoleRefreshToken(RefreshToken):
+    """
+    Refresh token that carries the user's `role` and `profile_id` as signed
+    claims. Access tokens derived from it copy those claims.
+
+    On refresh the claims are re-read from the database, so a role change is
+    picked up by the next access token (at most ACCESS_TOKEN_LIFETIME later).
+    """
+
+    def __init__(self, token=None, verify=True):
+        super().__init__(token, verify)
+        if token is not None:
+            from apps.users.models import Profile
+
+            profile = Profile.objects.filter(user_id=self.payload.get("user_id")).values_list("role", "id").first()
+            set_profile_claims(self, *(profile or (None, None)))
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        profile = getattr(user, "profile", None)
+        set_profile_claims(token, getattr(profile, "role", None), getattr(profile, "id", None))
+        return token
+
+
+class RoleTokenUser(TokenUser):
+    """
+    Stateless user backed by the validated access token. `role` and
+    `profile_id` are the current ones of the user, checked by
+    StatelessRoleJWTAuthentication, not the token claims.
+    """
+
+    def __init__(self, token, role=None, profile_id=None):
+        super().__init__(token)
+        self._role = role
+        self._profile_id = profile_id
+
+    @property
+    def role(self):
+        return self._role
+
+    @property
+    def profile_id(self):
+        return self._profile_id
+
+
+class StatelessRoleJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Default authentication: validates the JWT and returns a RoleTokenUser
+    without loading the User. Whether the user still exists and is active,
+    and its current role, come from the cached user state (no query on a
+    hit), so a deactivated, deleted or demoted user loses its access within
+    ROLE_CACHE_TIMEOUT seconds instead of the access-token lifetime. Views
+    that need the real User instance (password changes, profile data) use
+    RoleJWTAuthentication instead.
+    """
+
+    def get_user(self, validated_token):
+        super().get_user(validated_token)
+        role, profile_id, is_active = get_user_state(validated_token[api_settings.USER_ID_CLAIM])
+        if not is_active:
+            raise AuthenticationFailed("User is inactive or no longer exists", code="user_inactive")
+        if validated_token.get(ROLE_CLAIM) not in (None, role):
+            logger.info(f"Role claim of user {validated_token[api_settings.USER_ID_CLAIM]} is outdated, using {role}")
+        return RoleTokenUser(validated_token, role, profile_id)
+
+
+class RoleJWTAuthentication(JWTAuthentication):
+    """
+    Loads the real User from the database (rejecting inactive users) and
+    attaches its `role` and `profile_id` read from the database, never
+    from the token claims.
+    """
+
+    def get_user(self, validated_token):
+        from apps.users.models import Profile
+
+        user = super().get_user(validated_token)
+        profile = Profile.objects.filter(user_id=user.pk).values_list("role", "id").first()
+        user.role, user.profile_id = profile or (None, None)
+        return user
@@ -0,0 +1,14 @@
+import logging
+from huey.contrib.djhuey import db_task
+from apps.users.services.photos import ProfilePhotoService
+
+logger = logging.getLogger(__name__)
+
+
+@db_task(retries=2, retry_delay=30)
+def process_profile_photo(profile_id, name):
+    try:
+        if ProfilePhotoService.process(profile_id, name):
+            logger.info(f"Profile photo {name} processed")
+    except ValueError as e:
+        logger.warning(f"Invalid profile photo of profile {profile_id}: {e}")
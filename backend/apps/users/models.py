@@ -25,6 +25,8 @@ class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="profile")
     phone = models.CharField(max_length=20, null=True, blank=True)
     photo = models.ImageField(upload_to=generateProfilePhotoPath, null=True, blank=True)
+    # {"64": {"webp": path, "jpeg": path}, ...}, escrito por ProfilePhotoService
+    photo_variants = models.JSONField(default=dict, blank=True)
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='Usuario base')
     
     class Meta:
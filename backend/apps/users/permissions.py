@@ -1,5 +1,109 @@
+import logging
+from functools import lru_cache
+from django.conf import settings
+from django.core.cache import cache
 from rest_framework import permissions
 
+logger = logging.getLogger(__name__)
+
+USER_STATE_CACHE_KEY = "user-state:{}"
+
+
+def get_user_state(user_id):
+    """
+    Returns (role, profile_id, is_active) of the user `user_id` from a
+    short-TTL cache entry (ROLE_CACHE_TIMEOUT seconds) or one query;
+    (None, None, False) if the user no longer exists. The entry is dropped
+    whenever the user or its profile changes (see apps.users.signals).
+    """
+    key = USER_STATE_CACHE_KEY.format(user_id)
+    state = cache.get(key)
+    if state is None:
+        from django.contrib.auth.models import User
+
+        state = User.objects.filter(pk=user_id).values_list("profile__role", "profile__id", "is_active").first()
+        state = tuple(state) if state else (None, None, False)
+        cache.set(key, state, getattr(settings, "ROLE_CACHE_TIMEOUT", 60))
+    return state
+
+
+def get_user_role(user):
+    """
+    Returns the current role of `user`: the one the authentication class
+    checked against the database, the already-loaded profile, or the
+    cached user state. The `role` token claim alone is never trusted, so a
+    role change applies within ROLE_CACHE_TIMEOUT seconds.
+    """
+    if not user or not user.is_authenticated:
+        return None
+
+    # Rol verificado al autenticar (RoleTokenUser / RoleJWTAuthentication)
+    role = getattr(user, "role", None)
+    if role:
+        return role
+
+    profile_descriptor = getattr(type(user), "profile", None)
+    if profile_descriptor is not None and profile_descriptor.is_cached(user):
+        return user.profile.role
+
+    return get_user_state(user.pk)[0]
+
+
+def invalidate_user_state(user_id):
+    cache.delete(USER_STATE_CACHE_KEY.format(user_id))
+
+
+class _PermissionNode:
+    __slots__ = ("children", "wildcard")
+
+    def __init__(self):
+        self.children = {}
+        self.wildcard = False
+
+
+class CompiledRolePermissions:
+    """
+    ROLE_PERMISSIONS compiled once per role into a set of exact permissions
+    plus a prefix trie for module wildcards ('academic.*', '*').
+    """
+
+    def __init__(self, role_permissions):
+        self.exact = {}
+        self.tries = {}
+        for role, perms in role_permissions.items():
+            root = _PermissionNode()
+            exact = set()
+            for perm in perms:
+                if perm == "*" or perm.endswith(".*"):
+                    node = root
+                    for segment in perm[:-1].split(".")[:-1]:
+                        node = node.children.setdefault(segment, _PermissionNode())
+                    node.wildcard = True
+                else:
+                    exact.add(perm)
+            self.exact[role] = frozenset(exact)
+            self.tries[role] = root
+        self.has_perm = lru_cache(maxsize=1024)(self._has_perm)
+
+    def _has_perm(self, role, perm):
+        if perm in self.exact.get(role, ()):
+            return True
+        node = self.tries.get(role)
+        if node is None:
+            return False
+        if node.wildcard:
+            return True
+        if not isinstance(perm, str):
+            return False
+        for segment in perm.split(".")[:-1]:
+            node = node.children.get(segment)
+            if node is None:
+                return False
+            if node.wildcard:
+                return True
+        return False
+
+
 class RolePermission(permissions.BasePermission):
     """
     Permission class based on user roles.
@@ -46,78 +150,33 @@ class RolePermission(permissions.BasePermission):
         """
         Check if user has permission to access the view.
         """
-        import logging
-        logger = logging.getLogger(__name__)
-        
         # Verificar autenticación
         if not request.user or not request.user.is_authenticated:
-            logger.warning("❌ User not authenticated")
             return False
         
-        # Obtener rol del usuario
-        try:
-            user_role = request.user.profile.role
-            logger.info(f"✅ User {request.user.username} has role: {user_role}")
-        except Exception as e:
-            logger.error(f"❌ Error getting user role: {e}")
+        user_role = get_user_role(request.user)
+        if user_role is None:
+            logger.warning(f"❌ User {request.user.pk} has no profile")
             return False
         
         # SuperAdmin tiene acceso a todo
         if user_role == 'SuperAdmin':
-            logger.info(f"✅ SuperAdmin access granted")
             return True
         
-        # Obtener permiso requerido
-        required_permission = getattr(view, 'required_permission', None)
-        
-        # Si es callable, ejecutarlo
-        if callable(required_permission):
-            try:
-                required_permission = required_permission()
-            except Exception as e:
-                logger.error(f"❌ Error calling required_permission: {e}")
-                required_permission = None
-        
-        logger.info(f"🔍 Required permission: {required_permission}")
+        required_permission = self.get_required_permission(view)
         
         # Si no requiere permiso específico, permitir
         if not required_permission:
-            logger.info("✅ No specific permission required, access granted")
-            return True
-        
-        # Obtener permisos del rol
-        user_permissions = self.ROLE_PERMISSIONS.get(user_role, [])
-        logger.info(f"🔍 User permissions: {user_permissions}")
-        
-        # Verificar wildcard
-        if '*' in user_permissions:
-            logger.info("✅ Wildcard permission, access granted")
             return True
         
-        # Verificar permiso exacto
-        if required_permission in user_permissions:
-            logger.info(f"✅ Exact permission match: {required_permission}")
+        if has_perm(user_role, required_permission):
             return True
         
-        # Verificar wildcards de módulo (e.g., 'academic.*' matches 'academic.read')
-        for perm in user_permissions:
-            if perm.endswith('.*'):
-                module = perm.replace('.*', '')
-                if isinstance(required_permission, str) and required_permission.startswith(module + '.'):
-                    logger.info(f"✅ Module wildcard match: {perm} covers {required_permission}")
-                    return True
-        
-        # Acceso denegado
         logger.warning(
-            f"❌ PERMISSION DENIED\n"
-            f"   User: {request.user.username}\n"
-            f"   Role: {user_role}\n"
-            f"   Required: {required_permission}\n"
-            f"   Available: {user_permissions}\n"
-            f"   View: {view.__class__.__name__}\n"
-            f"   Action: {getattr(view, 'action', 'N/A')}"
+            f"❌ PERMISSION DENIED user={request.user.pk} role={user_role} "
+            f"required={required_permission} view={view.__class__.__name__} "
+            f"action={getattr(view, 'action', 'N/A')}"
         )
-        
         return False
     
     def has_object_permission(self, request, view, obj):
@@ -127,30 +186,48 @@ class RolePermission(permissions.BasePermission):
         if not request.user or not request.user.is_authenticated:
             return False
         
-        try:
-            user_role = request.user.profile.role
-        except:
+        user_role = get_user_role(request.user)
+        if user_role is None:
             return False
         
-        # SuperAdmin tiene acceso a todo
-        if user_role == 'SuperAdmin':
-            return True
-        
-        # Admin tiene acceso a la mayoría de objetos
-        if user_role == 'Admin':
+        # SuperAdmin y Admin tienen acceso a la mayoría de objetos
+        if user_role in ('SuperAdmin', 'Admin'):
             return True
         
         # Para otros roles, verificar ownership si aplica
-        required_permission = getattr(view, 'required_permission', '')
+        required_permission = self.get_required_permission(view) or ''
         
         if '_own' in required_permission:
             # Verificar si el objeto pertenece al usuario
-            if hasattr(obj, 'user'):
-                return obj.user == request.user
-            elif hasattr(obj, 'profile') and hasattr(obj.profile, 'user'):
-                return obj.profile.user == request.user
+            if hasattr(obj, 'user_id'):
+                return obj.user_id == request.user.pk
+            elif hasattr(obj, 'profile') and hasattr(obj.profile, 'user_id'):
+                return obj.profile.user_id == request.user.pk
         
-        return self.has_permission(request, view)
+        return has_perm(user_role, required_permission) if required_permission else True
+    
+    @staticmethod
+    def get_required_permission(view):
+        required_permission = getattr(view, 'required_permission', None)
+        
+        # Si es callable, ejecutarlo
+        if callable(required_permission):
+            try:
+                required_permission = required_permission()
+            except Exception as e:
+                logger.error(f"❌ Error calling required_permission: {e}")
+                required_permission = None
+        return required_permission
+
+
+_compiled = CompiledRolePermissions(RolePermission.ROLE_PERMISSIONS)
+
+
+def has_perm(role, perm):
+    """
+    Fast check of `perm` for `role` against the compiled ROLE_PERMISSIONS.
+    """
+    return _compiled.has_perm(role, perm)
 
 
 class IsOwnerOrAdmin(permissions.BasePermission):
@@ -164,12 +241,8 @@ class IsOwnerOrAdmin(permissions.BasePermission):
             return True
         
         # Check if user is admin
-        try:
-            user_role = request.user.profile.role
-            if user_role in ['SuperAdmin', 'Admin']:
-                return True
-        except:
-            pass
+        if get_user_role(request.user) in ['SuperAdmin', 'Admin']:
+            return True
         
         # Check ownership
         if hasattr(obj, 'user'):
@@ -1,6 +1,10 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 from django.contrib.auth.models import User
+from apps.core.services.media import MediaAccessService
+from .authentication import RoleRefreshToken
 from .models import Profile
+from .services.photos import ProfilePhotoService
 
 class UserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -58,18 +62,16 @@ class ProfileSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         """
         Returns a flat representation of the profile with user data,
-        absolute URL for the photo if it exists, and role information.
+        absolute URL for the photo and its size variants if it exists,
+        and role information.
         """
         request = self.context.get("request")
         
         user = instance.user
         
         photo_url = None
-        if instance.photo and hasattr(instance.photo, "url"):
-            if request:
-                photo_url = request.build_absolute_uri(instance.photo.url)
-            else:
-                photo_url = instance.photo.url
+        if instance.photo:
+            photo_url = MediaAccessService.url(instance.photo.name, request)
         
         return {
             "id": instance.id,
@@ -82,9 +84,19 @@ class ProfileSerializer(serializers.ModelSerializer):
             },
             "phone": instance.phone,
             "photo": photo_url,
+            "photo_variants": ProfilePhotoService.variant_urls(instance, request),
             "role": instance.role,
         }
 
 class ChangePasswordSerializer(serializers.Serializer):
     old_password = serializers.CharField(required=True)
-    new_password = serializers.CharField(required=True)
\ No newline at end of file
+    new_password = serializers.CharField(required=True)
+
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Login: issues tokens with `role` and `profile_id` claims."""
+    token_class = RoleRefreshToken
+
+
+class RoleTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh: re-reads `role` and `profile_id` into the new access token."""
+    token_class = RoleRefreshToken
@@ -0,0 +1,164 @@
+import logging
+import os
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilePhotoService:
+    """
+    Image pipeline of Profile.photo.
+
+    The uploaded original is replaced by a re-encoded JPEG bounded to
+    PROFILE_PHOTO_MAX_SIZE pixels, and square 64/256/512px variants are
+    written to the same folder in WebP and JPEG (named by content hash
+    with ContentAddressedStorage, so equal photos share their files).
+
+    Neither keeps EXIF metadata (GPS, camera...). Orientation is applied
+    to the pixels before it is dropped. Profile.photo_variants stores the
+    variant paths; it is empty while the photo is being processed.
+    """
+
+    SIZES = (64, 256, 512)
+    FORMATS = {
+        "webp": ("WEBP", {"quality": 80, "method": 4}),
+        "jpeg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+    }
+    EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+
+    @staticmethod
+    def _stem(name):
+        return os.path.splitext(name)[0]
+
+    @staticmethod
+    def variant_name(name, size, fmt):
+        return f"{ProfilePhotoService._stem(name)}_{size}.{ProfilePhotoService.EXTENSIONS[fmt]}"
+
+    @staticmethod
+    def _encode(image, fmt):
+        pil_format, options = ProfilePhotoService.FORMATS[fmt]
+        buffer = BytesIO()
+        image.save(buffer, pil_format, **options)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _load(name):
+        with default_storage.open(name, "rb") as source:
+            image = Image.open(source)
+            image = ImageOps.exif_transpose(image)
+            if image.mode in ("RGBA", "LA", "P"):
+                # JPEG no tiene transparencia: aplanar sobre blanco
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel("A"))
+                return background
+            return image.convert("RGB")
+
+    @staticmethod
+    def render(name) -> dict:
+        """
+        Writes the bounded original and the variants of the photo stored at
+        `name`. Returns {"photo": new name, "variants": {size: {fmt: name}}}.
+        Raises ValueError if the file is not a readable image.
+        """
+        try:
+            image = ProfilePhotoService._load(name)
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+            raise ValueError(f"No se pudo leer la imagen {name}: {e}")
+
+        max_size = getattr(settings, "PROFILE_PHOTO_MAX_SIZE", 1024)
+        bounded = image.copy()
+        bounded.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+        photo_name = ProfilePhotoService._save(
+            f"{ProfilePhotoService._stem(name)}.jpg", ProfilePhotoService._encode(bounded, "jpeg")
+        )
+
+        variants = {}
+        for size in ProfilePhotoService.SIZES:
+            square = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            variants[str(size)] = {
+                fmt: ProfilePhotoService._save(
+                    ProfilePhotoService.variant_name(photo_name, size, fmt), ProfilePhotoService._encode(square, fmt)
+                )
+                for fmt in ProfilePhotoService.FORMATS
+            }
+        return {"photo": photo_name, "variants": variants}
+
+    @staticmethod
+    def _save(name, content):
+        # El storage decide el nombre final (sufijo si ya existe, o la ruta por contenido)
+        return default_storage.save(name, ContentFile(content))
+
+    @staticmethod
+    def process(profile_id, name) -> bool:
+        """
+        Renders the photo `name` of a profile and stores the result, unless
+        the profile changed its photo in the meantime (then the rendered
+        files are discarded). Returns True if the profile was updated.
+        """
+        from apps.core.services.file_cleanup import FileCleanupService
+        from apps.core.services.versions import VersionService
+        from apps.users.models import Profile
+
+        result = ProfilePhotoService.render(name)
+        with transaction.atomic():
+            updated = Profile.objects.filter(pk=profile_id, photo=name).update(
+                photo=result["photo"], photo_variants=result["variants"]
+            )
+            if updated:
+                # Cada save del storage suma una referencia: liberar la del original
+                FileCleanupService.schedule(name)
+        if not updated:
+            # Nadie llegó a referenciar estos archivos: borrarlos ya
+            for path in [result["photo"], *ProfilePhotoService.variant_files(result["variants"])]:
+                try:
+                    default_storage.delete(path)
+                except OSError:
+                    logger.warning(f"Could not delete {path}")
+            return False
+
+        # update() no emite señales: invalidar los ETag de perfiles y mentores
+        VersionService.mark_changed("profiles")
+        return True
+
+    @staticmethod
+    def variant_files(variants) -> list:
+        return [path for formats in (variants or {}).values() for path in formats.values()]
+
+    @staticmethod
+    def enqueue(profile_id, name) -> bool:
+        """
+        Hands the photo to the Huey worker. Without a reachable queue the
+        photo is processed in the current request; returns True in that case.
+        """
+        from apps.users.events.periodic import process_profile_photo
+
+        try:
+            process_profile_photo(profile_id, name)
+        except Exception:
+            logger.warning(f"Could not enqueue processing of profile photo {name}, processing inline")
+            try:
+                return ProfilePhotoService.process(profile_id, name)
+            except ValueError as e:
+                logger.warning(f"Invalid profile photo of profile {profile_id}: {e}")
+        return False
+
+    @staticmethod
+    def variant_urls(profile, request=None):
+        """
+        Returns {size: {fmt: url}} of a profile photo, or None while it has
+        not been processed.
+        """
+        from apps.core.services.media import MediaAccessService
+
+        if not profile.photo or not profile.photo_variants:
+            return None
+        return {
+            size: {fmt: MediaAccessService.url(name, request) for fmt, name in formats.items()}
+            for size, formats in profile.photo_variants.items()
+        }
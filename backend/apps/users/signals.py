@@ -0,0 +1,73 @@
+from functools import partial
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
+from apps.core.services.file_cleanup import FileCleanupService
+from apps.users.models import Profile
+from apps.users.permissions import invalidate_user_state
+from apps.users.services.photos import ProfilePhotoService
+
+
+def _invalidate_state(user_id):
+    # Ahora y al confirmar: una lectura concurrente pudo cachear el estado anterior
+    invalidate_user_state(user_id)
+    transaction.on_commit(partial(invalidate_user_state, user_id))
+
+
+def _profile_changed(sender, instance, **kwargs):
+    _invalidate_state(instance.user_id)
+
+
+def _user_changed(sender, instance, update_fields=None, **kwargs):
+    # El login solo actualiza last_login
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    _invalidate_state(instance.pk)
+
+
+def _photo_changing(sender, instance, **kwargs):
+    # Una foto recién subida todavía no está escrita en el storage
+    uploaded = bool(instance.photo) and not instance.photo._committed
+    instance._photo_uploaded = uploaded
+    if not instance.pk:
+        return
+    stored = Profile.objects.filter(pk=instance.pk).values("photo", "photo_variants").first()
+    if stored is None:
+        return
+
+    if uploaded or not instance.photo:
+        instance.photo_variants = {}
+        if stored["photo_variants"]:
+            FileCleanupService.schedule(*ProfilePhotoService.variant_files(stored["photo_variants"]))
+    elif not instance.photo_variants and stored["photo_variants"]:
+        # La instancia se leyó antes de que el worker procesara la foto:
+        # conservar la foto re-codificada y sus variantes
+        instance.photo.name = stored["photo"]
+        instance.photo_variants = stored["photo_variants"]
+
+
+def _photo_saved(sender, instance, **kwargs):
+    if getattr(instance, "_photo_uploaded", False):
+        instance._photo_uploaded = False
+        transaction.on_commit(partial(_process_photo, instance, instance.photo.name))
+
+
+def _process_photo(instance, name):
+    if ProfilePhotoService.enqueue(instance.pk, name):
+        # Procesada en esta petición: la respuesta debe usar la foto nueva
+        instance.refresh_from_db(fields=["photo", "photo_variants"])
+
+
+def _photo_deleted(sender, instance, **kwargs):
+    if instance.photo_variants:
+        FileCleanupService.schedule(*ProfilePhotoService.variant_files(instance.photo_variants))
+
+
+def register():
+    post_save.connect(_profile_changed, sender=Profile, dispatch_uid="role-cache-save-profile")
+    post_delete.connect(_profile_changed, sender=Profile, dispatch_uid="role-cache-delete-profile")
+    post_save.connect(_user_changed, sender=User, dispatch_uid="role-cache-save-user")
+    post_delete.connect(_user_changed, sender=User, dispatch_uid="role-cache-delete-user")
+    pre_save.connect(_photo_changing, sender=Profile, dispatch_uid="photo-variants-presave-profile")
+    post_save.connect(_photo_saved, sender=Profile, dispatch_uid="photo-variants-save-profile")
+    post_delete.connect(_photo_deleted, sender=Profile, dispatch_uid="photo-variants-delete-profile")
@@ -1,3 +1,165 @@
-from django.test import TestCase
+import shutil
+import tempfile
+import time
+from datetime import date
+from io import BytesIO
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APIClient
+from apps.mentors.models import Mentor
+from apps.projects.models import Group, Project
+from apps.users.authentication import RoleRefreshToken
+from apps.users.models import Profile
+from apps.users.permissions import CompiledRolePermissions, RolePermission, get_user_state, has_perm
+from apps.users.services.photos import ProfilePhotoService
 
-# Create your tests here.
+
+class RoleClaimTests(TestCase):
+    """
+    The role claim of an access token must not outlive a role change,
+    deactivation or deletion of its user.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="admin-claims", password="pw")
+        self.profile = Profile.objects.create(user=self.user, role="Admin")
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {RoleRefreshToken.for_user(self.user).access_token}"
+        )
+
+    def test_admin_token_is_accepted(self):
+        self.assertEqual(self.client.get(reverse("api:role-statistics")).status_code, 200)
+        self.assertEqual(self.client.get(reverse("api:user-management-list")).status_code, 200)
+
+    def test_demoted_admin_loses_access(self):
+        self.client.get(reverse("api:role-statistics"))  # estado cacheado con el rol anterior
+        self.profile.role = "Trabajador"
+        self.profile.save()
+
+        self.assertEqual(self.client.get(reverse("api:role-statistics")).status_code, 403)
+        self.assertEqual(self.client.get(reverse("api:user-management-list")).status_code, 403)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(reverse("api:role-statistics"))
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get(reverse("api:role-statistics")).status_code, 401)
+        self.assertEqual(self.client.get(reverse("api:mentor-list")).status_code, 401)
+
+    def test_deleted_user_is_rejected(self):
+        self.user.delete()
+        self.assertEqual(self.client.get(reverse("api:mentor-list")).status_code, 401)
+
+
+class ProfilePhotoRenderTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def store_png(self, size):
+        buffer = BytesIO()
+        Image.new("RGB", size, (200, 30, 30)).save(buffer, "PNG")
+        return default_storage.save("user_photos/photo.png", ContentFile(buffer.getvalue()))
+
+    def test_decompression_bomb_is_an_invalid_image(self):
+        name = self.store_png((64, 64))
+
+        with mock.patch.object(Image, "MAX_IMAGE_PIXELS", 100):
+            with self.assertRaises(ValueError):
+                ProfilePhotoService.render(name)
+
+    def test_not_an_image_is_rejected(self):
+        name = default_storage.save("user_photos/photo.png", ContentFile(b"no es una imagen"))
+
+        with self.assertRaises(ValueError):
+            ProfilePhotoService.render(name)
+
+
+class UserManagementDestroyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        admin = User.objects.create_user(username="admin-users-destroy", password="pw")
+        Profile.objects.create(user=admin, role="Admin")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RoleRefreshToken.for_user(admin).access_token}")
+
+    def test_mentor_of_a_group_returns_conflict(self):
+        user = User.objects.create_user(username="mentor-with-group", password="pw")
+        profile = Profile.objects.create(user=user, role="Mentor")
+        Group.objects.create(
+            project=Project.objects.create(name="Cine"),
+            mentor=Mentor.objects.create(profile=profile, charge="Mentor"),
+            location="Sede", mode="presencial", start_date=date(2026, 2, 1), end_date=date(2026, 6, 30),
+        )
+
+        response = self.client.delete(reverse("api:user-management-detail", args=[profile.pk]))
+
+        self.assertEqual(response.status_code, 409)
+        self.assertTrue(User.objects.filter(pk=user.pk).exists())
+
+
+class CompiledRolePermissionsTests(TestCase):
+    def test_matches_a_plain_scan_of_role_permissions(self):
+        def scan(role, perm):
+            for granted in RolePermission.ROLE_PERMISSIONS.get(role, ()):
+                if granted == "*" or granted == perm or (granted.endswith(".*") and perm.startswith(granted[:-1])):
+                    return True
+            return False
+
+        perms = {
+            perm for perms in RolePermission.ROLE_PERMISSIONS.values() for perm in perms if "*" not in perm
+        } | {"academic.read", "academic.courses.write", "admin.users.delete", "product.write", "unknown.read"}
+        for role in [*RolePermission.ROLE_PERMISSIONS, "SinRol", None]:
+            for perm in perms:
+                with self.subTest(role=role, perm=perm):
+                    self.assertEqual(has_perm(role, perm), scan(role, perm))
+
+    def test_nested_wildcards_and_invalid_permissions(self):
+        compiled = CompiledRolePermissions({"Editor": ["docs.drafts.*", "docs.read"]})
+
+        self.assertTrue(compiled.has_perm("Editor", "docs.drafts.write"))
+        self.assertTrue(compiled.has_perm("Editor", "docs.drafts.images.delete"))
+        self.assertTrue(compiled.has_perm("Editor", "docs.read"))
+        self.assertFalse(compiled.has_perm("Editor", "docs.write"))
+        self.assertFalse(compiled.has_perm("Editor", "docs.draftsx.write"))
+        self.assertFalse(compiled.has_perm("Editor", None))
+
+
+@override_settings(ROLE_CACHE_TIMEOUT=60)
+class UserStateCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="cached-role", password="pw")
+        self.profile = Profile.objects.create(user=self.user, role="Mentor")
+
+    def test_state_is_cached_until_it_expires(self):
+        self.assertEqual(get_user_state(self.user.pk), ("Mentor", self.profile.pk, True))
+        # update() no emite señales: la entrada sigue vigente
+        Profile.objects.filter(pk=self.profile.pk).update(role="Admin")
+        with self.assertNumQueries(0):
+            self.assertEqual(get_user_state(self.user.pk)[0], "Mentor")
+
+        with mock.patch("time.time", return_value=time.time() + 61):
+            self.assertEqual(get_user_state(self.user.pk)[0], "Admin")
+
+    def test_profile_save_drops_the_entry(self):
+        get_user_state(self.user.pk)
+        self.profile.role = "Admin"
+        self.profile.save()
+
+        self.assertEqual(get_user_state(self.user.pk)[0], "Admin")
+
+    def test_missing_user_is_inactive(self):
+        self.assertEqual(get_user_state(self.user.pk + 1000), (None, None, False))
@@ -4,12 +4,15 @@ from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from .authentication import RoleJWTAuthentication
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import ProtectedError
 from .models import Profile
 from .serializers import ChangePasswordSerializer, ProfileSerializer
-from apps.users.permissions import RolePermission
-from rest_framework.decorators import api_view, permission_classes
+from apps.users.permissions import RolePermission, get_user_role
+from apps.core.services.file_cleanup import FileCleanupService
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 import logging
 
 logger = logging.getLogger(__name__)
@@ -32,7 +35,7 @@ class CurrentUserView(APIView):
     Returns the current authenticated user's profile information including role.
     Requires JWT authentication.
     """
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [RoleJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -60,7 +63,7 @@ class ChangePasswordView(APIView):
     Allows an authenticated user to change their password.
     Requires JWT authentication.
     """
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [RoleJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
@@ -104,7 +107,7 @@ class UserManagementViewSet(viewsets.ModelViewSet):
     """
     queryset = Profile.objects.all()
     serializer_class = ProfileSerializer
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [RoleJWTAuthentication]
     permission_classes = [IsAuthenticated, RolePermission]
     required_permission = 'users.write'
     
@@ -113,9 +116,7 @@ class UserManagementViewSet(viewsets.ModelViewSet):
         SuperAdmin can see all users.
         Admin can see all users except SuperAdmin.
         """
-        user = getattr(self.request, "user", None)
-        profile = getattr(user, "profile", None)
-        user_role = getattr(profile, "role", None)
+        user_role = get_user_role(getattr(self.request, "user", None))
 
         if user_role == 'SuperAdmin':
             return Profile.objects.all()
@@ -134,7 +135,7 @@ class UserManagementViewSet(viewsets.ModelViewSet):
         
         # Validar permisos especiales
         new_role = request.data.get('role')
-        user_role = request.user.profile.role
+        user_role = get_user_role(request.user)
         
         # Solo SuperAdmin puede asignar rol SuperAdmin
         if new_role == 'SuperAdmin' and user_role != 'SuperAdmin':
@@ -144,7 +145,7 @@ class UserManagementViewSet(viewsets.ModelViewSet):
             )
         
         # No permitir que Admin se quite su propio rol de Admin
-        if instance.user == request.user and user_role == 'Admin' and new_role != 'Admin':
+        if instance.user_id == request.user.pk and user_role == 'Admin' and new_role != 'Admin':
             return Response(
                 {"error": "You cannot change your own admin role"},
                 status=status.HTTP_403_FORBIDDEN
@@ -161,13 +162,14 @@ class UserManagementViewSet(viewsets.ModelViewSet):
     def destroy(self, request, *args, **kwargs):
         """
         Delete user, profile, and related data.
-        Cannot delete yourself or other SuperAdmins.
+        Cannot delete yourself or other SuperAdmins, nor the mentor of
+        a group (409).
         """
         instance = self.get_object()
-        user_role = request.user.profile.role
+        user_role = get_user_role(request.user)
         
         # No permitir eliminar a uno mismo
-        if instance.user == request.user:
+        if instance.user_id == request.user.pk:
             return Response(
                 {"error": "You cannot delete yourself"},
                 status=status.HTTP_403_FORBIDDEN
@@ -180,12 +182,22 @@ class UserManagementViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Eliminar foto si existe
-        if instance.photo:
-            instance.photo.delete(save=False)
-        
-        # Eliminar usuario (esto eliminará el profile en cascada)
-        instance.user.delete()
+        mentor = getattr(instance, "mentor", None)
+        try:
+            with transaction.atomic():
+                # Foto y certificado se borran en segundo plano cuando el borrado se confirma
+                FileCleanupService.schedule(
+                    instance.photo.name,
+                    mentor.certificate.name if mentor is not None else None,
+                )
+                # Eliminar usuario (esto eliminará el profile en cascada)
+                instance.user.delete()
+        except ProtectedError:
+            # Un mentor con grupos (Group.mentor es PROTECT)
+            return Response(
+                {"error": "The user is the mentor of one or more groups; reassign them first"},
+                status=status.HTTP_409_CONFLICT
+            )
         
         return Response(
             {"deleted": True, "username": instance.user.username},
@@ -194,6 +206,7 @@ class UserManagementViewSet(viewsets.ModelViewSet):
 
 
 @api_view(['GET'])
+@authentication_classes([RoleJWTAuthentication])
 @permission_classes([IsAuthenticated])
 def debug_permissions(request):
     """
@@ -204,7 +217,7 @@ def debug_permissions(request):
         user = request.user
         profile = user.profile
         
-        from apps.users.permissions import RolePermission
+        from apps.users.permissions import RolePermission, get_user_role
         user_permissions = RolePermission.ROLE_PERMISSIONS.get(profile.role, [])
         
         # Verificar permisos específicos
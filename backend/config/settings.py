@@ -58,6 +58,8 @@ INSTALLED_APPS = [
 # ==================================================
 
 MIDDLEWARE = [
+    # Primero, para que la latencia registrada incluya todo el stack
+    "apps.core.middleware.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -150,6 +152,30 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Cada contenido se guarda una sola vez (ruta por SHA-256, con conteo de referencias)
+STORAGES = {
+    "default": {
+        "BACKEND": config("MEDIA_STORAGE_BACKEND", default="apps.core.storage.ContentAddressedStorage"),
+    },
+    "staticfiles": {
+        "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage",
+    },
+}
+
+# Borrado diferido de archivos (outbox FileDeletion) y barrido de huérfanos en MEDIA_ROOT
+FILE_CLEANUP_BATCH_SIZE = config("FILE_CLEANUP_BATCH_SIZE", default=500, cast=int)
+FILE_CLEANUP_MAX_ATTEMPTS = config("FILE_CLEANUP_MAX_ATTEMPTS", default=5, cast=int)
+FILE_SWEEP_BATCH_SIZE = config("FILE_SWEEP_BATCH_SIZE", default=1000, cast=int)
+FILE_SWEEP_GRACE_HOURS = config("FILE_SWEEP_GRACE_HOURS", default=6, cast=int)
+
+# Media servida por una vista con control de acceso (URLs firmadas por usuario);
+# el proxy transfiere los bytes con X-Accel-Redirect ("nginx") o X-Sendfile ("sendfile")
+MEDIA_PROTECTED = config("MEDIA_PROTECTED", default=True, cast=bool)
+MEDIA_URL_TOKEN_WINDOW = config("MEDIA_URL_TOKEN_WINDOW", default=6 * 3600, cast=int)
+MEDIA_SENDFILE_BACKEND = config("MEDIA_SENDFILE_BACKEND", default="")
+MEDIA_ACCEL_REDIRECT_PREFIX = config("MEDIA_ACCEL_REDIRECT_PREFIX", default="/protected-media/")
+MEDIA_CACHE_MAX_AGE = config("MEDIA_CACHE_MAX_AGE", default=24 * 3600, cast=int)
+
 PROFILE_PHOTOS_DIR = "user_photos"
 MENTORS_CERTIFICATES_DIR = "mentors_certificates"
 
@@ -161,7 +187,7 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "apps.users.authentication.StatelessRoleJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         # ✅ CAMBIO: En desarrollo, permitir acceso por defecto
@@ -199,8 +225,14 @@ SIMPLE_JWT = {
     "ALGORITHM": "HS256",
     "SIGNING_KEY": SECRET_KEY,
     "AUTH_HEADER_TYPES": ("Bearer",),
+    # El rol y el id del perfil viajan firmados en el token
+    "TOKEN_OBTAIN_SERIALIZER": "apps.users.serializers.RoleTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "apps.users.serializers.RoleTokenRefreshSerializer",
 }
 
+# Segundos que se cachea el rol de cada usuario para RolePermission
+ROLE_CACHE_TIMEOUT = 60
+
 # ==================================================
 # CORS
 # ==================================================
@@ -263,3 +295,52 @@ PHOTO_UPLOAD_MAX_MEMORY_SIZE = 2 * 1024 * 1024
 
 ALLOWED_IMAGE_EXTENSIONS = [".jpg", ".jpeg", ".png"]
 ALLOWED_FILE_EXTENSIONS = [".pdf"]
+
+# Subida por partes de certificados: tamaño máximo del archivo y de cada chunk
+# (bytes), y horas sin recibir chunks antes de descartar el upload
+CERTIFICATE_UPLOAD_MAX_SIZE = config("CERTIFICATE_UPLOAD_MAX_SIZE", default=50 * 1024 * 1024, cast=int)
+CERTIFICATE_UPLOAD_CHUNK_SIZE = config("CERTIFICATE_UPLOAD_CHUNK_SIZE", default=5 * 1024 * 1024, cast=int)
+CERTIFICATE_UPLOAD_EXPIRY_HOURS = config("CERTIFICATE_UPLOAD_EXPIRY_HOURS", default=24, cast=int)
+
+# ==================================================
+# EVENTS
+# ==================================================
+
+# "materialized": cada ocurrencia semanal se guarda como Event
+# "virtual": solo se guardan excepciones y el calendario calcula las ocurrencias
+EVENTS_RECURRENCE_MODE = config("EVENTS_RECURRENCE_MODE", default="materialized")
+
+# Modo virtual: días máximos del rango que expande el listado de eventos
+EVENTS_VIRTUAL_MAX_DAYS = config("EVENTS_VIRTUAL_MAX_DAYS", default=366, cast=int)
+
+# Modo virtual: días hacia atrás cuyas ocurrencias se guardan como Event para generar asistencia
+ATTENDANCE_BACKFILL_DAYS = config("ATTENDANCE_BACKFILL_DAYS", default=7, cast=int)
+
+# ==================================================
+# DASHBOARD
+# ==================================================
+
+# Segundos tras los que el snapshot del dashboard se considera desactualizado
+DASHBOARD_SNAPSHOT_MAX_AGE = config("DASHBOARD_SNAPSHOT_MAX_AGE", default=300, cast=int)
+# True: se sirve el snapshot desactualizado y Huey lo recalcula en segundo plano
+# False: se recalcula antes de responder
+DASHBOARD_SNAPSHOT_STALE_WHILE_REVALIDATE = config("DASHBOARD_SNAPSHOT_STALE_WHILE_REVALIDATE", default=True, cast=bool)
+
+# Recolector de métricas del sistema (un hilo por proceso)
+METRICS_ENABLED = config("METRICS_ENABLED", default=True, cast=bool)
+METRICS_SAMPLE_INTERVAL = config("METRICS_SAMPLE_INTERVAL", default=10, cast=int)  # segundos
+METRICS_HISTORY_SIZE = config("METRICS_HISTORY_SIZE", default=360, cast=int)  # muestras (1 hora)
+METRICS_LOGIN_WINDOW_HOURS = config("METRICS_LOGIN_WINDOW_HOURS", default=24, cast=int)
+
+# Importación masiva de mentores: filas por archivo y procesos para hashear
+# contraseñas (0: uno por CPU)
+MENTOR_IMPORT_MAX_ROWS = config("MENTOR_IMPORT_MAX_ROWS", default=1000, cast=int)
+MENTOR_IMPORT_HASH_WORKERS = config("MENTOR_IMPORT_HASH_WORKERS", default=0, cast=int)
+
+# Histogramas por ruta de consultas, tiempo de BD, serializer y latencia
+INSTRUMENTATION_ENABLED = config("INSTRUMENTATION_ENABLED", default=True, cast=bool)
+# Agrega el header Server-Timing a cada respuesta
+INSTRUMENTATION_SERVER_TIMING = config("INSTRUMENTATION_SERVER_TIMING", default=False, cast=bool)
+
+# Lado mayor (px) de la foto de perfil re-codificada; las variantes son de 64/256/512
+PROFILE_PHOTO_MAX_SIZE = config("PROFILE_PHOTO_MAX_SIZE", default=1024, cast=int)
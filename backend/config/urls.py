@@ -16,7 +16,7 @@ Including another URLconf
 """
 
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.http import JsonResponse
 from django.conf import settings
 from django.conf.urls.static import static
@@ -24,6 +24,7 @@ from django.db import connection
 from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework import routers
 from apps.mentors.views import MentorViewSet 
+from apps.core.views import protected_media
 import time
 
 def healthcheck(request):
@@ -85,6 +86,13 @@ urlpatterns = [
     path("api/", include("apps.api.urls", namespace="api")),
 ]
 
+if settings.MEDIA_PROTECTED:
+    # Fotos y certificados con control de acceso (también en producción)
+    urlpatterns += [
+        re_path(rf"^{settings.MEDIA_URL.lstrip('/')}(?P<path>.+)$", protected_media, name="protected-media"),
+    ]
+
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    if not settings.MEDIA_PROTECTED:
+        urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)